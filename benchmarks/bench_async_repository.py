@@ -0,0 +1,115 @@
+"""
+bench_async_repository.py
+
+Requests per second of an endpoint making four independent I/O bound lookups,
+written as a sync view with Repository and as an async view gathering
+AsyncRepository calls. Both run under the same number of worker threads.
+Database round trips are simulated with a fixed latency per statement.
+
+The async view wins while requests mostly wait on the database. With very
+short round trips the extra event loop and thread hand offs per request make
+it slower than the sync view, so measure before converting views.
+
+    pip install flask-easy[async]
+    python benchmarks/bench_async_repository.py
+
+Author: Joseph Maclean Arhin
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from playhouse.pool import PooledSqliteDatabase
+from project import run_in_project
+
+from flask_easy import FlaskEasy, ResponseEntity, db, fields
+from flask_easy.repository.sql import AsyncRepository, Repository
+
+LATENCY = 0.02
+LOOKUPS = 4
+WORKERS = 8
+REQUESTS = 400
+
+
+class SlowSqliteDatabase(PooledSqliteDatabase):  # pylint: disable=W0223
+    """pooled sqlite with a network round trip added to every statement"""
+
+    def execute_sql(self, sql, params=None):
+        time.sleep(LATENCY)
+        return super().execute_sql(sql, params)
+
+
+class Item(db.Model):
+    """row looked up by the views"""
+
+    name = fields.CharField()
+
+
+class ItemRepository(Repository):
+    """synchronous item lookups"""
+
+    model = Item
+
+
+class AsyncItemRepository(AsyncRepository):
+    """item lookups awaited on the executor"""
+
+    model = Item
+
+
+def run(app, url):
+    """requests per second with WORKERS concurrent clients"""
+
+    def worker(count):
+        client = app.test_client()
+        for _ in range(count):
+            assert client.get(url).status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        list(pool.map(worker, [REQUESTS // WORKERS] * WORKERS))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def main(root):
+    """benchmark the sync and async endpoints"""
+    config = type(
+        "Config",
+        (),
+        {
+            "APP_NAME": "bench",
+            "DATABASE": {
+                "engine": f"{__name__}.SlowSqliteDatabase",
+                "name": os.path.join(root, "bench.db"),
+                "max_connections": 64,
+                "check_same_thread": False,
+            },
+        },
+    )
+    app = FlaskEasy().init_app(import_name="bench", root_path=root, config=config)
+    Item.create_table()
+    Item.insert_many([{"name": f"item-{i}"} for i in range(LOOKUPS)]).execute(
+        db.database
+    )
+    db.database.close()
+
+    @app.get("/sync")
+    def sync_view():
+        items = [ItemRepository.find_by_id(i) for i in range(1, LOOKUPS + 1)]
+        return ResponseEntity.ok([item.name for item in items])
+
+    @app.get("/async")
+    async def async_view():
+        items = await asyncio.gather(
+            *[AsyncItemRepository.find_by_id(i) for i in range(1, LOOKUPS + 1)]
+        )
+        return ResponseEntity.ok([item.name for item in items])
+
+    for label in ("sync", "async"):
+        rps = run(app, f"/{label}")
+        print(f"{label:<6} {rps:10,.0f} req/s  ({WORKERS} workers)")
+
+
+if __name__ == "__main__":
+    run_in_project(main)
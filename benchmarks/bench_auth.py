@@ -0,0 +1,105 @@
+"""
+bench_auth.py
+
+Per request overhead of auth_required with a decoder verifying an HMAC
+signed token, the way JWT decoders do. Compares the previous decorator,
+which inspected the view signature and decoded the token on every call,
+with the current one with and without the token cache.
+
+    python benchmarks/bench_auth.py
+
+Author: Joseph Maclean Arhin
+"""
+import base64
+import hashlib
+import hmac
+import inspect
+import json
+import time
+import timeit
+from functools import wraps
+
+from flask import request
+from project import run_in_project
+
+from flask_easy import FlaskEasy, auth_required, authenticator
+from flask_easy.exc import Unauthorized
+from flask_easy.security import TokenDecoder, UserDetailsToken
+
+SECRET = b"secret"
+CALLS = 20000
+
+
+def sign(payload: dict) -> str:
+    """create a signed token"""
+    body = base64.urlsafe_b64encode(json.dumps(payload).encode())
+    signature = hmac.new(SECRET, body, hashlib.sha256).hexdigest()
+    return f"Bearer {body.decode()}.{signature}"
+
+
+class SignedTokenDecoder(TokenDecoder):
+    """verifies the token signature, iterated like a key derivation"""
+
+    def decode_token(self) -> UserDetailsToken:
+        body, signature = self.request.headers["Authorization"][7:].split(".")
+        digest = body.encode()
+        for _ in range(50):
+            digest = hmac.new(SECRET, digest, hashlib.sha256).digest()
+        expected = hmac.new(SECRET, body.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(signature, expected):
+            raise Unauthorized()
+        payload = json.loads(base64.urlsafe_b64decode(body))
+        return UserDetailsToken(payload["sub"], payload["roles"], payload["exp"])
+
+
+def legacy_auth_required(roles=None):
+    """auth_required as it was before signatures were inspected once"""
+
+    def authorize_user(func):
+        @wraps(func)
+        def view_wrapper(*args, **kwargs):
+            authenticator.token_decoder.set_request(request)
+            user_details = authenticator.token_decoder().decode_token()
+            for role in roles or []:
+                if role not in user_details.roles:
+                    raise Unauthorized()
+            if "username" in inspect.getfullargspec(func).args:
+                kwargs["username"] = user_details.username
+            return func(*args, **kwargs)
+
+        return view_wrapper
+
+    return authorize_user
+
+
+def view(username):
+    """protected view"""
+    return username
+
+
+def main(root):
+    """time each decorator"""
+    config = type("Config", (), {"APP_NAME": "bench"})
+    app = FlaskEasy().init_app(import_name="bench", root_path=root, config=config)
+    FlaskEasy.register_auth(SignedTokenDecoder)
+    token = sign(
+        {"sub": "maclean", "roles": ["user", "admin"], "exp": time.time() + 3600}
+    )
+
+    legacy = legacy_auth_required(roles=["user"])(view)
+    current = auth_required(roles=["user"])(view)
+    with app.test_request_context(headers={"Authorization": token}):
+        for label, func, cache in (
+            ("legacy", legacy, False),
+            ("no cache", current, False),
+            ("cache", current, True),
+        ):
+            authenticator.token_cache = None
+            if cache:
+                authenticator.enable_token_cache()
+            seconds = timeit.timeit(func, number=CALLS)
+            print(f"{label:<9} {seconds / CALLS * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    run_in_project(main)
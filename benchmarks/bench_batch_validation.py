@@ -0,0 +1,72 @@
+"""
+bench_batch_validation.py
+
+Time and peak memory of validating a 100k item import with request.json and
+a many=True schema, against validator(many=True) which parses and loads the
+request body item by item.
+
+    python benchmarks/bench_batch_validation.py
+
+Author: Joseph Maclean Arhin
+"""
+import json
+import time
+import tracemalloc
+
+from flask import request
+from project import run_in_project
+
+from flask_easy import FlaskEasy, ResponseEntity, schema, validator
+from flask_easy.exc.app_exceptions import ValidationException
+
+ROWS = 100_000
+
+
+class RowSchema(schema.Schema):
+    """row of the validated batch"""
+
+    name = schema.fields.String(required=True)
+    email = schema.fields.String(required=True)
+    age = schema.fields.Integer()
+
+
+def main(root):
+    """measure both endpoints"""
+    config = type("Config", (), {"APP_NAME": "bench"})
+    app = FlaskEasy().init_app(import_name="bench", root_path=root, config=config)
+
+    @app.post("/json")
+    def load_json():
+        errors = RowSchema(many=True).validate(request.json)
+        if errors:
+            raise ValidationException(message=errors)
+        rows = RowSchema(many=True).load(request.json)
+        return ResponseEntity.ok({"rows": len(rows)})
+
+    @app.post("/stream")
+    @validator(RowSchema, many=True, arg_name="rows")
+    def load_stream(rows):
+        return ResponseEntity.ok({"rows": len(rows)})
+
+    body = json.dumps(
+        [
+            {"name": f"user-{i}", "email": f"user-{i}@example.com", "age": i % 90}
+            for i in range(ROWS)
+        ]
+    ).encode()
+    client = app.test_client()
+    for url in ("/json", "/stream"):
+        start = time.perf_counter()
+        response = client.post(url, data=body, content_type="application/json")
+        elapsed = time.perf_counter() - start
+        assert response.json == {"rows": ROWS}
+
+        tracemalloc.start()
+        client.post(url, data=body, content_type="application/json")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{url[1:]:<7} {elapsed:6.2f}s  peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    run_in_project(main)
@@ -0,0 +1,79 @@
+"""
+bench_bulk_update.py
+
+Rows per second of Repository.update_many / bulk_update / upsert_many
+against a loop of single row update_by_id calls on SQLite.
+
+    python benchmarks/bench_bulk_update.py
+
+Author: Joseph Maclean Arhin
+"""
+import os
+import tempfile
+import time
+
+from peewee import CharField, IntegerField, Model, SqliteDatabase
+
+from flask_easy.repository.sql import Repository
+
+ROWS = 5000
+
+
+def timed(label, func, rows):
+    """print the rows per second of func"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {rows / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        database = SqliteDatabase(os.path.join(directory, "bench.db"))
+
+        class Item(Model):
+            """updated row"""
+
+            name = CharField()
+            stock = IntegerField()
+
+            class Meta:  # pylint: disable=R0903
+                """Meta class"""
+
+                database = database
+
+        class ItemRepository(Repository):
+            """repository of the updated rows"""
+
+            model = Item
+
+        Item.create_table()
+        Item.insert_many(
+            [{"name": f"item {i}", "stock": 0} for i in range(ROWS)]
+        ).execute(database)
+        ids = list(range(1, ROWS + 1))
+
+        def single_updates():
+            """update every row with its own query"""
+            with database.atomic():
+                for obj_id in ids:
+                    ItemRepository.update_by_id(obj_id, {"stock": obj_id})
+
+        timed("update_by_id loop", single_updates, ROWS)
+        timed(
+            "update_many", lambda: ItemRepository.update_many(ids, {"stock": 1}), ROWS
+        )
+        timed(
+            "bulk_update",
+            lambda: ItemRepository.bulk_update(
+                [{"id": i, "stock": i * 2} for i in ids]
+            ),
+            ROWS,
+        )
+        timed(
+            "upsert_many",
+            lambda: ItemRepository.upsert_many(
+                [{"id": i, "name": f"item {i}", "stock": i} for i in ids[:900]]
+            ),
+            900,
+        )
@@ -0,0 +1,91 @@
+"""
+bench_compression.py
+
+CPU cost against bytes saved when compressing a multi megabyte list endpoint
+response, for every available encoding and a range of levels, whole and
+streamed chunk by chunk as ResponseEntity.stream sends it. brotli and zstd
+are measured when installed.
+
+    pip install flask-easy[br,zstd]
+    python benchmarks/bench_compression.py
+
+Author: Joseph Maclean Arhin
+"""
+import time
+
+from flask_easy.compression import ENCODINGS
+from flask_easy.json_backend import get_json_backend
+from flask_easy.streaming import stream_json
+
+ROWS = 20000
+REPEAT = 3
+LEVELS = {
+    "gzip": (1, 6, 9),
+    "deflate": (1, 6, 9),
+    "br": (1, 4, 11),
+    "zstd": (1, 3, 19),
+}
+
+
+def best_ms(func, *args):
+    """best of REPEAT runs in milliseconds, with the last result"""
+    timings, result = [], None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), result
+
+
+def compress_stream(encoding, chunks):
+    """compress chunks as a streamed response at the default level"""
+    encoder = encoding.stream(encoding.default_level)
+    data = b"".join(encoder.compress(chunk) for chunk in chunks)
+    return data + encoder.finish()
+
+
+def main():
+    """benchmark every encoding"""
+    backend = get_json_backend()
+    rows = [
+        {
+            "id": i,
+            "name": f"user-{i}",
+            "email": f"user-{i}@example.com",
+            "active": i % 3 == 0,
+            "roles": ["reader", "writer"][: i % 2 + 1],
+            "balance": round(i * 1.37, 2),
+        }
+        for i in range(ROWS)
+    ]
+    body = backend.dumps(rows)
+    chunks = list(stream_json(rows, backend.dumps))
+    print(f"body {len(body) / 1e6:.2f} MB, {len(chunks)} streamed chunks")
+    print(
+        f"{'encoding':<14} {'level':>5} {'ms':>8} {'MB/s':>8} {'size':>8} {'saved':>7}"
+    )
+
+    for name, encoding_class in ENCODINGS.items():
+        try:
+            encoding = encoding_class()
+        except ImportError:
+            print(f"{name:<14} not installed")
+            continue
+        for level in LEVELS[name]:
+            millis, compressed = best_ms(encoding.compress, body, level)
+            saved = 1 - len(compressed) / len(body)
+            print(
+                f"{name:<14} {level:>5} {millis:8.1f} {len(body) / 1e3 / millis:8.1f}"
+                f" {len(compressed) / 1e3:7.0f}K {saved:7.1%}"
+            )
+
+        millis, compressed = best_ms(compress_stream, encoding, chunks)
+        saved = 1 - len(compressed) / len(body)
+        print(
+            f"{name + ' stream':<14} {encoding.default_level:>5} {millis:8.1f}"
+            f" {len(body) / 1e3 / millis:8.1f} {len(compressed) / 1e3:7.0f}K {saved:7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
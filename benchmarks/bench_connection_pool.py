@@ -0,0 +1,52 @@
+"""
+bench_connection_pool.py
+
+Requests per second of a flask easy app reading one row per request, with
+and without DATABASE pooling. SQLite connections are cheap to open, the gap
+is much wider on Postgres/MySQL where every connect is a TCP handshake plus
+authentication.
+
+    python benchmarks/bench_connection_pool.py
+
+Author: Joseph Maclean Arhin
+"""
+import os
+import time
+from project import run_in_project
+
+from flask_easy import FlaskEasy, ResponseEntity, db
+
+REQUESTS = 3000
+
+
+def run(root, database_config):
+    """requests per second for one DATABASE config"""
+    config = type("Config", (), {"APP_NAME": "bench", "DATABASE": database_config})
+    app = FlaskEasy().init_app(import_name="bench", root_path=root, config=config)
+    database = db.database
+
+    @app.get("/")
+    def index():
+        row = database.execute_sql("SELECT 1").fetchone()
+        return ResponseEntity.ok({"value": row[0]})
+
+    client = app.test_client()
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        client.get("/")
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def main(root):
+    """benchmark requests with and without a connection pool"""
+    name = os.path.join(root, "bench.db")
+    for label, extra in (
+        ("no pool", {}),
+        ("pool", {"pool": {"max_connections": 8, "stale_timeout": 300}}),
+    ):
+        rps = run(root, {"engine": "SqliteDatabase", "name": name, **extra})
+        print(f"{label:<8} {rps:10,.0f} req/s")
+
+
+if __name__ == "__main__":
+    run_in_project(main)
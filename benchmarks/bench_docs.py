@@ -0,0 +1,114 @@
+"""
+bench_docs.py
+
+Time to serve /apispec_1.json for an app with many documented blueprints,
+generated by flasgger on the first request of every worker and prebuilt with
+flask easy docs:build, with and without a conditional GET.
+
+    python benchmarks/bench_docs.py
+
+Author: Joseph Maclean Arhin
+"""
+import os
+import time
+
+from flask import Blueprint
+from project import run_in_project
+
+from flask_easy import FlaskEasy, ResponseEntity, schema, validator
+from flask_easy.docs import StaticSpec
+
+BLUEPRINTS = 300
+REQUESTS = 20
+
+
+class ItemSchema(schema.Schema):
+    """body documented by every route"""
+
+    name = schema.fields.String(required=True)
+    price = schema.fields.Float()
+
+
+def make_blueprint(index):
+    """a blueprint with a documented get and post route"""
+    api = Blueprint(f"items_{index}", __name__, url_prefix=f"/items-{index}")
+
+    @api.get("/<int:item_id>")
+    def get_item(item_id):
+        """
+        Fetch an item
+        ---
+        parameters:
+          - in: path
+            name: item_id
+            type: integer
+            required: true
+        responses:
+          200:
+            description: the item
+        """
+        return ResponseEntity.ok({"id": item_id})
+
+    @api.post("/")
+    @validator(ItemSchema)
+    def create_item():
+        """
+        Create an item
+        ---
+        responses:
+          201:
+            description: created
+        """
+        return ResponseEntity.created({})
+
+    return api
+
+
+def create_app(root, spec_file=None):
+    """app with BLUEPRINTS blueprints"""
+    config = type(
+        "Config",
+        (),
+        {"APP_NAME": "bench", "OPENAPI_SPEC_FILE": spec_file},
+    )
+    app = FlaskEasy().init_app(import_name="bench", root_path=root, config=config)
+    for index in range(BLUEPRINTS):
+        app.register_blueprint(make_blueprint(index))
+    return app
+
+
+def run(app, headers=None):
+    """milliseconds of the first request and per following request"""
+    client = app.test_client()
+    start = time.perf_counter()
+    client.get("/apispec_1.json", headers=headers)
+    first_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        client.get("/apispec_1.json", headers=headers)
+    return first_ms, (time.perf_counter() - start) * 1000 / REQUESTS
+
+
+def main(root):
+    """benchmark generated and prebuilt specs"""
+    spec_file = os.path.join(root, "apispec.json")
+    start = time.perf_counter()
+    StaticSpec.build(create_app(root)).save(spec_file)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    app = create_app(root, spec_file)
+    etag = app.extensions["flask_easy_spec"].etag
+    results = {
+        "flasgger": run(create_app(root)),
+        "prebuilt": run(app),
+        "prebuilt, 304": run(app, {"If-None-Match": f'"{etag}"'}),
+    }
+
+    print(f"docs:build      {build_ms:10.2f} ms once")
+    print(f"{'':<15} {'first':>10} {'then':>10}")
+    for label, (first_ms, then_ms) in results.items():
+        print(f"{label:<15} {first_ms:10.2f} {then_ms:10.2f} ms/request")
+
+
+if __name__ == "__main__":
+    run_in_project(main)
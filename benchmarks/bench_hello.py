@@ -0,0 +1,76 @@
+"""
+bench_hello.py
+
+Cost of turning the value returned by the hello endpoint scaffolded by
+flask easy generate view into a response: ResponseEntity.ok, a plain dict and
+a dataclass, against flask's jsonify and a plain flask app, then a list of
+100 rows. Each flask easy row is run with the stdlib json and with orjson
+when installed: a returned dict or list is written with JSON_BACKEND, which
+is where the bare return path gains over flask. make_response is timed on
+its own since a full test client round trip is dominated by the client
+itself.
+
+    python benchmarks/bench_hello.py
+
+Author: Joseph Maclean Arhin
+"""
+import dataclasses
+import timeit
+
+from flask import Flask, jsonify
+from project import run_in_project
+
+from flask_easy import FlaskEasy, ResponseEntity
+
+REQUESTS = 20000
+REPEAT = 7
+ROWS = [
+    {"id": i, "name": f"user-{i}", "email": f"user-{i}@example.com", "active": True}
+    for i in range(100)
+]
+
+
+@dataclasses.dataclass
+class Greeting:
+    """the hello endpoint body as a dataclass"""
+
+    greeting: str
+
+
+def run(app, view, expected, requests=REQUESTS):
+    """best of REPEAT runs in microseconds per response"""
+    with app.test_request_context("/hello"):
+        assert app.make_response(view()).json == expected
+        seconds = timeit.repeat(
+            lambda: app.make_response(view()), number=requests, repeat=REPEAT
+        )
+    return min(seconds) * 1e6 / requests
+
+
+def main(root):
+    """benchmark the hello endpoint"""
+    hello = {"greeting": "hello"}
+    views = {
+        "ResponseEntity.ok": lambda: ResponseEntity.ok(hello),
+        "dict": lambda: hello,
+        "dataclass": lambda: Greeting("hello"),
+        "jsonify": lambda: jsonify(hello),
+    }
+    results = {}
+    for backend in ("json", "orjson"):
+        config = type("Config", (), {"APP_NAME": "bench", "JSON_BACKEND": backend})
+        app = FlaskEasy().init_app(import_name="bench", root_path=root, config=config)
+        if app.json_backend.name != backend:
+            continue
+        for label, view in views.items():
+            results[f"{label}, {backend}"] = run(app, view, hello)
+        results[f"100 rows, {backend}"] = run(app, lambda: ROWS, ROWS, REQUESTS // 10)
+    flask = Flask("bench")
+    results["flask, dict"] = run(flask, views["dict"], hello)
+    results["flask, 100 rows"] = run(flask, lambda: ROWS, ROWS, REQUESTS // 10)
+    for label, micros in results.items():
+        print(f"{label:<26} {micros:8.2f} us/response")
+
+
+if __name__ == "__main__":
+    run_in_project(main)
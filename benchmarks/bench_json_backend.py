@@ -0,0 +1,59 @@
+"""
+bench_json_backend.py
+
+Throughput of the available JSON_BACKEND options when serializing a large
+list payload the way make_response does (schema dump, then backend dumps).
+
+    pip install flask-easy[orjson] flask-easy[ujson]
+    python benchmarks/bench_json_backend.py
+
+Author: Joseph Maclean Arhin
+"""
+import datetime
+import time
+import warnings
+
+from marshmallow import Schema, fields
+
+from flask_easy.json_backend import BACKENDS, get_json_backend
+
+
+class ItemSchema(Schema):
+    """serialized row"""
+
+    id = fields.Integer()
+    name = fields.String()
+    price = fields.Float()
+    tags = fields.List(fields.String())
+    created_at = fields.DateTime()
+
+
+ROWS = [
+    {
+        "id": i,
+        "name": f"item {i}",
+        "price": i * 1.25,
+        "tags": ["a", "b", "c"],
+        "created_at": datetime.datetime(2022, 1, 1, 12, 0, 0),
+    }
+    for i in range(10000)
+]
+
+
+if __name__ == "__main__":
+    data = ItemSchema(many=True).dump(ROWS)
+    for name in BACKENDS:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            backend = get_json_backend(name)
+        if backend.name != name:
+            print(f"{name:<8} not installed")
+            continue
+        start = time.perf_counter()
+        for _ in range(20):
+            body = backend.dumps(data)
+        elapsed = (time.perf_counter() - start) / 20
+        print(
+            f"{name:<8} {elapsed * 1e3:8.2f}ms per payload  "
+            f"{len(ROWS) / elapsed:12,.0f} rows/s  {len(body):,} bytes"
+        )
@@ -0,0 +1,61 @@
+"""
+bench_not_found.py
+
+Requests per second of 404-heavy traffic, e.g a scanner probing ids, with the
+previous exceptions which logged an error as soon as they were created and
+with the current ones logged by the error handler at debug level. Logs are
+written to a file.
+
+    python benchmarks/bench_not_found.py
+
+Author: Joseph Maclean Arhin
+"""
+import logging
+import os
+import time
+
+from flask import current_app
+from project import run_in_project
+
+from flask_easy import FlaskEasy
+from flask_easy.exc import NotFoundException
+
+REQUESTS = 5000
+
+
+class LegacyNotFoundException(NotFoundException):
+    """NotFoundException as it was before logging moved to the error handler"""
+
+    def __init__(self, message="Resource not found"):
+        current_app.logger.error(message)
+        super().__init__(message)
+
+
+def main(root):
+    """requests per second for both exceptions"""
+    config = type("Config", (), {"APP_NAME": "bench"})
+    app = FlaskEasy().init_app(import_name="bench", root_path=root, config=config)
+    app.logger.addHandler(logging.FileHandler(os.path.join(root, "app.log")))
+    app.logger.setLevel(logging.INFO)
+
+    @app.get("/legacy/<int:obj_id>")
+    def legacy(obj_id):
+        raise LegacyNotFoundException(
+            {"error": f"Resource of id {obj_id} does not exist"}
+        )
+
+    @app.get("/current/<int:obj_id>")
+    def current(obj_id):
+        raise NotFoundException({"error": f"Resource of id {obj_id} does not exist"})
+
+    client = app.test_client()
+    for label in ("legacy", "current"):
+        start = time.perf_counter()
+        for obj_id in range(REQUESTS):
+            client.get(f"/{label}/{obj_id}")
+        rps = REQUESTS / (time.perf_counter() - start)
+        print(f"{label:<8} {rps:10,.0f} req/s")
+
+
+if __name__ == "__main__":
+    run_in_project(main)
@@ -0,0 +1,81 @@
+"""
+bench_pagination.py
+
+Deep page latency of keyset pagination (Repository.paginate) against
+LIMIT/OFFSET on a 200k row SQLite table.
+
+    python benchmarks/bench_pagination.py
+
+Author: Joseph Maclean Arhin
+"""
+import os
+import tempfile
+import time
+
+from peewee import AutoField, CharField, Model, SqliteDatabase
+
+from flask_easy.repository.pagination import encode_cursor, parse_order_by
+from flask_easy.repository.sql import Repository
+
+ROWS = 200000
+LIMIT = 50
+
+
+def setup(path):
+    """create and fill the benchmark table"""
+    database = SqliteDatabase(path)
+
+    class Item(Model):
+        """paginated row"""
+
+        id = AutoField()
+        name = CharField()
+
+        class Meta:  # pylint: disable=R0903
+            """Meta class"""
+
+            database = None
+
+    Item.bind(database)
+    Item.create_table()
+    with database.atomic():
+        for start in range(0, ROWS, 5000):
+            Item.insert_many(
+                [{"name": f"item {i}"} for i in range(start, start + 5000)]
+            ).execute(database)
+    return Item
+
+
+def timed(func, number=20):
+    """average duration of func in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number * 1e3
+
+
+def main(root):
+    """compare keyset and offset pagination at increasing depths"""
+    item = setup(os.path.join(root, "bench.db"))
+
+    class ItemRepository(Repository):
+        """repository paginating the rows"""
+
+        model = item
+
+    ordering = parse_order_by(None, "id")
+    for depth in (1, 100, 1000, 3999):
+        offset = (depth - 1) * LIMIT
+        cursor = encode_cursor([offset], "next", ordering) if offset else None
+        keyset = timed(lambda c=cursor: ItemRepository.paginate(c, LIMIT))
+        offset_ms = timed(
+            lambda o=offset: list(
+                item.select().order_by(item.id).offset(o).limit(LIMIT)
+            )
+        )
+        print(f"page {depth:>5}  keyset {keyset:7.3f}ms  offset {offset_ms:7.3f}ms")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        main(directory)
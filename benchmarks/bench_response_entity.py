@@ -0,0 +1,84 @@
+"""
+bench_response_entity.py
+
+Compares the slotted ResponseEntity builder against the previous
+implementation, which stored state on the class and allocated a new
+instance for every chained call.
+
+    python benchmarks/bench_response_entity.py
+
+Author: Joseph Maclean Arhin
+"""
+import timeit
+
+from flask_easy.response import ResponseEntity
+
+
+class LegacyResponseEntity:
+    """ResponseEntity as it was before request scoped builders"""
+
+    _value = None
+    _res_schema = None
+    _many = False
+    _status_code = None
+
+    def __init__(self, value, status_code, schema, **kwargs):
+        self._value = value
+        self._res_schema = schema
+        self._many = kwargs.get("many", False)
+        self._status_code = status_code
+
+    @classmethod
+    def ok(cls, data=None):  # pylint: disable=C0103
+        """ok"""
+        cls._status_code = 200
+        cls._value = data
+        return cls._response()
+
+    @classmethod
+    def schema(cls, schema, many=False):
+        """schema"""
+        cls._res_schema = schema
+        cls._many = many
+        return cls._response()
+
+    @classmethod
+    def _response(cls):
+        return cls(
+            value=cls._value,
+            status_code=cls._status_code,
+            schema=cls._res_schema,
+            many=cls._many,
+        )
+
+    @property
+    def values(self):
+        """values"""
+        return {
+            "value": self._value,
+            "schema": self._res_schema,
+            "many": self._many,
+            "status": self._status_code,
+        }
+
+
+DATA = {"greeting": "hello"}
+
+
+def build_legacy():
+    """build a response and read it back the way make_response used to"""
+    return LegacyResponseEntity.ok(DATA).schema(None, many=True).values
+
+
+def build():
+    """build a response and read its fields directly"""
+    entity = ResponseEntity.ok(DATA).schema(None, many=True)  # pylint: disable=E1101
+    # pylint: disable=protected-access
+    return entity._value, entity._res_schema, entity._many, entity._status_code
+
+
+if __name__ == "__main__":
+    NUMBER = 200000
+    for label, func in (("legacy", build_legacy), ("slotted builder", build)):
+        elapsed = timeit.timeit(func, number=NUMBER)
+        print(f"{label:<16} {elapsed / NUMBER * 1e9:8.1f}ns per response")
@@ -0,0 +1,50 @@
+"""
+bench_schema_cache.py
+
+Measures the per-response cost of building a marshmallow schema on every
+request against reusing an instance from the schema cache.
+
+    python benchmarks/bench_schema_cache.py
+
+Author: Joseph Maclean Arhin
+"""
+import timeit
+
+from marshmallow import Schema, fields
+
+from flask_easy.cache import SchemaCache
+
+
+class UserSchema(Schema):
+    """cached schema"""
+
+    id = fields.Integer()
+    name = fields.String()
+    email = fields.Email()
+    active = fields.Boolean()
+    created_at = fields.DateTime()
+
+
+SINGLE = {"id": 1, "name": "maclean", "email": "me@josephmaclean.dev", "active": True}
+MANY = [dict(SINGLE, id=i) for i in range(20)]
+
+
+def run(label, payload, many, number=20000):
+    """time uncached vs cached dumps for one payload"""
+    cache = SchemaCache()
+    uncached = timeit.timeit(
+        lambda: UserSchema(many=many).dumps(payload), number=number
+    )
+    cached = timeit.timeit(
+        lambda: cache.get_schema(UserSchema, many).dumps(payload), number=number
+    )
+    saving = (uncached - cached) / number * 1e6
+    print(
+        f"{label:<8} uncached {uncached / number * 1e6:8.2f}us  "
+        f"cached {cached / number * 1e6:8.2f}us  saving {saving:6.2f}us/request"
+    )
+
+
+if __name__ == "__main__":
+    run("single", SINGLE, many=False)
+    run("list", MANY, many=True, number=5000)
@@ -0,0 +1,133 @@
+"""
+bench_startup.py
+
+Worker boot time of a project with many view modules: import flask_easy and
+init_app with blueprints from urls.py, from a route manifest, and from a
+route manifest with LAZY_BLUEPRINTS. Every run is a fresh interpreter. Only
+the lazy manifest skips importing the view modules at boot; with several
+workers, boot once in the parent with preload_app and routing.preload
+instead.
+
+    python benchmarks/bench_startup.py
+
+Author: Joseph Maclean Arhin
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+VIEWS = 200
+RUNS = 5
+
+VIEW = """
+from flask_easy import Blueprint, ResponseEntity, schema, validator
+
+view = Blueprint("view_{index}", __name__)
+
+
+class ItemSchema(schema.Schema):
+    name = schema.fields.String(required=True)
+    price = schema.fields.Float()
+    tags = schema.fields.List(schema.fields.String())
+
+
+@view.get("/<int:item_id>")
+def get_item(item_id):
+    return ResponseEntity.ok({{"id": item_id}})
+
+
+@view.post("/")
+@validator(ItemSchema)
+def create_item():
+    return ResponseEntity.created({{}})
+"""
+
+BOOT = """
+import time
+start = time.perf_counter()
+from flask_easy import FlaskEasy
+
+class Config:
+    APP_NAME = "bench"
+    ROUTE_MANIFEST = {manifest!r}
+    LAZY_BLUEPRINTS = {lazy!r}
+
+app = FlaskEasy().init_app(import_name="bench", root_path={root!r}, config=Config)
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def write_project(root):
+    """write VIEWS view modules and a urls.py registering them"""
+    package = os.path.join(root, "bench_views")
+    os.mkdir(package)
+    with open(os.path.join(package, "__init__.py"), "w", encoding="UTF-8"):
+        pass
+    imports, routes = [], []
+    for index in range(VIEWS):
+        path = os.path.join(package, f"view_{index}.py")
+        with open(path, "w", encoding="UTF-8") as view:
+            view.write(VIEW.format(index=index))
+        imports.append(f"from bench_views.view_{index} import view as view_{index}")
+        routes.append(f"    Route(view_{index}, url_prefix='/items-{index}'),")
+    with open(os.path.join(root, "urls.py"), "w", encoding="UTF-8") as urls:
+        urls.write("from flask_easy import Route\n")
+        urls.write("\n".join(imports))
+        urls.write("\n\nroutes = [\n" + "\n".join(routes) + "\n]\n")
+
+
+def boot(root, manifest=None, lazy=False):
+    """median boot time in milliseconds"""
+    code = textwrap.dedent(BOOT).format(root=root, manifest=manifest, lazy=lazy)
+    times = sorted(
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code],
+                capture_output=True,
+                check=True,
+                text=True,
+                cwd=root,
+            ).stdout
+        )
+        for _ in range(RUNS)
+    )
+    return times[len(times) // 2]
+
+
+def main(root):
+    """benchmark boot with and without a route manifest"""
+    write_project(root)
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "flask",
+            "--app",
+            "bench_app",
+            "easy",
+            "routes:manifest",
+        ],
+        check=True,
+        cwd=root,
+        capture_output=True,
+    )
+    print(f"urls.py             {boot(root):10.1f} ms")
+    print(f"manifest            {boot(root, 'routes.json'):10.1f} ms")
+    print(f"lazy manifest       {boot(root, 'routes.json', lazy=True):10.1f} ms")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        with open(
+            os.path.join(directory, "bench_app.py"), "w", encoding="UTF-8"
+        ) as app:
+            app.write(
+                "from flask_easy import FlaskEasy\n"
+                "class Config:\n"
+                "    APP_NAME = 'bench'\n"
+                f"app = FlaskEasy().init_app(import_name='bench', root_path={directory!r},"
+                " config=Config)\n"
+            )
+        main(directory)
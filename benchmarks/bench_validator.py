@@ -0,0 +1,93 @@
+"""
+bench_validator.py
+
+POST throughput of a view validated with the previous validator, which built
+a schema and validated on every request before the view loaded the payload
+again, against the compile-once validator that loads the payload a single
+time.
+
+    python benchmarks/bench_validator.py
+
+Author: Joseph Maclean Arhin
+"""
+import time
+from functools import wraps
+
+from flask import request
+from project import run_in_project
+
+from flask_easy import FlaskEasy, ResponseEntity, g, schema, validator
+from flask_easy.exc.app_exceptions import ValidationException
+
+REQUESTS = 3000
+
+PAYLOAD = {
+    "name": "maclean",
+    "email": "me@josephmaclean.dev",
+    "age": 27,
+    "tags": ["admin", "staff", "editor"],
+    "address": {"city": "Accra", "street": "Oxford Street", "number": 12},
+}
+
+
+class AddressSchema(schema.Schema):
+    """nested address of a user"""
+
+    city = schema.fields.String(required=True)
+    street = schema.fields.String(required=True)
+    number = schema.fields.Integer()
+
+
+class UserSchema(schema.Schema):
+    """validated request body"""
+
+    name = schema.fields.String(required=True)
+    email = schema.fields.Email(required=True)
+    age = schema.fields.Integer(validate=schema.validate.Range(min=0))
+    tags = schema.fields.List(schema.fields.String())
+    address = schema.fields.Nested(AddressSchema)
+
+
+def legacy_validator(schema_class):
+    """validator as it was before schemas were built once"""
+
+    def validate_data(func):
+        @wraps(func)
+        def view_wrapper(*args, **kwargs):
+            errors = schema_class().validate(request.json)
+            if errors:
+                raise ValidationException(message=errors)
+            return func(*args, **kwargs)
+
+        return view_wrapper
+
+    return validate_data
+
+
+def main(root):
+    """requests per second for both validators"""
+    config = type("Config", (), {"APP_NAME": "bench"})
+    app = FlaskEasy().init_app(import_name="bench", root_path=root, config=config)
+
+    @app.post("/legacy")
+    @legacy_validator(UserSchema)
+    def legacy_view():
+        user = UserSchema().load(request.json)
+        return ResponseEntity.created({"name": user["name"]})
+
+    @app.post("/compiled")
+    @validator(UserSchema)
+    def compiled_view():
+        return ResponseEntity.created({"name": g.validated_data["name"]})
+
+    client = app.test_client()
+    for url in ("/legacy", "/compiled"):
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            client.post(url, json=PAYLOAD)
+        rps = REQUESTS / (time.perf_counter() - start)
+        print(f"{url[1:]:<9} {rps:10,.0f} req/s")
+
+
+if __name__ == "__main__":
+    run_in_project(main)
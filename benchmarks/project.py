@@ -0,0 +1,17 @@
+"""
+project.py
+
+Temporary flask easy project the benchmarks boot their apps from.
+
+Author: Joseph Maclean Arhin
+"""
+import os
+import tempfile
+
+
+def run_in_project(main):
+    """call main with the root of a temporary project with no routes"""
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "urls.py"), "w", encoding="UTF-8") as urls:
+            urls.write("routes = []\n")
+        main(directory)
@@ -19,6 +19,13 @@ setup(
         "apispec>=5.2.2",
         "faker>=13.12.0",
     ],
+    extras_require={
+        "orjson": ["orjson>=3.6.0"],
+        "ujson": ["ujson>=5.1.0"],
+        "async": ["asgiref>=3.2"],
+        "br": ["brotli>=1.0.9"],
+        "zstd": ["zstandard>=0.18.0"],
+    },
     entry_points={
         "console_scripts": ["easy-admin=flask_easy.scripts.easy_scripts:cli"]
     },
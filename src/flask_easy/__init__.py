@@ -3,15 +3,60 @@ __init__.py
 
 Author: Joseph Maclean Arhin
 """
+import importlib
+import sys
+import typing as t
 
-import peewee as fields
 from flask import *
-import flasgger as swagger
-import marshmallow as schema
-from .instance import FlaskEasy, db, swag, Route
-from .security import authenticator, auth_required
 from .validator import validator
-from .response import ResponseEntity
+
+if t.TYPE_CHECKING:
+    import peewee as fields
+    import flasgger as swagger
+    import marshmallow as schema
+    from .instance import FlaskEasy, db, swag, Route
+    from .security import authenticator, auth_required
+    from .response import ResponseEntity
+
+_module = sys.modules[__name__]
+
+# exports imported on first access so importing flask_easy stays cheap
+_LAZY_MODULES = {"fields": "peewee", "swagger": "flasgger", "schema": "marshmallow"}
+_LAZY_ATTRIBUTES = {
+    "FlaskEasy": ".instance",
+    "db": ".instance",
+    "swag": ".instance",
+    "Route": ".instance",
+    "authenticator": ".security",
+    "auth_required": ".security",
+    "ResponseEntity": ".response",
+}
+
+__all__ = [
+    *[
+        name
+        for name in vars(_module)
+        if not name.startswith("_") and name not in ("importlib", "sys", "t")
+    ],
+    *_LAZY_MODULES,
+    *_LAZY_ATTRIBUTES,
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        value = importlib.import_module(_LAZY_MODULES[name])
+    elif name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    setattr(_module, name, value)
+    return value
+
+
+def __dir__():
+    return sorted({*vars(_module), *__all__})
 
 
 __version__ = "0.1.3"
@@ -0,0 +1,141 @@
+"""
+cache.py
+
+Author: Joseph Maclean Arhin
+"""
+import threading
+import time
+import typing as t
+
+from collections import OrderedDict
+
+if t.TYPE_CHECKING:
+    from marshmallow import Schema
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe, size bounded cache with least recently used eviction and an
+    optional time to live. Hit, miss and eviction counters are kept for
+    monitoring
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: t.Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        return the value stored under key and mark it as recently used
+        :param key:
+        :param default: returned when the key is not cached or has expired
+        :return:
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] is not None:
+                if entry[0] <= time.monotonic():
+                    del self._data[key]
+                    entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: t.Optional[float] = None):
+        """
+        store value under key, evicting the least recently used entries
+        when the cache is full
+        :param key:
+        :param value:
+        :param ttl: seconds until the entry expires, defaults to the cache ttl
+        :return:
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, factory: t.Callable[[], t.Any]):
+        """
+        return the cached value for key or build it with factory and cache it
+        :param key:
+        :param factory: callable that builds the value on a miss
+        :return:
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        """remove key from the cache if it exists"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """remove all entries and reset counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    @property
+    def stats(self) -> dict:
+        """return cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+class SchemaCache(LRUCache):
+    """
+    Cache of marshmallow schema instances keyed by schema class, many, only
+    and exclude. Schema instances hold no per-dump state so they can be
+    shared between requests
+    """
+
+    def get_schema(
+        self,
+        schema: t.Type["Schema"],
+        many: bool = False,
+        only: t.Optional[t.Sequence[str]] = None,
+        exclude: t.Sequence[str] = (),
+    ) -> "Schema":
+        """
+        return a cached schema instance, creating one on a miss
+        :param schema: marshmallow schema class
+        :param many:
+        :param only: fields to include
+        :param exclude: fields to exclude
+        :return: schema instance
+        """
+        only = tuple(only) if only is not None else None
+        exclude = tuple(exclude or ())
+        key = (schema, many, only, exclude)
+        return self.get_or_set(
+            key, lambda: schema(many=many, only=only, exclude=exclude)
+        )
@@ -0,0 +1,289 @@
+"""
+compression.py
+
+Author: Joseph Maclean Arhin
+"""
+import importlib
+import typing as t
+import warnings
+import zlib
+
+from flask import Response, request
+
+DEFAULT_ENCODINGS = ("zstd", "br", "gzip", "deflate")
+DEFAULT_MIN_SIZE = 500
+DEFAULT_MIMETYPES = frozenset(
+    {
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+        "text/css",
+        "text/csv",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+        "text/xml",
+    }
+)
+
+Level = t.Union[int, t.Dict[str, int]]
+
+
+class Encoding:
+    """
+    A content encoding. compress encodes a whole body, stream returns an
+    encoder whose compress returns the bytes of each chunk right away and
+    finish the end of the stream
+    """
+
+    name: str = ""
+    default_level: int = 6
+    min_level: int = 1
+    max_level: int = 9
+
+    def level(self, level: t.Optional[Level]) -> int:
+        """the level to compress at, clamped to the encoding's range"""
+        if isinstance(level, dict):
+            level = level.get(self.name)
+        if level is None:
+            return self.default_level
+        return max(self.min_level, min(self.max_level, level))
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        """compress a whole body"""
+        encoder = self.stream(level)
+        return encoder.compress(data) + encoder.finish()
+
+    def stream(self, level: int):
+        """return a streaming encoder"""
+        raise NotImplementedError
+
+
+class _ZlibStream:
+    def __init__(self, level: int, wbits: int):
+        self._compressobj = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """compress chunk, flushing it to the client"""
+        return self._compressobj.compress(chunk) + self._compressobj.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        """end the stream"""
+        return self._compressobj.flush()
+
+
+class GzipEncoding(Encoding):
+    """gzip, from the standard library"""
+
+    name = "gzip"
+    wbits = 16 + zlib.MAX_WBITS
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        compressobj = zlib.compressobj(level, zlib.DEFLATED, self.wbits)
+        return compressobj.compress(data) + compressobj.flush()
+
+    def stream(self, level: int) -> _ZlibStream:
+        return _ZlibStream(level, self.wbits)
+
+
+class DeflateEncoding(GzipEncoding):
+    """deflate in a zlib container, as HTTP defines it"""
+
+    name = "deflate"
+    wbits = zlib.MAX_WBITS
+
+
+class _BrotliStream:
+    def __init__(self, brotli, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """compress chunk, flushing it to the client"""
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        """end the stream"""
+        return self._compressor.finish()
+
+
+class BrotliEncoding(Encoding):
+    """brotli, requires the brotli package"""
+
+    name = "br"
+    default_level = 4
+    min_level = 0
+    max_level = 11
+
+    def __init__(self):
+        self._brotli = importlib.import_module("brotli")
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        return self._brotli.compress(data, quality=level)
+
+    def stream(self, level: int) -> _BrotliStream:
+        return _BrotliStream(self._brotli, level)
+
+
+class _ZstdStream:
+    def __init__(self, zstandard, level: int):
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressobj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        """compress chunk, flushing it to the client"""
+        return self._compressobj.compress(chunk) + self._compressobj.flush(
+            self._flush_block
+        )
+
+    def finish(self) -> bytes:
+        """end the stream"""
+        return self._compressobj.flush()
+
+
+class ZstdEncoding(Encoding):
+    """zstandard, requires the zstandard package"""
+
+    name = "zstd"
+    default_level = 3
+    max_level = 22
+
+    def __init__(self):
+        self._zstandard = importlib.import_module("zstandard")
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        return self._zstandard.ZstdCompressor(level=level).compress(data)
+
+    def stream(self, level: int) -> _ZstdStream:
+        return _ZstdStream(self._zstandard, level)
+
+
+ENCODINGS: t.Dict[str, t.Type[Encoding]] = {
+    "zstd": ZstdEncoding,
+    "br": BrotliEncoding,
+    "gzip": GzipEncoding,
+    "deflate": DeflateEncoding,
+}
+
+
+def _load_encodings(names: t.Iterable[str], required: bool) -> t.List[Encoding]:
+    encodings = []
+    for name in names:
+        try:
+            encodings.append(ENCODINGS[name]())
+        except ImportError:
+            if required:
+                warnings.warn(
+                    f"'{name}' compression is not available, install it with "
+                    f"`pip install flask-easy[{name}]`"
+                )
+    return encodings
+
+
+def _stream(chunks: t.Iterable[t.Union[str, bytes]], encoder) -> t.Iterator[bytes]:
+    """compress a streamed body chunk by chunk"""
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = encoder.compress(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+class Compressor:
+    """
+    Compresses responses with the best encoding the client accepts. Bodies
+    smaller than min_size are sent as they are, streamed bodies are
+    compressed chunk by chunk. The level is set per encoding, and per
+    blueprint with blueprint_levels where 0 turns compression off
+    """
+
+    def __init__(
+        self,
+        encodings: t.Optional[t.Sequence[str]] = None,
+        min_size: int = DEFAULT_MIN_SIZE,
+        level: t.Optional[Level] = None,
+        blueprint_levels: t.Optional[t.Dict[str, Level]] = None,
+        mimetypes: t.Iterable[str] = DEFAULT_MIMETYPES,
+    ):
+        self.encodings = _load_encodings(
+            encodings or DEFAULT_ENCODINGS, required=encodings is not None
+        )
+        self.min_size = min_size
+        self.level = level
+        self.blueprint_levels = blueprint_levels or {}
+        self.mimetypes = frozenset(mimetypes)
+
+    def negotiate(self) -> t.Optional[Encoding]:
+        """
+        return the encoding the client prefers from its Accept-Encoding,
+        ours in order on a tie
+        """
+        accept = request.accept_encodings
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accept.quality(encoding.name)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _level(self) -> t.Optional[Level]:
+        for blueprint in request.blueprints:
+            if blueprint in self.blueprint_levels:
+                return self.blueprint_levels[blueprint]
+        return self.level
+
+    def compressible(self, response: Response) -> bool:
+        """whether response may be compressed at all"""
+        if response.mimetype not in self.mimetypes:
+            return False
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        return not (
+            "Content-Encoding" in response.headers
+            or response.direct_passthrough
+            or response.cache_control.no_transform
+        )
+
+    def compress(self, response: Response) -> Response:
+        """
+        compress response for the current request
+        :param response:
+        :return: the same response
+        """
+        if not self.compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        level = self._level()
+        if level == 0:
+            return response
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        level = encoding.level(level)
+        if response.is_streamed:
+            response.response = _stream(response.response, encoding.stream(level))
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            compressed = encoding.compress(data, level)
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding.name
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
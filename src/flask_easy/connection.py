@@ -0,0 +1,382 @@
+"""
+connection.py
+
+Author: Joseph Maclean Arhin
+"""
+import importlib
+import itertools
+import threading
+import time
+import typing as t
+from contextlib import contextmanager
+
+from flask import g, has_app_context
+from peewee import (
+    Database,
+    ForeignKeyAccessor,
+    ForeignKeyField,
+    Model,
+    ModelBase,
+    Proxy,
+)
+from playhouse import pool
+from playhouse.flask_utils import FlaskDB
+
+from .exc import SetupError
+
+POOLED_ENGINES = {
+    "SqliteDatabase": pool.PooledSqliteDatabase,
+    "PostgresqlDatabase": pool.PooledPostgresqlDatabase,
+    "MySQLDatabase": pool.PooledMySQLDatabase,
+}
+
+
+class PoolStatsMixin:
+    """
+    Keeps track of the time spent acquiring connections from a playhouse
+    connection pool
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self._acquired = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        super().__init__(*args, **kwargs)
+
+    def connect(self, reuse_if_open=False):
+        """acquire a connection from the pool, timing how long it took"""
+        start = time.perf_counter()
+        try:
+            return super().connect(reuse_if_open)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self._acquired += 1
+                self._wait_time += elapsed
+                self._max_wait_time = max(self._max_wait_time, elapsed)
+
+    def pool_stats(self) -> dict:
+        """return in use, idle and wait time statistics of the pool"""
+        with self._stats_lock:
+            acquired, wait_time = self._acquired, self._wait_time
+            max_wait_time = self._max_wait_time
+        # pylint: disable=no-member
+        return {
+            "max_connections": self._max_connections,
+            "in_use": len(self._in_use),
+            "idle": len(self._connections),
+            "acquired": acquired,
+            "wait_time_total_ms": round(wait_time * 1000, 3),
+            "wait_time_avg_ms": (
+                round(wait_time / acquired * 1000, 3) if acquired else 0.0
+            ),
+            "wait_time_max_ms": round(max_wait_time * 1000, 3),
+        }
+
+
+class QueryListenerMixin:  # pylint: disable=R0903
+    """
+    Calls every function in query_listeners with (sql, params, duration)
+    after each query the database runs, and every function in
+    lazy_load_listeners with (model, field name) when a db.Model foreign key
+    is loaded with its own query. Added to the database class by
+    create_database(instrumented=True); remove a listener from its list or
+    create the database without instrumented to leave execute_sql untouched
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.query_listeners: t.List[t.Callable[[str, t.Any, float], None]] = []
+        self.lazy_load_listeners: t.List[t.Callable[[type, str], None]] = []
+        super().__init__(*args, **kwargs)
+
+    def execute_sql(self, sql, params=None):
+        """run sql, timing it for the query listeners"""
+        if not self.query_listeners:
+            return super().execute_sql(sql, params)
+        start = time.perf_counter()
+        try:
+            return super().execute_sql(sql, params)
+        finally:
+            duration = time.perf_counter() - start
+            for listener in self.query_listeners:
+                listener(sql, params, duration)
+
+
+class LazyLoadAccessor(ForeignKeyAccessor):  # pylint: disable=R0903
+    """
+    Foreign key accessor of db.Model models. Calls the lazy_load_listeners of
+    the model's database before a related row is loaded with its own query
+    """
+
+    def get_rel_instance(self, instance):
+        if (
+            self.field.lazy_load
+            and self.name not in instance.__rel__
+            and instance.__data__.get(self.name) is not None
+        ):
+            database = self.model._meta.database  # pylint: disable=W0212
+            database = getattr(database, "obj", database)
+            for listener in getattr(database, "lazy_load_listeners", ()):
+                listener(type(instance), self.name)
+        return super().get_rel_instance(instance)
+
+
+class EasyModelBase(ModelBase):
+    """metaclass of db.Model, its foreign keys are read with LazyLoadAccessor"""
+
+    def __new__(mcs, name, bases, attrs, **kwargs):
+        for value in attrs.values():
+            if (
+                isinstance(value, ForeignKeyField)
+                and value.accessor_class is ForeignKeyAccessor
+            ):
+                value.accessor_class = LazyLoadAccessor
+        return super().__new__(mcs, name, bases, attrs, **kwargs)
+
+
+class EasyModel(Model, metaclass=EasyModelBase):
+    """base class of db.Model"""
+
+
+class InFlightMixin:
+    """
+    Counts the queries a replica is running for least_connections routing.
+    A query is counted while execute_sql runs, so a lazy query returned by a
+    repository is counted when it is iterated, not when it is built
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._in_flight_lock = threading.Lock()
+        self.in_flight = 0
+        super().__init__(*args, **kwargs)
+
+    @contextmanager
+    def running(self):
+        """count a query in flight for as long as the block runs"""
+        with self._in_flight_lock:
+            self.in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
+
+    def execute_sql(self, sql, params=None):
+        """run sql, counting it as in flight"""
+        with self.running():
+            return super().execute_sql(sql, params)
+
+
+_pool_classes: t.Dict[type, type] = {}
+_mixin_classes: t.Dict[t.Tuple[type, type], type] = {}
+
+
+def resolve_engine(engine: str) -> t.Type[Database]:
+    """
+    return the database class for an engine name e.g PostgresqlDatabase or a
+    dotted path e.g playhouse.pool.PooledPostgresqlDatabase
+    """
+    path, _, class_name = engine.rpartition(".")
+    try:
+        database_class = getattr(importlib.import_module(path or "peewee"), class_name)
+    except (ImportError, AttributeError) as error:
+        raise SetupError(f"database engine not found {engine}") from error
+    if not (isinstance(database_class, type) and issubclass(database_class, Database)):
+        raise SetupError(f"database engine is not a peewee database: {engine}")
+    return database_class
+
+
+def pooled_class(database_class: t.Type[Database]) -> type:
+    """return the pooled counterpart of a peewee database class with stats"""
+    if not issubclass(database_class, pool.PooledDatabase):
+        try:
+            database_class = POOLED_ENGINES[database_class.__name__]
+        except KeyError as error:
+            raise SetupError(
+                f"connection pooling is not supported for {database_class.__name__}"
+            ) from error
+    if database_class not in _pool_classes:
+        _pool_classes[database_class] = type(
+            database_class.__name__, (PoolStatsMixin, database_class), {}
+        )
+    return _pool_classes[database_class]
+
+
+def mixin_class(database_class: t.Type[Database], mixin: type) -> type:
+    """return a subclass of a peewee database class with mixin applied"""
+    key = (database_class, mixin)
+    if key not in _mixin_classes:
+        _mixin_classes[key] = type(database_class.__name__, (mixin, database_class), {})
+    return _mixin_classes[key]
+
+
+def create_database(
+    config: dict, instrumented: bool = False, replica: bool = False
+) -> Database:
+    """
+    create a peewee database from a DATABASE config dict. Keys other than
+    engine, name and pool are passed to the database class
+    :param config: e.g {"engine": "PostgresqlDatabase", "name": "app", "pool": {}}
+    :param instrumented: call query listeners after every query
+    :param replica: count the queries in flight for the replica router
+    :return: database
+    """
+    config = dict(config)
+    try:
+        name = config.pop("name")
+        engine = config.pop("engine")
+    except KeyError as error:
+        raise SetupError(
+            "DATABASE configuration must specify a name and engine"
+        ) from error
+
+    database_class = resolve_engine(engine)
+    pool_config = config.pop("pool", None)
+    if pool_config is not None:
+        database_class = pooled_class(database_class)
+        config.update(pool_config)
+    if instrumented:
+        database_class = mixin_class(database_class, QueryListenerMixin)
+    if replica:
+        database_class = mixin_class(database_class, InFlightMixin)
+    return database_class(name, **config)
+
+
+class ReplicaRouter:
+    """
+    Picks the database a read query should run on. Reads go to the replicas
+    using round_robin or least_connections. They stay on the primary inside a
+    transaction and for read_your_writes seconds after a write made in the
+    same request (or thread, outside of requests)
+    """
+
+    STRATEGIES = ("round_robin", "least_connections")
+
+    def __init__(
+        self,
+        primary: Database,
+        replicas: t.Sequence[Database],
+        strategy: str = "round_robin",
+        read_your_writes: float = 0.0,
+    ):
+        if strategy not in self.STRATEGIES:
+            raise SetupError(
+                f"unknown replica strategy {strategy}. "
+                f"choose one of {', '.join(self.STRATEGIES)}"
+            )
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.read_your_writes = read_your_writes
+        self._cycle = itertools.cycle(range(len(self.replicas)))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _last_write(self) -> float:
+        if has_app_context():
+            return g.get("_flask_easy_last_write", 0.0)
+        return getattr(self._local, "last_write", 0.0)
+
+    def record_write(self):
+        """pin reads to the primary for the read_your_writes window"""
+        now = time.monotonic()
+        if has_app_context():
+            g._flask_easy_last_write = now  # pylint: disable=W0212
+        else:
+            self._local.last_write = now
+
+    def _connections(self, index: int) -> int:
+        replica = self.replicas[index]
+        in_use = getattr(replica, "_in_use", None)
+        in_flight = getattr(replica, "in_flight", 0)
+        return in_flight + (len(in_use) if in_use is not None else 0)
+
+    def for_read(self) -> Database:
+        """return the database the next read should use"""
+        if not self.replicas or self.primary.in_transaction():
+            return self.primary
+        if time.monotonic() - self._last_write() < self.read_your_writes:
+            return self.primary
+        with self._lock:
+            if self.strategy == "least_connections":
+                index = min(range(len(self.replicas)), key=self._connections)
+            else:
+                index = next(self._cycle)
+        return self.replicas[index]
+
+    @contextmanager
+    def reading(self, database: Database):
+        """
+        count a read in flight on database for least_connections routing.
+        Replicas count every query they run, use this to hold a replica for
+        longer e.g while a server side cursor is read
+        """
+        running = getattr(database, "running", None)
+        if running is None:
+            yield database
+            return
+        with running():
+            yield database
+
+    def close(self):
+        """close open replica connections"""
+        for replica in self.replicas:
+            if not replica.is_closed():
+                replica.close()
+
+
+class EasyDB(FlaskDB):
+    """
+    FlaskDB that understands flask easy's DATABASE options. A pool key maps the
+    engine onto its playhouse Pooled*Database class and replicas adds read
+    replicas that inherit the primary's settings
+    e.g:
+        DATABASE = {
+            "engine": "PostgresqlDatabase",
+            "name": "app",
+            "pool": {"max_connections": 32, "stale_timeout": 300, "timeout": 10},
+            "replicas": [{"host": "replica-1"}, {"host": "replica-2"}],
+            "replica_strategy": "round_robin",
+            "read_your_writes": 2,
+        }
+    Databases are created with query listeners when instrumented is set
+    """
+
+    router: t.Optional[ReplicaRouter] = None
+    instrumented: bool = False
+
+    def __init__(
+        self, app=None, database=None, model_class=EasyModel, excluded_routes=None
+    ):
+        super().__init__(app, database, model_class, excluded_routes)
+
+    def _load_from_config_dict(self, config_dict):
+        replicas = config_dict.pop("replicas", None) or []
+        strategy = config_dict.pop("replica_strategy", "round_robin")
+        read_your_writes = config_dict.pop("read_your_writes", 0.0)
+        database = create_database(config_dict, self.instrumented)
+        self.router = ReplicaRouter(
+            self.database if isinstance(self.database, Proxy) else database,
+            [
+                create_database(
+                    {**config_dict, **replica}, self.instrumented, replica=True
+                )
+                for replica in replicas
+            ],
+            strategy=strategy,
+            read_your_writes=read_your_writes,
+        )
+        return database
+
+    def close_db(self, exc):
+        super().close_db(exc)
+        if self.router is not None:
+            self.router.close()
+
+    def pool_stats(self) -> t.Optional[dict]:
+        """return pool statistics or None when pooling is not configured"""
+        database = getattr(self.database, "obj", self.database)
+        if isinstance(database, PoolStatsMixin):
+            return database.pool_stats()
+        return None
@@ -0,0 +1,161 @@
+"""
+docs.py
+
+Author: Joseph Maclean Arhin
+"""
+import hashlib
+import inspect
+import json
+import re
+import typing as t
+
+from flask import Flask, Response, request
+
+SPEC_ROUTE = "/apispec_1.json"
+
+_SKIPPED_ENDPOINTS = ("static", "flasgger.", "flask_easy_")
+_IGNORED_METHODS = {"HEAD", "OPTIONS"}
+_RULE_ARGUMENT = re.compile(r"<(?:(?P<converter>\w+)(?:\([^)]*\))?:)?(?P<name>\w+)>")
+_ARGUMENT_TYPES = {"int": "integer", "float": "number"}
+
+
+def _path(rule: str) -> t.Tuple[str, t.List[dict]]:
+    """convert a werkzeug rule to a swagger path and its path parameters"""
+    parameters = []
+
+    def replace(match):
+        parameters.append(
+            {
+                "in": "path",
+                "name": match["name"],
+                "required": True,
+                "type": _ARGUMENT_TYPES.get(match["converter"], "string"),
+            }
+        )
+        return f"{{{match['name']}}}"
+
+    return _RULE_ARGUMENT.sub(replace, rule), parameters
+
+
+def _parse_docstring(func: t.Callable) -> t.Tuple[dict, dict]:
+    """
+    split a flasgger style docstring into the operation and its definitions.
+    The first line is the summary, the yaml after --- the operation
+    :param func: view function
+    :return: operation, definitions
+    """
+    docstring = inspect.getdoc(func)
+    if not docstring:
+        return {}, {}
+    text, _, yaml_text = docstring.partition("---")
+    operation = {}
+    if yaml_text.strip():
+        import yaml  # pylint: disable=C0415
+
+        operation = yaml.safe_load(yaml_text) or {}
+    definitions = operation.pop("definitions", None) or {}
+    summary, _, description = text.strip().partition("\n")
+    if summary:
+        operation.setdefault("summary", summary.strip())
+    if description.strip():
+        operation.setdefault("description", description.strip())
+    return operation, definitions
+
+
+def _operation(rule, func: t.Callable, path_parameters: t.List[dict], spec) -> dict:
+    """build the operation of a view function"""
+    operation, definitions = _parse_docstring(func)
+    for name, definition in definitions.items():
+        if name not in spec.components.schemas:
+            spec.components.schema(name, definition)
+
+    parameters = operation.get("parameters", [])
+    declared = {(param.get("in"), param.get("name")) for param in parameters}
+    parameters = [
+        param for param in path_parameters if ("path", param["name"]) not in declared
+    ] + parameters
+    schema = getattr(func, "validator_schema", None)
+    if schema is not None and not any(
+        param.get("in") == "body" for param in parameters
+    ):
+        parameters.append(
+            {"in": "body", "name": "body", "required": True, "schema": schema}
+        )
+    if parameters:
+        operation["parameters"] = parameters
+    if "." in rule.endpoint:
+        operation.setdefault("tags", [rule.endpoint.split(".", 1)[0]])
+    operation.setdefault("responses", {"200": {"description": "OK"}})
+    return operation
+
+
+def build_spec(app: Flask) -> dict:
+    """
+    build the swagger spec of app's routes. Operations are documented by
+    flasgger style view docstrings and request bodies by the marshmallow
+    schema of the validator decorator
+    :param app:
+    :return: swagger 2.0 spec
+    """
+    # pylint: disable=C0415
+    from apispec import APISpec
+    from apispec.ext.marshmallow import MarshmallowPlugin
+
+    lazy_blueprints = getattr(app, "lazy_blueprints", None)
+    if lazy_blueprints:
+        lazy_blueprints.load_all()
+
+    spec = APISpec(
+        title=f"{app.config.get('APP_NAME')} API Docs",
+        version=app.config.get("API_VERSION", "0.0.1"),
+        openapi_version="2.0",
+        plugins=[MarshmallowPlugin()],
+    )
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint.startswith(_SKIPPED_ENDPOINTS):
+            continue
+        view = app.view_functions[rule.endpoint]
+        view_class = getattr(view, "view_class", None)
+        path, path_parameters = _path(rule.rule)
+        operations = {}
+        for method in sorted(rule.methods - _IGNORED_METHODS):
+            func = getattr(view_class, method.lower(), view) if view_class else view
+            operations[method.lower()] = _operation(rule, func, path_parameters, spec)
+        spec.path(path=path, operations=operations)
+    return spec.to_dict()
+
+
+class StaticSpec:
+    """
+    A prebuilt spec served from memory. Responses carry an ETag of the spec
+    so clients revalidate with a conditional GET instead of downloading it
+    again
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()
+
+    @classmethod
+    def build(cls, app: Flask) -> "StaticSpec":
+        """build the spec of app"""
+        spec = build_spec(app)
+        return cls(json.dumps(spec, sort_keys=True, separators=(",", ":")).encode())
+
+    @classmethod
+    def load(cls, path: str) -> "StaticSpec":
+        """load a spec written by save"""
+        with open(path, "rb") as file:
+            return cls(file.read())
+
+    def save(self, path: str):
+        """write the spec to path"""
+        with open(path, "wb") as file:
+            file.write(self.body)
+
+    def response(self) -> Response:
+        """return the spec, or 304 Not Modified when the client has it"""
+        response = Response(self.body, mimetype="application/json")
+        response.set_etag(self.etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
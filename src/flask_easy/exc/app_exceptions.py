@@ -2,13 +2,15 @@
 App Exceptions
 """
 
+import logging
 from typing import Optional
-from flask import current_app as app
 
 
 class AppExceptionCase(Exception):
     """
-    Base exception case to be inherited by all other exceptions
+    Base exception case to be inherited by all other exceptions. Nothing is
+    logged when the exception is created, the app's error handler logs it at
+    a level depending on the status code
     """
 
     def __init__(self, status_code: int, message):  # pylint: disable=w0231
@@ -17,13 +19,25 @@ class AppExceptionCase(Exception):
         :param status_code:
         :param message: extra data to give the error more context
         """
-        app.logger.error(message)
-        self.exception_case = self.__class__.__name__
         self.status_code = status_code
         self.context = (
             message if isinstance(message, dict) else {self.__class__.__name__: message}
         )
 
+    @property
+    def exception_case(self) -> str:
+        """name of the exception class"""
+        return self.__class__.__name__
+
+    @property
+    def log_level(self) -> int:
+        """level the error handler logs the exception at"""
+        if self.status_code >= 500:
+            return logging.ERROR
+        if self.status_code == 404:
+            return logging.DEBUG
+        return logging.INFO
+
     def __str__(self):
         return (
             f"<AppException {self.exception_case} - "
@@ -3,56 +3,165 @@ instance.py
 
 Author: Joseph Maclean Arhin
 """
-import importlib
-import importlib.util
-import json
+import inspect
 import os
 import typing as t
 
 from collections import namedtuple
 
 from functools import cached_property
-from flasgger import Swagger
-from flask import Flask, Response
+from flask import (
+    Flask,
+    Response,
+    current_app,
+    request,
+    stream_with_context,
+)
 from flask.typing import ResponseReturnValue
-from playhouse.flask_utils import FlaskDB
 
 from flask_easy.scripts.cli import init_cli
+from .cache import SchemaCache
+from .compression import DEFAULT_MIMETYPES, DEFAULT_MIN_SIZE, Compressor
+from .connection import EasyDB
+from .json_backend import get_json_backend, is_json_value
 from .exc.app_exceptions import AppExceptionCase
+from .instrumentation import LazyLoadDetector, QueryInstrumentation
 from .response import ResponseEntity
+from .routing import LazyBlueprints, load_urls, read_manifest, register_manifest
+from .streaming import stream_json
 from .security import authenticator, TokenDecoder
 
-db = FlaskDB()
-swag = Swagger()
+if t.TYPE_CHECKING:
+    from flasgger import Swagger
+
+    swag: Swagger
+
+db = EasyDB()
+
+_swag = None  # pylint: disable=C0103
+
+
+def get_swag():
+    """return the shared flasgger Swagger instance, importing flasgger on first use"""
+    global _swag  # pylint: disable=W0603
+
+    if _swag is None:
+        from flasgger import Swagger  # pylint: disable=C0415
+
+        _swag = Swagger()
+    return _swag
+
+
+def __getattr__(name):
+    if name == "swag":
+        return get_swag()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 Route = namedtuple("Route", "view url_prefix", defaults=[None])
 
 
+async def _resolve(awaitable):
+    return await awaitable
+
+
 class FlaskInstance(Flask):
     """
     Flask Instance
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.schema_cache = SchemaCache()
+        self.json_backend = get_json_backend()
+        self.compressor: t.Optional[Compressor] = None
+        self.lazy_blueprints: t.Optional[LazyBlueprints] = None
+
+    def _check_setup_finished(self, f_name: str) -> None:
+        # lazy blueprints are registered while the app is serving requests
+        if getattr(self.url_map, "registering", False):
+            return
+        super()._check_setup_finished(f_name)
+
     def make_response(self, rv: ResponseReturnValue) -> Response:
         """
-        Overwrite the base response class in order to use the ResponseEntity class
+        Overwrite the base response class in order to use the ResponseEntity class.
+        An awaitable value e.g an AsyncRepository call that was not awaited is
+        resolved before serializing. dicts, lists, dataclasses and peewee models,
+        returned as they are or as the body of a (body, status, headers) tuple,
+        are serialized with the configured json backend
         see https://flask.palletsprojects.com/en/2.1.x/api/#flask.make_response for more info
         """
         if isinstance(rv, ResponseEntity):
-            values = rv.values
-            schema = values["schema"]
-            value = values["value"]
-            many = values["many"]
-            status = values["status"]
-            mimetype = values["mimetype"]
+            # pylint: disable=protected-access
+            if inspect.isawaitable(rv._value):
+                rv._value = self.async_to_sync(_resolve)(rv._value)
+            schema = rv._res_schema
+            mimetype = rv._mimetype
+            if rv._stream:
+                return self._make_streamed_response(rv)
             if schema:
-                response = schema(many=many).dumps(value)
+                response = self.json_backend.dumps(
+                    self.schema_cache.get_schema(
+                        schema, rv._many, rv._only, rv._exclude
+                    ).dump(rv._value)
+                )
                 mimetype = "application/json"
+            elif is_json_value(rv._value):
+                response = self.json_backend.dumps(rv._value)
+                mimetype = mimetype or "application/json"
             else:
-                response = value
-            return Response(response, status=status, mimetype=mimetype)
+                response = rv._value
+            return Response(
+                response,
+                status=rv._status_code,
+                mimetype=mimetype,
+                headers=rv._headers,
+            )
+        if is_json_value(rv):
+            return Response(self.json_backend.dumps(rv), mimetype="application/json")
+        if isinstance(rv, tuple) and rv and is_json_value(rv[0]):
+            body = Response(self.json_backend.dumps(rv[0]), mimetype="application/json")
+            return super().make_response((body, *rv[1:]))
         return super().make_response(rv)
 
+    def process_response(self, response: Response) -> Response:
+        """
+        Run the after_request hooks, then compress the response when
+        COMPRESSION is set so the hooks see and can change the plain body
+        """
+        response = super().process_response(response)
+        if self.compressor is not None:
+            response = self.compressor.compress(response)
+        return response
+
+    def _make_streamed_response(self, entity: ResponseEntity) -> Response:
+        """
+        serialize the entity value in chunks while the response is being sent
+        :param entity:
+        :return:
+        """
+        # pylint: disable=protected-access
+        dump = None
+        if entity._res_schema:
+            dump = self.schema_cache.get_schema(
+                entity._res_schema, False, entity._only, entity._exclude
+            ).dump
+        body = stream_json(
+            entity._value,
+            self.json_backend.dumps,
+            dump=dump,
+            chunk_size=entity._chunk_size,
+            ndjson=entity._ndjson,
+        )
+        mimetype = "application/x-ndjson" if entity._ndjson else "application/json"
+        return Response(
+            stream_with_context(body),
+            status=entity._status_code,
+            mimetype=entity._mimetype or mimetype,
+            headers=entity._headers,
+        )
+
 
 class FlaskEasy:
     """
@@ -70,6 +179,27 @@ class FlaskEasy:
         config = kwargs.pop("config")
         self.app = FlaskInstance(**kwargs)
         self.app.config.from_object(config)
+        self.app.schema_cache.maxsize = self.app.config.get("SCHEMA_CACHE_SIZE", 128)
+        self.app.json_backend = get_json_backend(self.app.config.get("JSON_BACKEND"))
+        if self.app.config.get("LOG_ASYNC") or self.app.config.get("LOG_FORMAT"):
+            from .log import configure_logging  # pylint: disable=C0415
+
+            configure_logging(self.app)
+        if self.app.config.get("COMPRESSION"):
+            self.app.compressor = Compressor(
+                encodings=self.app.config.get("COMPRESSION_ENCODINGS"),
+                min_size=self.app.config.get("COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE),
+                level=self.app.config.get("COMPRESSION_LEVEL"),
+                blueprint_levels=self.app.config.get("COMPRESSION_BLUEPRINT_LEVELS"),
+                mimetypes=self.app.config.get(
+                    "COMPRESSION_MIMETYPES", DEFAULT_MIMETYPES
+                ),
+            )
+        if self.app.config.get("AUTH_TOKEN_CACHE_SIZE"):
+            authenticator.enable_token_cache(
+                self.app.config["AUTH_TOKEN_CACHE_SIZE"],
+                self.app.config.get("AUTH_TOKEN_CACHE_TTL", 60),
+            )
         with self.app.app_context():
             self._initialize_databases()
             self._handle_errors()
@@ -79,6 +209,12 @@ class FlaskEasy:
         return self.app
 
     def _handle_errors(self):
+        rate_limit = self.app.config.get("ERROR_LOG_RATE_LIMIT")
+        if rate_limit:
+            from .log import RateLimitFilter  # pylint: disable=C0415
+
+            self.app.logger.addFilter(RateLimitFilter(*rate_limit, errors_only=True))
+
         @self.app.errorhandler(AppExceptionCase)
         def handle_app_exceptions(exc):
             return self.app_exception_handler(exc)
@@ -92,11 +228,38 @@ class FlaskEasy:
         if not database_param:
             return
 
+        instrumentation = None
+        if self.app.config.get("QUERY_INSTRUMENTATION", self.app.debug):
+            instrumentation = QueryInstrumentation(
+                record_params=self.app.config.get("QUERY_LOG_PARAMS", False),
+                slow_query_ms=self.app.config.get("SLOW_QUERY_MS"),
+                server_timing=self.app.config.get("SERVER_TIMING", False),
+            )
+        detect_n_plus_one = self.app.config.get("DETECT_N_PLUS_ONE", self.app.debug)
+
         db_engine = database_param.get("engine")
         if db_engine == "mongodb":
+            if instrumentation:
+                instrumentation.init_mongo()
+                instrumentation.init_app(self.app)
             self._initialize_mongodb(**database_param)
         else:
+            db.instrumented = bool(instrumentation or detect_n_plus_one)
             db.init_app(self.app)
+            stats_url = self.app.config.get("POOL_STATS_URL")
+            if stats_url and "pool" in database_param:
+                self.app.add_url_rule(
+                    stats_url,
+                    "flask_easy_pool_stats",
+                    lambda: ResponseEntity.ok(db.pool_stats()),
+                )
+            databases = [db.database, *(db.router.replicas if db.router else [])]
+            if instrumentation:
+                instrumentation.init_app(self.app, databases)
+            if detect_n_plus_one:
+                LazyLoadDetector(
+                    self.app.config.get("N_PLUS_ONE_THRESHOLD", 10)
+                ).init_app(self.app, databases)
 
     def _initialize_mongodb(self, **kwargs):  # pylint: disable=R0913
         try:
@@ -114,23 +277,72 @@ class FlaskEasy:
 
     @cached_property
     def _urls(self):
-        spec = importlib.util.spec_from_file_location(
-            "urls", os.path.join(self.app.root_path, "urls.py")
-        )
-        urls = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(urls)
-        return urls
+        return load_urls(self.app.root_path)
 
     def _initialize_swagger(self):
-        app_name = self.app.config.get("APP_NAME")
-        self.app.config["SWAGGER"] = {"title": f"{app_name} API Docs", "uiversion": 3}
-        swag.init_app(self.app)
+        """
+        Set up flasgger. flasgger is imported here rather than when flask_easy
+        is imported, the spec itself is built on its first request
+        :return:
+        """
+        app = self.app
+        app_name = app.config.get("APP_NAME")
+        app.config["SWAGGER"] = {"title": f"{app_name} API Docs", "uiversion": 3}
+        spec_file = app.config.get("OPENAPI_SPEC_FILE")
+        if spec_file:
+            self._serve_static_spec(os.path.join(app.root_path, spec_file))
+        get_swag().init_app(app)
+
+    def _serve_static_spec(self, path: str):
+        """
+        Serve the spec written by flask easy docs:build instead of generating
+        it on request
+        :param path: spec file
+        :return:
+        """
+        from .docs import SPEC_ROUTE, StaticSpec  # pylint: disable=C0415
+
+        app = self.app
+        try:
+            static_spec = StaticSpec.load(path)
+        except FileNotFoundError:
+            app.logger.warning(
+                "%s not found, run flask easy docs:build. The spec is generated "
+                "on request",
+                path,
+            )
+            return
+        app.extensions["flask_easy_spec"] = static_spec
+
+        @app.before_request
+        def serve_static_spec():
+            if request.path == SPEC_ROUTE and request.method in ("GET", "HEAD"):
+                return static_spec.response()
+            return None
 
     def _register_blueprints(self):
         """
-        Register blueprints. Read from urls in project root path and register blueprints
+        Register blueprints. Read from urls in project root path and register blueprints.
+        With ROUTE_MANIFEST set, blueprints are imported from the manifest
+        written by flask easy routes:manifest instead, and registered on the
+        first request to their url prefix with LAZY_BLUEPRINTS
         :return:
         """
+        manifest = self.app.config.get("ROUTE_MANIFEST")
+        if manifest:
+            manifest = os.path.join(self.app.root_path, manifest)
+        if manifest and os.path.exists(manifest):
+            entries = read_manifest(manifest)
+            if not self.app.config.get("LAZY_BLUEPRINTS", False):
+                register_manifest(self.app, entries)
+                return
+            from .docs import SPEC_ROUTE  # pylint: disable=C0415
+
+            self.app.lazy_blueprints = LazyBlueprints(
+                self.app, entries, load_all_on=[SPEC_ROUTE]
+            )
+            self.app.wsgi_app = self.app.lazy_blueprints
+            return
 
         routes: t.List[Route] = self._urls.routes
         for url_route in routes:
@@ -143,8 +355,18 @@ class FlaskEasy:
         :param exc:
         :return:
         """
+        current_app.logger.log(
+            exc.log_level,
+            "%s: %s",
+            exc.exception_case,
+            exc.context,
+            extra={
+                "exception_case": exc.exception_case,
+                "status_code": exc.status_code,
+            },
+        )
         return Response(
-            json.dumps(exc.context),
+            current_app.json_backend.dumps(exc.context),
             status=exc.status_code,  # pylint: disable=w0212
             mimetype="application/json",
         )
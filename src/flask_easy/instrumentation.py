@@ -0,0 +1,286 @@
+"""
+instrumentation.py
+
+Author: Joseph Maclean Arhin
+"""
+import os
+import sys
+import typing as t
+from collections import Counter, namedtuple
+
+from flask import Flask, Response, current_app, g, has_request_context
+from peewee import Database
+
+from .connection import QueryListenerMixin
+from .exc import SetupError
+
+QueryListener = t.Callable[[str, t.Any, float], None]
+LazyLoadListener = t.Callable[[type, str], None]
+
+QueryRecord = namedtuple("QueryRecord", "backend statement params duration method")
+
+_REPOSITORY_DIR = os.path.join(os.path.dirname(__file__), "repository")
+
+_mongo_listener = None  # pylint: disable=C0103
+
+
+def _instrumented(database: Database) -> QueryListenerMixin:
+    database = getattr(database, "obj", database)
+    if not isinstance(database, QueryListenerMixin):
+        raise SetupError(
+            "queries can only be listened to on databases created with "
+            "create_database(config, instrumented=True)"
+        )
+    return database
+
+
+def query_listeners(database: Database) -> t.List[QueryListener]:
+    """
+    return the listeners called with (sql, params, duration) after every
+    query the database runs. Remove a listener from the list to stop it
+    :param database: peewee database or Proxy created with instrumented=True
+    :return: mutable list of listeners
+    """
+    return _instrumented(database).query_listeners
+
+
+def lazy_load_listeners(database: Database) -> t.List[LazyLoadListener]:
+    """
+    return the listeners called with (model, field name) when a foreign key of
+    a db.Model model is loaded with its own query
+    :param database: peewee database or Proxy created with instrumented=True
+    :return: mutable list of listeners
+    """
+    return _instrumented(database).lazy_load_listeners
+
+
+class LazyLoadDetector:
+    """
+    Counts the queries of every request along with foreign keys loaded
+    lazily, one query per row. A warning is logged when a foreign key is
+    loaded lazily more than threshold times in a request, pointing at
+    Repository.find_all(joins=...) or Repository.index(prefetch=...)
+    Enabled in debug mode or with DETECT_N_PLUS_ONE = True
+
+    Queries and lazy loads are counted by listeners on the app's databases, so
+    other apps and models not built on db.Model are left alone
+    """
+
+    def __init__(self, threshold: int = 10):
+        self.threshold = threshold
+        self._databases: t.List[Database] = []
+
+    def init_app(self, app: Flask, databases: t.Iterable[Database]):
+        """
+        start counting queries run on databases during app's requests
+        :param app:
+        :param databases: databases to count queries of
+        :return:
+        """
+        app.extensions["flask_easy_n_plus_one"] = self
+        for database in databases:
+            query_listeners(database).append(self._count_query)
+            lazy_load_listeners(database).append(self._count_lazy_load)
+            self._databases.append(database)
+
+        @app.before_request
+        def start_counting():
+            g._flask_easy_queries = 0  # pylint: disable=W0212
+            g._flask_easy_lazy_loads = Counter()  # pylint: disable=W0212
+
+        @app.after_request
+        def report_lazy_loads(response):
+            self.report(app)
+            return response
+
+    def uninstall(self):
+        """stop counting queries and lazy loads"""
+        for database in self._databases:
+            query_listeners(database).remove(self._count_query)
+            lazy_load_listeners(database).remove(self._count_lazy_load)
+        self._databases.clear()
+
+    def _counting(self) -> bool:
+        return (
+            has_request_context()
+            and current_app.extensions.get("flask_easy_n_plus_one") is self
+            and "_flask_easy_queries" in g
+        )
+
+    def _count_query(self, sql, params, duration):  # pylint: disable=W0613
+        if self._counting():
+            g._flask_easy_queries += 1  # pylint: disable=W0212
+
+    def _count_lazy_load(self, model: type, name: str):
+        if self._counting():
+            lazy_loads = g._flask_easy_lazy_loads  # pylint: disable=W0212
+            lazy_loads[f"{model.__name__}.{name}"] += 1
+
+    def report(self, app: Flask):
+        """log a warning for every foreign key lazily loaded past the threshold"""
+        lazy_loads = g.get("_flask_easy_lazy_loads") or {}
+        for relation, count in lazy_loads.items():
+            if count > self.threshold:
+                app.logger.warning(
+                    "N+1 queries: %s was loaded lazily %d times (%d queries in "
+                    "the request). Use Repository.find_all(joins=...) or "
+                    "Repository.index(prefetch=...)",
+                    relation,
+                    count,
+                    g.get("_flask_easy_queries", 0),
+                )
+
+
+def query_count() -> int:
+    """number of queries run in the current request when counting is enabled"""
+    return g.get("_flask_easy_queries", 0) if has_request_context() else 0
+
+
+def repository_method(max_depth: int = 50) -> t.Optional[str]:
+    """
+    return the public repository method e.g UserRepository.find_all on the
+    call stack of the current query, None when the query did not go through
+    a repository e.g a query returned by index and iterated in a view
+    """
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    method = None
+    while frame is not None and max_depth:
+        code = frame.f_code
+        if code.co_filename.startswith(_REPOSITORY_DIR):
+            owner = frame.f_locals.get("cls")
+            if isinstance(owner, type) and not code.co_name.startswith(("_", "<")):
+                method = f"{owner.__name__}.{code.co_name}"
+        elif method is not None:
+            break
+        frame = frame.f_back
+        max_depth -= 1
+    return method
+
+
+class QueryCollector:
+    """Queries run during a request"""
+
+    def __init__(self):
+        self.queries: t.List[QueryRecord] = []
+
+    def add(self, record: QueryRecord):
+        """add a query"""
+        self.queries.append(record)
+
+    def totals(self) -> t.Dict[str, t.Tuple[int, float]]:
+        """return the number of queries and their duration per backend"""
+        totals: t.Dict[str, t.Tuple[int, float]] = {}
+        for record in self.queries:
+            count, duration = totals.get(record.backend, (0, 0.0))
+            totals[record.backend] = (count + 1, duration + record.duration)
+        return totals
+
+    def server_timing(self) -> str:
+        """format the totals as a Server-Timing header value"""
+        return ", ".join(
+            f'{backend};dur={duration * 1000:.2f};desc="{count} queries"'
+            for backend, (count, duration) in self.totals().items()
+        )
+
+
+def current_collector() -> t.Optional[QueryCollector]:
+    """return the query collector of the current request"""
+    return g.get("_flask_easy_collector") if has_request_context() else None
+
+
+class QueryInstrumentation:
+    """
+    Records the statement, duration and calling repository method of every
+    query into a request scoped QueryCollector. With server_timing, totals
+    are sent back in the Server-Timing header. Queries slower than
+    slow_query_ms are logged to the flask_easy.slow_queries logger
+    """
+
+    def __init__(
+        self,
+        record_params: bool = False,
+        slow_query_ms: t.Optional[float] = None,
+        server_timing: bool = False,
+    ):
+        self.record_params = record_params
+        self.slow_query_ms = slow_query_ms
+        self.server_timing = server_timing
+        self.slow_query_logger = None
+
+    def init_app(self, app: Flask, databases: t.Iterable[Database] = ()):
+        """
+        record queries of databases run during app's requests
+        :param app:
+        :param databases: peewee databases to instrument
+        :return:
+        """
+        if self.slow_query_ms is not None:
+            from .log import slow_query_logger  # pylint: disable=C0415
+
+            self.slow_query_logger = slow_query_logger
+        for database in databases:
+            query_listeners(database).append(self._record_sql)
+
+        @app.before_request
+        def start_collecting():
+            g._flask_easy_collector = QueryCollector()  # pylint: disable=W0212
+
+        @app.after_request
+        def add_server_timing(response: Response):
+            collector = current_collector()
+            if self.server_timing and collector and collector.queries:
+                response.headers.add("Server-Timing", collector.server_timing())
+            return response
+
+    def init_mongo(self):
+        """record mongodb commands, must run before the MongoClient is created"""
+        global _mongo_listener  # pylint: disable=W0603
+
+        if _mongo_listener is None:
+            from pymongo import monitoring  # pylint: disable=C0415
+            from .mongo_listener import MongoCommandListener  # pylint: disable=C0415
+
+            _mongo_listener = MongoCommandListener(self)
+            monitoring.register(_mongo_listener)
+        _mongo_listener.instrumentation = self
+
+    def _record_sql(self, sql: str, params, duration: float):
+        self.record("sql", sql, params, duration)
+
+    def record(self, backend: str, statement: str, params, duration: float):
+        """
+        record a query
+        :param backend: sql or mongo
+        :param statement: sql or mongodb command
+        :param params: query parameters, dropped unless record_params is set
+        :param duration: seconds
+        :return:
+        """
+        collector = current_collector()
+        slow = self.slow_query_ms is not None and duration * 1000 >= self.slow_query_ms
+        if collector is None and not slow:
+            return
+        record = QueryRecord(
+            backend,
+            statement,
+            params if self.record_params else None,
+            duration,
+            repository_method(),
+        )
+        if collector is not None:
+            collector.add(record)
+        if slow:
+            self.slow_query_logger.warning(
+                "%s %s",
+                statement,
+                "" if record.params is None else record.params,
+                extra={"method": record.method, "duration_ms": duration * 1000},
+            )
+
+
+def __getattr__(name):
+    if name == "MongoCommandListener":
+        from .mongo_listener import MongoCommandListener  # pylint: disable=C0415
+
+        return MongoCommandListener
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
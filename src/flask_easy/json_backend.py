@@ -0,0 +1,147 @@
+"""
+json_backend.py
+
+Author: Joseph Maclean Arhin
+"""
+import dataclasses
+import datetime
+import decimal
+import importlib
+import json
+import sys
+import typing as t
+import uuid
+import warnings
+
+from .exc import SetupError
+
+DEFAULT_BACKEND = "json"
+
+
+def _model_class():
+    """peewee's Model, or an empty tuple when peewee was never imported"""
+    peewee = sys.modules.get("peewee")
+    return peewee.Model if peewee else ()
+
+
+def is_json_value(obj: t.Any) -> bool:
+    """
+    whether obj is a value make_response serializes to json: a dict, list,
+    dataclass instance or peewee model instance
+    """
+    if isinstance(obj, (dict, list)):
+        return True
+    if dataclasses.is_dataclass(obj):
+        return not isinstance(obj, type)
+    return isinstance(obj, _model_class())
+
+
+def _model_to_dict(model) -> dict:
+    """
+    serialize the fields a model lists in __json__, foreign keys as ids.
+    models without __json__ are refused so new columns are never leaked
+    """
+    names = getattr(model, "__json__", None)
+    if names is None:
+        raise TypeError(
+            f"{type(model).__name__} does not declare the fields to serialize. "
+            "list them in __json__ on the model or use ResponseEntity.schema"
+        )
+    from playhouse.shortcuts import model_to_dict  # pylint: disable=C0415
+
+    only = [model._meta.fields[name] for name in names]  # pylint: disable=W0212
+    return model_to_dict(model, recurse=False, only=only)
+
+
+def _default(obj):
+    """serialize values the stdlib json module does not understand"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, decimal.Decimal)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, _model_class()):
+        return _model_to_dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONBackend:
+    """
+    Thin wrapper around a json library. dumps always returns bytes so the
+    result can be written straight into a Response
+    """
+
+    name: str = DEFAULT_BACKEND
+
+    def dumps(self, obj: t.Any) -> bytes:
+        """serialize obj to json encoded bytes"""
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+    def loads(self, data: t.Union[str, bytes]) -> t.Any:
+        """deserialize json data"""
+        return json.loads(data)
+
+
+class OrjsonBackend(JSONBackend):
+    """orjson backend. orjson encodes directly to bytes"""
+
+    name = "orjson"
+
+    def __init__(self):
+        self._orjson = importlib.import_module("orjson")
+
+    def dumps(self, obj: t.Any) -> bytes:
+        return self._orjson.dumps(
+            obj, default=_default, option=self._orjson.OPT_NON_STR_KEYS
+        )
+
+    def loads(self, data: t.Union[str, bytes]) -> t.Any:
+        return self._orjson.loads(data)
+
+
+class UjsonBackend(JSONBackend):
+    """ujson backend"""
+
+    name = "ujson"
+
+    def __init__(self):
+        self._ujson = importlib.import_module("ujson")
+
+    def dumps(self, obj: t.Any) -> bytes:
+        return self._ujson.dumps(obj, ensure_ascii=False, default=_default).encode()
+
+    def loads(self, data: t.Union[str, bytes]) -> t.Any:
+        return self._ujson.loads(data)
+
+
+BACKENDS: t.Dict[str, t.Type[JSONBackend]] = {
+    "json": JSONBackend,
+    "orjson": OrjsonBackend,
+    "ujson": UjsonBackend,
+}
+
+
+def get_json_backend(name: t.Optional[str] = None) -> JSONBackend:
+    """
+    Load the json backend selected with the JSON_BACKEND config. Falls back to
+    the stdlib json module when the selected package is not installed
+    :param name: one of json, orjson or ujson
+    :return: json backend
+    """
+    name = (name or DEFAULT_BACKEND).lower()
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError as error:
+        raise SetupError(
+            f"unknown JSON_BACKEND '{name}'. choose one of {', '.join(BACKENDS)}"
+        ) from error
+
+    try:
+        return backend_class()
+    except ImportError:
+        warnings.warn(
+            f"'{name}' package is not installed, falling back to stdlib json. "
+            f"install it with `pip install flask-easy[{name}]`"
+        )
+        return JSONBackend()
@@ -3,10 +3,17 @@ log.py
 
 Author: Joseph Maclean Arhin
 """
-
+import atexit
 import logging
-from flask import has_request_context, request
-from flask.logging import default_handler
+import queue
+import threading
+import time
+import typing as t
+from logging.handlers import QueueHandler, QueueListener
+from flask import Flask, has_request_context, request
+from flask.logging import default_handler, wsgi_errors_stream
+
+from .cache import LRUCache
 
 
 class RequestFormatter(logging.Formatter):
@@ -19,16 +26,204 @@ class RequestFormatter(logging.Formatter):
             record.url = request.url
             record.remote_addr = request.remote_addr
         else:
-            record.url = None
-            record.remote_addr = None
+            # keep the values captured when the record was queued
+            record.url = getattr(record, "url", None)
+            record.remote_addr = getattr(record, "remote_addr", None)
 
         return super().format(record)
 
 
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as one json object per line using a json backend's dumps
+    """
+
+    def __init__(self, dumps: t.Callable[[t.Any], bytes]):
+        super().__init__()
+        self.dumps = dumps
+
+    def format(self, record):
+        if has_request_context():
+            record.url = request.url
+            record.remote_addr = request.remote_addr
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "message": record.getMessage(),
+            "url": getattr(record, "url", None),
+            "remote_addr": getattr(record, "remote_addr", None),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return self.dumps(entry).decode()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler for a bounded queue. When the queue is full the new record
+    is dropped (drop_new) or the oldest queued record is (drop_oldest), so
+    logging never blocks the request. The request url and remote address
+    are captured when the record is queued
+    """
+
+    DROP_POLICIES = ("drop_new", "drop_oldest")
+
+    def __init__(self, log_queue: queue.Queue, drop_policy: str = "drop_new"):
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(
+                f"unknown drop policy {drop_policy}. "
+                f"choose one of {', '.join(self.DROP_POLICIES)}"
+            )
+        super().__init__(log_queue)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+
+    def prepare(self, record):
+        if has_request_context():
+            record.url = request.url
+            record.remote_addr = request.remote_addr
+        return super().prepare(record)
+
+    def enqueue(self, record):
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                self.dropped += 1
+                if self.drop_policy == "drop_new":
+                    return
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class RateLimitFilter(logging.Filter):  # pylint: disable=R0903
+    """
+    Lets at most rate similar records through per period seconds. Records are
+    similar when they have the same level and message template, or for app
+    exceptions the same exception class and status code, so messages that
+    only differ by e.g a resource id share a limit. The number of dropped
+    records is added to the first record let through in the next period.
+    With errors_only, records that are neither app exceptions nor ERROR and
+    above are always let through
+    """
+
+    def __init__(
+        self,
+        rate: int = 10,
+        period: float = 60.0,
+        max_keys: int = 1024,
+        errors_only: bool = False,
+    ):
+        super().__init__()
+        self.rate = rate
+        self.period = period
+        self.errors_only = errors_only
+        self._windows = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if (
+            self.errors_only
+            and record.levelno < logging.ERROR
+            and not hasattr(record, "exception_case")
+        ):
+            return True
+        key = (
+            record.levelno,
+            getattr(record, "exception_case", None) or str(record.msg),
+            getattr(record, "status_code", None),
+        )
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                window = [now, 0, 0]
+                self._windows.set(key, window)
+                if suppressed:
+                    message = record.getMessage()
+                    record.msg = f"{message} ({suppressed} similar messages suppressed)"
+                    record.args = ()
+            window[1] += 1
+            if window[1] > self.rate:
+                window[2] += 1
+                return False
+        return True
+
+
 formatter = RequestFormatter(
     "[%(asctime)s] %(remote_addr)s requested %(url)s\n"
     "%(levelname)s in %(module)s: %(message)s"
 )
 default_handler.setFormatter(formatter)
-default_handler.setLevel(logging.ERROR)
 default_handler.setLevel(logging.INFO)
+
+slow_query_handler = logging.StreamHandler()
+slow_query_handler.setFormatter(
+    RequestFormatter(
+        "[%(asctime)s] %(remote_addr)s requested %(url)s\n"
+        "%(levelname)s slow query in %(method)s took %(duration_ms).1fms: "
+        "%(message)s"
+    )
+)
+slow_query_logger = logging.getLogger("flask_easy.slow_queries")
+slow_query_logger.addHandler(slow_query_handler)
+slow_query_logger.setLevel(logging.WARNING)
+
+
+def stop_listener(listener: QueueListener):
+    """flush the queue and stop the listener's thread if it is running"""
+    if listener._thread is not None:  # pylint: disable=protected-access
+        listener.stop()
+
+
+def _app_handlers(app: Flask) -> t.List[logging.Handler]:
+    """
+    return app.logger's handlers with flask's default_handler, which every app
+    shares, replaced on app.logger by a handler of its own
+    """
+    handlers = []
+    for handler in app.logger.handlers or [default_handler]:
+        if handler is default_handler:
+            handler = logging.StreamHandler(wsgi_errors_stream)
+            handler.setFormatter(default_handler.formatter)
+            handler.setLevel(default_handler.level)
+        handlers.append(handler)
+    app.logger.handlers = handlers
+    return handlers
+
+
+def configure_logging(app: Flask) -> t.Optional[QueueListener]:
+    """
+    Apply the LOG_FORMAT and LOG_ASYNC settings to app.logger's handlers.
+    With LOG_ASYNC the handlers run on a background thread fed by a bounded
+    queue of LOG_QUEUE_SIZE records, dropping records by LOG_DROP_POLICY when
+    it is full
+    :param app:
+    :return: the started queue listener when LOG_ASYNC is set
+    """
+    handlers = _app_handlers(app)
+    if app.config.get("LOG_FORMAT") == "json":
+        json_formatter = JSONFormatter(app.json_backend.dumps)
+        for handler in handlers:
+            handler.setFormatter(json_formatter)
+    if not app.config.get("LOG_ASYNC"):
+        return None
+
+    log_queue: queue.Queue = queue.Queue(app.config.get("LOG_QUEUE_SIZE", 10000))
+    queue_handler = DroppingQueueHandler(
+        log_queue, app.config.get("LOG_DROP_POLICY", "drop_new")
+    )
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    app.logger.handlers = [queue_handler]
+    listener.start()
+    atexit.register(stop_listener, listener)
+    app.extensions["flask_easy_log_listener"] = listener
+    return listener
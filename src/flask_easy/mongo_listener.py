@@ -0,0 +1,48 @@
+"""
+mongo_listener.py
+
+Author: Joseph Maclean Arhin
+"""
+import threading
+import typing as t
+
+from pymongo.monitoring import CommandListener
+
+if t.TYPE_CHECKING:
+    from .instrumentation import QueryInstrumentation
+
+
+class MongoCommandListener(CommandListener):
+    """pymongo command listener passing commands to QueryInstrumentation"""
+
+    def __init__(self, instrumentation: "QueryInstrumentation"):
+        self.instrumentation = instrumentation
+        self._started: t.Dict[t.Tuple[int, t.Any], t.Tuple[str, t.Any]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        """remember the command until it finishes"""
+        collection = event.command.get(event.command_name)
+        statement = f"{event.command_name} {event.database_name}.{collection}"
+        with self._lock:
+            self._started[(event.request_id, event.connection_id)] = (
+                statement,
+                event.command,
+            )
+
+    def _finished(self, event):
+        with self._lock:
+            started = self._started.pop((event.request_id, event.connection_id), None)
+        if started is not None:
+            statement, command = started
+            self.instrumentation.record(
+                "mongo", statement, command, event.duration_micros / 1e6
+            )
+
+    def succeeded(self, event):
+        """record the finished command"""
+        self._finished(event)
+
+    def failed(self, event):
+        """record the failed command"""
+        self._finished(event)
@@ -0,0 +1,89 @@
+"""
+aio.py
+
+Author: Joseph Maclean Arhin
+"""
+import asyncio
+import contextvars
+import functools
+import typing as t
+from concurrent.futures import Executor
+
+
+class offload:  # pylint: disable=C0103,R0903
+    """
+    Descriptor turning a repository method of the parent class into a
+    coroutine that runs the blocking call on the repository's executor.
+    Set materialize for methods returning lazy queries so rows are fetched in
+    the worker thread instead of on the event loop
+    """
+
+    def __init__(self, materialize: bool = False):
+        self.materialize = materialize
+        self.owner = None
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, instance, owner):
+        method = getattr(super(self.owner, owner), self.name)
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await owner.run_in_executor(
+                method, *args, materialize=self.materialize, **kwargs
+            )
+
+        return call
+
+
+# the public methods are offload descriptors, which pylint does not count
+class AsyncRepositoryMixin:  # pylint: disable=R0903
+    """
+    Runs repository methods in a thread pool so async views can await them
+    without blocking the event loop. The default executor is used when
+    executor is None. Goes before the repository in the bases so its
+    methods are the ones offloaded
+    e.g class AsyncRepository(AsyncRepositoryMixin, Repository)
+    """
+
+    executor: t.Optional[Executor] = None
+
+    index = offload(materialize=True)
+    create = offload()
+    create_all = offload()
+    find_by_id = offload()
+    update_by_id = offload()
+    update_many = offload()
+    bulk_update = offload()
+    upsert_many = offload()
+    find = offload()
+    find_all = offload(materialize=True)
+    paginate = offload()
+    delete = offload()
+
+    @classmethod
+    def _call(cls, func: t.Callable, materialize: bool, args: tuple, kwargs: dict):
+        """run func in the worker thread"""
+        result = func(*args, **kwargs)
+        return list(result) if materialize else result
+
+    @classmethod
+    async def run_in_executor(
+        cls, func: t.Callable, *args, materialize: bool = False, **kwargs
+    ):
+        """
+        run a blocking function on the repository's executor. The caller's
+        context (flask's app and request context) is copied into the thread
+        :param func: blocking function
+        :param materialize: convert the result to a list in the worker thread
+        :return: result of func
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(
+            context.run, cls._call, func, materialize, args, kwargs
+        )
+        return await loop.run_in_executor(cls.executor, call)
@@ -0,0 +1,197 @@
+"""
+cache.py
+
+Author: Joseph Maclean Arhin
+"""
+import pickle
+import threading
+import time
+import typing as t
+import uuid
+
+from ..cache import LRUCache
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """In-process LRU backend. Cached objects are shared, treat them as read only"""
+
+    def __init__(self, max_entries: int = 1024, ttl: t.Optional[float] = None):
+        self._cache = LRUCache(max_entries, ttl)
+
+    def get(self, key: str):
+        """return the cached value or _MISSING"""
+        return self._cache.get(key, _MISSING)
+
+    def set(self, key: str, value):
+        """cache value under key"""
+        self._cache.set(key, value)
+
+    def delete(self, *keys: str):
+        """remove keys from the cache"""
+        for key in keys:
+            self._cache.delete(key)
+
+    @property
+    def evictions(self) -> int:
+        """number of entries evicted because the cache was full"""
+        return self._cache.evictions
+
+
+class RedisBackend:
+    """
+    Backend for a redis-py compatible client, so the cache is shared by all
+    workers. Values are pickled
+    """
+
+    def __init__(self, client, ttl: t.Optional[float] = None, prefix="flask_easy:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str):
+        """return the cached value or _MISSING"""
+        value = self.client.get(self.prefix + key)
+        return _MISSING if value is None else pickle.loads(value)
+
+    def set(self, key: str, value):
+        """cache value under key"""
+        ttl = int(self.ttl) if self.ttl else None
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def delete(self, *keys: str):
+        """remove keys from the cache"""
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+
+class LocalRedis:
+    """
+    Minimal in-memory stand in for a redis client implementing the get, set
+    and delete commands used by RedisBackend. Meant for tests
+    """
+
+    def __init__(self):
+        self._data: t.Dict[str, t.Tuple[bytes, t.Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> t.Optional[bytes]:
+        """GET"""
+        with self._lock:
+            value, expires = self._data.get(name, (None, None))
+            if expires is not None and expires <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name: str, value: bytes, ex: t.Optional[int] = None):
+        """SET with optional EX"""
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *names: str) -> int:
+        """DEL"""
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+
+class RepoCache:
+    """
+    Read-through cache for repositories. Set it as the cache attribute of a
+    repository to serve find_by_id and find from the cache
+    e.g:
+        class UserRepository(Repository):
+            model = User
+            cache = RepoCache(ttl=60, max_entries=5000)
+
+    Writes made through the repository invalidate the affected entries. Query
+    results (find) are invalidated together by moving to a new generation key.
+    SQL repositories with read replicas load misses from the primary, so an
+    entry a write invalidated is not filled again from a lagging replica
+    """
+
+    def __init__(
+        self,
+        ttl: t.Optional[float] = None,
+        max_entries: int = 1024,
+        backend=None,
+    ):
+        self.backend = backend or MemoryBackend(max_entries, ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _generation(self, key: str) -> str:
+        generation = self.backend.get(key)
+        if generation is _MISSING:
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation)
+        return generation
+
+    def _id_key(self, namespace: str, obj_id) -> str:
+        generation = self._generation(f"{namespace}:gen")
+        return f"{namespace}:{generation}:id:{obj_id}"
+
+    def _query_key(self, namespace: str, query) -> str:
+        generation = self._generation(f"{namespace}:gen")
+        query_generation = self._generation(f"{namespace}:{generation}:qgen")
+        return f"{namespace}:{generation}:{query_generation}:q:{query!r}"
+
+    def _load(self, key: str, loader: t.Callable[[], t.Any]):
+        value = self.backend.get(key)
+        if value is _MISSING:
+            self.misses += 1
+            value = loader()
+            self.backend.set(key, value)
+        else:
+            self.hits += 1
+        return value
+
+    def get_by_id(self, namespace: str, obj_id, loader: t.Callable[[], t.Any]):
+        """
+        return the cached object for obj_id, calling loader on a miss
+        :param namespace: name of the model
+        :param obj_id:
+        :param loader: loads the object from the database
+        :return:
+        """
+        return self._load(self._id_key(namespace, obj_id), loader)
+
+    def get_query(self, namespace: str, query, loader: t.Callable[[], t.Any]):
+        """
+        return the cached result of a query, calling loader on a miss
+        :param namespace: name of the model
+        :param query: hashable description of the query, used in the key
+        :param loader: runs the query against the database
+        :return:
+        """
+        return self._load(self._query_key(namespace, query), loader)
+
+    def invalidate(self, namespace: str, obj_ids: t.Optional[t.Iterable] = None):
+        """
+        drop cached query results along with the given ids. Every entry in the
+        namespace is dropped when obj_ids is None
+        :param namespace: name of the model
+        :param obj_ids: ids of the changed objects
+        :return:
+        """
+        self.invalidations += 1
+        if obj_ids is None:
+            self.backend.set(f"{namespace}:gen", uuid.uuid4().hex)
+            return
+        generation = self._generation(f"{namespace}:gen")
+        self.backend.set(f"{namespace}:{generation}:qgen", uuid.uuid4().hex)
+        self.backend.delete(*[self._id_key(namespace, obj_id) for obj_id in obj_ids])
+
+    @property
+    def stats(self) -> dict:
+        """return cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -3,14 +3,30 @@ mongo_repository.py
 
 Author: Joseph Maclean Arhin
 """
-
+import operator
 import typing as t
+from functools import reduce
 
 import mongoengine as me
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 
-from ..exc import OperationError, NotFoundException
+from ..exc import BadRequest, OperationError, NotFoundException
+from .aio import AsyncRepositoryMixin
+from .pagination import (
+    DEFAULT_LIMIT,
+    PREV,
+    OrderBy,
+    Page,
+    check_limit,
+    decode_cursor,
+    make_page,
+    parse_order_by,
+)
 from .repository_interface import RepositoryInterface
 
+INSERT_BATCH_SIZE = 1000
+
 
 class Repository(RepositoryInterface):
     """
@@ -40,44 +56,187 @@ class Repository(RepositoryInterface):
         try:
             db_obj = cls.model(**data)
             db_obj.save()
-            return db_obj
         except me.OperationError as error:
             raise OperationError([error.args[0]]) from error
+        cls._invalidate()
+        return db_obj
 
     @classmethod
-    def create_all(cls, data: t.List[dict]) -> t.List[t.Type[me.Document]]:
+    def create_all(
+        cls,
+        data: t.List[dict],
+        batch_size: int = INSERT_BATCH_SIZE,
+        returning: bool = False,
+        documents: bool = True,
+    ):
+        """
+        insert documents in batches with unordered insert_many commands so one
+        failing document does not stop the rest of the batch from being written
+        :param data: documents to insert
+        :param batch_size: number of documents per insert_many command
+        :param returning: return the primary keys of the inserted documents
+        :param documents: without returning, return the inserted documents, as
+            create_all always has. Set it to False to return their number and
+            skip building them for large inserts
+        :return: list of primary keys if returning, else the inserted documents
+            or their number
+        """
+        ids, objs = [], []
         try:
-            obj_data = [cls.model(**item) for item in data]
-            return cls.model.objects.insert(obj_data)
-        except me.OperationError as error:
-            raise OperationError([error.args[0]]) from error
+            collection = cls.model._get_collection()  # pylint: disable=W0212
+            for start in range(0, len(data), batch_size):
+                batch = [cls.model(**item) for item in data[start : start + batch_size]]
+                inserted_ids = collection.insert_many(
+                    [obj.to_mongo() for obj in batch], ordered=False
+                ).inserted_ids
+                ids.extend(inserted_ids)
+                if documents and not returning:
+                    for obj, obj_id in zip(batch, inserted_ids):
+                        obj.pk = obj_id
+                        obj._created = False  # pylint: disable=W0212
+                        obj._clear_changed_fields()  # pylint: disable=W0212
+                    objs.extend(batch)
+        except BulkWriteError as error:
+            raise OperationError(
+                [e.get("errmsg") for e in error.details.get("writeErrors", [])]
+            ) from error
+        except (me.OperationError, PyMongoError) as error:
+            raise OperationError([str(error)]) from error
+        finally:
+            cls._invalidate()
+        if returning:
+            return ids
+        return objs if documents else len(ids)
 
     @classmethod
     def update_by_id(cls, obj_id: t.Union[int, str], data: dict) -> t.Type[me.Document]:
         """
-
+        updates a document with a single findAndModify command
         :param obj_id:
         :param data:
-        :return:
+        :return: updated document
         """
         try:
-            db_obj = cls.find_by_id(obj_id)
-            db_obj.modify(**data)
-            return db_obj
+            db_obj = cls.model.objects(pk=obj_id).modify(new=True, **data)
         except me.OperationError as error:
             raise OperationError([error.args[0]]) from error
+        if db_obj is None:
+            raise NotFoundException(
+                {"error": f"Resource of id {obj_id} does not exist"}
+            )
+        cls._invalidate([obj_id])
+        return db_obj
+
+    @classmethod
+    def update_many(cls, ids: t.Sequence[t.Union[int, str]], data: dict) -> int:
+        """
+        apply the same update to every document in ids with one update command
+        :param ids: primary keys of the documents to update
+        :param data: values to set
+        :return: number of documents updated
+        """
+        try:
+            count = cls.model.objects(pk__in=ids).update(**data)
+        except me.OperationError as error:
+            raise OperationError([error.args[0]]) from error
+        cls._invalidate(ids)
+        return count
+
+    @classmethod
+    def bulk_update(cls, data: t.List[dict]) -> int:
+        """
+        update many documents with different values in one bulk_write. Every
+        item must contain the primary key
+        :param data: list of dicts holding the primary key and values to set
+        :return: number of documents modified
+        """
+        if not data:
+            return 0
+        id_field = cls.model._meta["id_field"]  # pylint: disable=protected-access
+        try:
+            requests = [
+                UpdateOne(
+                    {"_id": cls._to_mongo({id_field: item[id_field]})["_id"]},
+                    {"$set": cls._to_mongo(item, exclude=id_field)},
+                )
+                for item in data
+            ]
+        except KeyError as error:
+            raise BadRequest({id_field: "missing from bulk update"}) from error
+        count = cls._bulk_write(requests).modified_count
+        cls._invalidate([item[id_field] for item in data])
+        return count
+
+    @classmethod
+    def upsert_many(
+        cls,
+        data: t.List[dict],
+        conflict_target: t.Optional[t.Sequence[str]] = None,
+        update_fields: t.Optional[t.Sequence[str]] = None,
+    ) -> int:
+        """
+        insert documents, updating the existing document when one matches the
+        conflict target, with a single bulk_write of upserts
+        :param data: documents to insert
+        :param conflict_target: fields that identify an existing document,
+            defaults to the primary key
+        :param update_fields: fields to overwrite on a match, defaults to every
+            field in the data except the conflict target
+        :return: number of documents inserted or modified
+        """
+        if not data:
+            return 0
+        id_field = cls.model._meta["id_field"]  # pylint: disable=protected-access
+        conflict_target = list(conflict_target or [id_field])
+        requests = []
+        for item in data:
+            fields = update_fields or [k for k in item if k not in conflict_target]
+            requests.append(
+                UpdateOne(
+                    cls._to_mongo({k: item[k] for k in conflict_target}),
+                    {"$set": cls._to_mongo({k: item[k] for k in fields})},
+                    upsert=True,
+                )
+            )
+        result = cls._bulk_write(requests)
+        cls._invalidate(None)
+        return result.upserted_count + result.modified_count
+
+    @classmethod
+    def _to_mongo(cls, data: dict, exclude: t.Optional[str] = None) -> dict:
+        """convert field names and values to their mongodb representation"""
+        fields = cls.model._fields  # pylint: disable=protected-access
+        return {
+            fields[name].db_field: fields[name].to_mongo(value)
+            for name, value in data.items()
+            if name != exclude
+        }
+
+    @classmethod
+    def _bulk_write(cls, requests: list):
+        try:
+            collection = cls.model._get_collection()  # pylint: disable=W0212
+            return collection.bulk_write(requests, ordered=False)
+        except (me.OperationError, PyMongoError) as error:
+            raise OperationError([str(error)]) from error
 
     @classmethod
-    def find(cls, query_params: dict) -> t.Type[me.Document]:
+    def find(
+        cls, query_params: dict, fields: t.Optional[t.Sequence[str]] = None
+    ) -> t.Type[me.Document]:
         """
         returns an item that satisfies the data passed to it if it exists in
         the database
 
         :param query_params: {dict}
+        :param fields: names of the fields to load, all fields when empty
         :return: model_object - Returns an instance object of the model passed
         """
         try:
-            db_obj = cls.model.objects.get(**query_params)
+            db_obj = cls._cached_query(
+                ("find", sorted(query_params.items()), fields),
+                lambda: cls.model.objects.only(*fields or []).get(**query_params),
+            )
             return db_obj
         except me.DoesNotExist as error:
             raise NotFoundException({"error": "Resource does not exist"}) from error
@@ -85,15 +244,30 @@ class Repository(RepositoryInterface):
             raise OperationError([error.args[0]]) from error
 
     @classmethod
-    def find_all(cls, query_params: dict) -> t.List[t.Type[me.Document]]:
+    def find_all(
+        cls,
+        query_params: dict,
+        order_by: OrderBy = None,
+        limit: t.Optional[int] = None,
+        fields: t.Optional[t.Sequence[str]] = None,
+    ) -> t.List[t.Type[me.Document]]:
         """
         returns all items that satisfy the filter query_params passed to it
 
         :param query_params: query parameters to filter by
+        :param order_by: field names, prefixed with - for descending order
+        :param limit: maximum number of documents
+        :param fields: names of the fields to load, all fields when empty
         :return: model_object - Returns an instance object of the model passed
         """
         try:
-            db_obj = cls.model.objects(**query_params)
+            db_obj = cls.model.objects(**query_params).only(*fields or [])
+            if order_by:
+                db_obj = db_obj.order_by(
+                    *([order_by] if isinstance(order_by, str) else order_by)
+                )
+            if limit is not None:
+                db_obj = db_obj.limit(limit)
             return db_obj
 
         except me.OperationError as error:
@@ -102,7 +276,7 @@ class Repository(RepositoryInterface):
     @classmethod
     def find_by_id(cls, obj_id: t.Union[int, str]) -> t.Type[me.Document]:
         try:
-            db_obj = cls.model.objects.get(pk=obj_id)
+            db_obj = cls._cached_by_id(obj_id, lambda: cls.model.objects.get(pk=obj_id))
             return db_obj
         except me.DoesNotExist as error:
             raise NotFoundException(
@@ -121,10 +295,96 @@ class Repository(RepositoryInterface):
         try:
             db_obj = cls.model.objects.get(pk=obj_id)
             db_obj.delete()
-            return True
         except me.DoesNotExist as error:
             raise NotFoundException(
                 {"error": f"Resource of id {obj_id} does not exist"}
             ) from error
         except me.OperationError as error:
             raise OperationError([error.args[0]]) from error
+        cls._invalidate([obj_id])
+        return True
+
+    @classmethod
+    def paginate(
+        cls,
+        cursor: t.Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        order_by: OrderBy = None,
+    ) -> Page:
+        """
+        returns a page of documents using keyset pagination. Documents are
+        located by seeking past the sort key in the cursor instead of skip()
+        so the cost of a page does not grow with its depth
+        :param cursor: next_cursor or prev_cursor of a previous page
+        :param limit: number of documents per page, at most MAX_LIMIT
+        :param order_by: field names, prefixed with - for descending order.
+            Fields must be required, comparisons skip documents where the
+            field is null or missing
+        :return: Page
+        """
+        limit = check_limit(limit)
+        id_field = cls.model._meta["id_field"]  # pylint: disable=protected-access
+        ordering = parse_order_by(order_by, id_field)
+        for name, _ in ordering:
+            field = cls.model._fields.get(name)  # pylint: disable=protected-access
+            if field is None:
+                raise BadRequest({"order_by": f"unknown field {name}"})
+            if name != id_field and not field.required:
+                raise BadRequest(
+                    {"order_by": f"{name} is not required, order by a required field"}
+                )
+
+        queryset = cls.model.objects
+        direction = None
+        if cursor:
+            values, direction = decode_cursor(cursor, ordering)
+            queryset = queryset.filter(cls._seek(ordering, values, direction))
+
+        reverse = direction == PREV
+        queryset = queryset.order_by(
+            *[
+                f"-{name}" if descending != reverse else f"+{name}"
+                for name, descending in ordering
+            ]
+        ).limit(limit + 1)
+
+        try:
+            documents = list(queryset)
+        except me.OperationError as error:
+            raise OperationError([error.args[0]]) from error
+
+        return make_page(
+            documents,
+            limit,
+            direction,
+            ordering,
+            lambda document: [document[name] for name, _ in ordering],
+        )
+
+    @staticmethod
+    def _seek(ordering, values, direction) -> me.Q:
+        """
+        build the keyset filter (a > x) OR (a = x AND b > y) ... for the sort
+        key values, flipping comparisons for descending fields and for backward
+        (prev) pages
+        """
+        conditions = []
+        for index, (name, descending) in enumerate(ordering):
+            compare = "lt" if descending != (direction == PREV) else "gt"
+            terms = [me.Q(**{ordering[i][0]: values[i]}) for i in range(index)]
+            terms.append(me.Q(**{f"{name}__{compare}": values[index]}))
+            conditions.append(reduce(operator.and_, terms))
+        return reduce(operator.or_, conditions)
+
+
+class AsyncRepository(AsyncRepositoryMixin, Repository):
+    """
+    Repository for async views. Every method is a coroutine running the
+    Repository query in a worker thread, querysets are fetched before they
+    are returned
+    e.g:
+        class UserRepository(AsyncRepository):
+            model = User
+
+        users = await UserRepository.find_all({"age__gt": 18})
+    """
@@ -0,0 +1,155 @@
+"""
+pagination.py
+
+Author: Joseph Maclean Arhin
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import typing as t
+import uuid
+
+from collections import namedtuple
+
+from ..exc import BadRequest
+
+Page = namedtuple("Page", "items next_cursor prev_cursor")
+
+NEXT = "next"
+PREV = "prev"
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 1000
+
+OrderBy = t.Optional[t.Union[str, t.Sequence[str]]]
+
+
+def parse_order_by(order_by: OrderBy, primary_key: str) -> t.List[t.Tuple[str, bool]]:
+    """
+    convert order_by e.g ["-created_at", "name"] into (field_name, descending)
+    pairs. The primary key is appended as a tie breaker so every row has a
+    unique position
+    :param order_by: field names, prefixed with - for descending order
+    :param primary_key: name of the primary key field
+    :return:
+    """
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    ordering = []
+    for name in order_by or []:
+        descending = name.startswith("-")
+        ordering.append((name.lstrip("+-"), descending))
+    if primary_key not in [name for name, _ in ordering]:
+        ordering.append((primary_key, False))
+    return ordering
+
+
+def check_limit(limit: int) -> int:
+    """
+    validate the number of rows a page was asked for
+    :param limit: number of rows per page
+    :return: limit, capped at MAX_LIMIT
+    """
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+        raise BadRequest({"limit": "must be a positive integer"})
+    return min(limit, MAX_LIMIT)
+
+
+def _encode_value(obj):
+    if isinstance(obj, datetime.datetime):
+        return {"$dt": obj.isoformat()}
+    if isinstance(obj, datetime.date):
+        return {"$d": obj.isoformat()}
+    if isinstance(obj, uuid.UUID):
+        return {"$uuid": str(obj)}
+    if isinstance(obj, decimal.Decimal):
+        return {"$dec": str(obj)}
+    if type(obj).__name__ == "ObjectId":
+        return {"$oid": str(obj)}
+    raise TypeError(f"cannot paginate on values of type {type(obj).__name__}")
+
+
+def _decode_value(obj: dict):
+    if "$dt" in obj:
+        return datetime.datetime.fromisoformat(obj["$dt"])
+    if "$d" in obj:
+        return datetime.date.fromisoformat(obj["$d"])
+    if "$uuid" in obj:
+        return uuid.UUID(obj["$uuid"])
+    if "$dec" in obj:
+        return decimal.Decimal(obj["$dec"])
+    if "$oid" in obj:
+        from bson import ObjectId  # pylint: disable=C0415
+
+        return ObjectId(obj["$oid"])
+    return obj
+
+
+def encode_cursor(values: t.Sequence, direction: str, ordering: t.Sequence) -> str:
+    """
+    encode the sort key of a row into an opaque cursor token
+    :param values: sort key values of the row the page starts after
+    :param direction: next or prev
+    :param ordering: parsed order_by the cursor belongs to
+    :return: url safe token
+    """
+    payload = {"v": list(values), "d": direction, "o": [list(o) for o in ordering]}
+    data = json.dumps(payload, default=_encode_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, ordering: t.Sequence) -> t.Tuple[list, str]:
+    """
+    decode a cursor token created by encode_cursor
+    :param cursor: token
+    :param ordering: parsed order_by of the current request
+    :return: sort key values and direction
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(
+            base64.urlsafe_b64decode(padded.encode()), object_hook=_decode_value
+        )
+        values, direction = payload["v"], payload["d"]
+        cursor_ordering = [tuple(o) for o in payload["o"]]
+    except (binascii.Error, ValueError, KeyError, TypeError) as error:
+        raise BadRequest({"cursor": "invalid cursor"}) from error
+
+    if direction not in (NEXT, PREV) or len(values) != len(ordering):
+        raise BadRequest({"cursor": "invalid cursor"})
+    if cursor_ordering != [tuple(o) for o in ordering]:
+        raise BadRequest({"cursor": "cursor does not match the requested order"})
+    return values, direction
+
+
+def make_page(
+    rows: list,
+    limit: int,
+    direction: t.Optional[str],
+    ordering: t.Sequence,
+    key: t.Callable[[t.Any], list],
+) -> Page:
+    """
+    build a page from rows fetched with limit + 1 so the extra row tells whether
+    there is another page in the fetch direction
+    :param rows: rows in fetch order
+    :param limit: page size
+    :param direction: direction of the cursor used, None for the first page
+    :param ordering: parsed order_by
+    :param key: returns the sort key values of a row
+    :return: Page
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == PREV:
+        rows.reverse()
+    if not rows:
+        return Page([], None, None)
+
+    has_next = has_more if direction != PREV else True
+    has_prev = has_more if direction == PREV else direction == NEXT
+    next_cursor = encode_cursor(key(rows[-1]), NEXT, ordering) if has_next else None
+    prev_cursor = encode_cursor(key(rows[0]), PREV, ordering) if has_prev else None
+    return Page(rows, next_cursor, prev_cursor)
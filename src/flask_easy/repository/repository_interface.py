@@ -6,6 +6,8 @@ Author: Joseph Maclean Arhin
 import abc
 import typing as t
 
+from .cache import RepoCache
+
 IdType = t.Union[int, str]
 
 
@@ -23,6 +25,35 @@ class RepositoryInterface(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    cache: t.Optional[RepoCache] = None
+
+    @classmethod
+    def _cache_namespace(cls) -> str:
+        return getattr(cls.model, "__name__", cls.__name__)
+
+    @classmethod
+    def _cached_by_id(cls, obj_id: IdType, loader: t.Callable[[], t.Any]):
+        """serve loader's result from the repository cache when one is set"""
+        if cls.cache is None:
+            return loader()
+        return cls.cache.get_by_id(cls._cache_namespace(), obj_id, loader)
+
+    @classmethod
+    def _cached_query(cls, query, loader: t.Callable[[], t.Any]):
+        """serve loader's result from the repository cache when one is set"""
+        if cls.cache is None:
+            return loader()
+        return cls.cache.get_query(cls._cache_namespace(), query, loader)
+
+    @classmethod
+    def _invalidate(cls, obj_ids: t.Optional[t.Iterable[IdType]] = ()):
+        """
+        invalidate cached queries and the given ids after a write. Pass None to
+        invalidate every cached entry of the model
+        """
+        if cls.cache is not None:
+            cls.cache.invalidate(cls._cache_namespace(), obj_ids)
+
     @classmethod
     @abc.abstractmethod
     def index(cls):
@@ -44,11 +75,15 @@ class RepositoryInterface(metaclass=abc.ABCMeta):
 
     @classmethod
     @abc.abstractmethod
-    def create_all(cls, data: t.List[dict]):
+    def create_all(cls, data: t.List[dict], batch_size=None, returning=False):
         """
         when inherited, creates new records
         :param data: the data you want to use to create the model
-        :return: data
+        :param batch_size: number of records written per statement
+        :param returning: return the ids of the created records
+        :return: ids of the created records if returning else their count. The
+            mongo repository returns the created documents instead of their
+            count unless it is called with documents=False
         """
         raise NotImplementedError
 
@@ -65,6 +100,40 @@ class RepositoryInterface(metaclass=abc.ABCMeta):
 
         raise NotImplementedError
 
+    @classmethod
+    @abc.abstractmethod
+    def update_many(cls, ids: t.Sequence[IdType], data: dict):
+        """
+        when inherited, applies the same update to all records in ids
+        :param ids:
+        :param data:
+        :return: number of records updated
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def bulk_update(cls, data: t.List[dict]):
+        """
+        when inherited, updates many records with different values. Each item
+        holds the id of the record and the values to update it with
+        :param data:
+        :return: number of records updated
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def upsert_many(cls, data: t.List[dict], conflict_target=None, update_fields=None):
+        """
+        when inherited, inserts records and updates the ones that already exist
+        :param data:
+        :param conflict_target: fields that identify an existing record
+        :param update_fields: fields to update on existing records
+        :return: number of records inserted or updated
+        """
+        raise NotImplementedError
+
     @classmethod
     @abc.abstractmethod
     def find_by_id(cls, obj_id: IdType):
@@ -78,22 +147,38 @@ class RepositoryInterface(metaclass=abc.ABCMeta):
 
     @classmethod
     @abc.abstractmethod
-    def find(cls, query_params: dict):
+    def find(cls, query_params: dict, fields=None):
         """
         when inherited, should find a record by the parameters passed
         :param query_params:
+        :param fields: names of the fields to load
         :return: a model object
         """
 
     @classmethod
     @abc.abstractmethod
-    def find_all(cls, query_params: dict):
+    def find_all(cls, query_params: dict, order_by=None, limit=None, fields=None):
         """
         when inherited, should find all records by the parameters passed
         :param query_params:
+        :param order_by: field names, prefixed with - for descending order
+        :param limit: maximum number of records
+        :param fields: names of the fields to load
         :return: a model object
         """
 
+    @classmethod
+    @abc.abstractmethod
+    def paginate(cls, cursor: t.Optional[str] = None, limit: int = 20, order_by=None):
+        """
+        when inherited, should return a page of records using keyset pagination
+        :param cursor: opaque token pointing at the previous or next page
+        :param limit: number of records per page
+        :param order_by: field names, prefixed with - for descending order
+        :return: a Page of records with next and previous cursors
+        """
+        raise NotImplementedError
+
     @classmethod
     @abc.abstractmethod
     def delete(cls, obj_id: IdType):
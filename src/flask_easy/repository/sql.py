@@ -3,17 +3,77 @@ peewee_sql_repository.py
 
 Author: Joseph Maclean Arhin
 """
+import operator
+import sqlite3
 import typing as t
+from contextlib import contextmanager
+from functools import reduce
 
-from peewee import PeeweeException
+from peewee import (
+    JOIN,
+    Case,
+    ForeignKeyField,
+    MySQLDatabase,
+    PeeweeException,
+    PostgresqlDatabase,
+    SqliteDatabase,
+    prefetch as prefetch_related,
+)
 from flask_easy import db
 
-from ..exc import OperationError
+from ..exc import BadRequest, NotFoundException, OperationError
+from .aio import AsyncRepositoryMixin
+from .pagination import (
+    DEFAULT_LIMIT,
+    PREV,
+    OrderBy,
+    Page,
+    check_limit,
+    decode_cursor,
+    make_page,
+    parse_order_by,
+)
 from .repository_interface import RepositoryInterface
 
 
 IdType = t.Union[int, str]
 
+LOOKUPS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda field, value: field.in_(value),
+    "contains": lambda field, value: field.contains(value),
+}
+
+BULK_BATCH_SIZE = 100
+
+
+def _database(database):
+    """the database behind a peewee Proxy, e.g the Meta.database of db.Model"""
+    return getattr(database, "obj", database)
+
+
+def max_parameters(database) -> int:
+    """maximum number of bound parameters the database accepts in one statement"""
+    database = _database(database)
+    if isinstance(database, SqliteDatabase):
+        return 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+    if isinstance(database, (PostgresqlDatabase, MySQLDatabase)):
+        return 65535
+    return 999
+
+
+def supports_returning(database) -> bool:
+    """check if the database can return rows from INSERT and UPDATE statements"""
+    database = _database(database)
+    if isinstance(database, SqliteDatabase):
+        return sqlite3.sqlite_version_info >= (3, 35, 0)
+    return bool(database.returning_clause)
+
 
 class Repository(RepositoryInterface):
     """SqlRepository interface using Peewee"""
@@ -21,9 +81,26 @@ class Repository(RepositoryInterface):
     model: t.Type[db.Model]
 
     @classmethod
-    def index(cls):
+    def index(cls, prefetch: t.Optional[t.Sequence] = None):
+        """
+        select all rows. Related rows listed in prefetch are loaded with one
+        query per relation instead of one query per row when accessed
+        e.g UserRepository.index(prefetch=[Job]) loads every user's jobs
+        :param prefetch: related models or queries to load
+        :return: query, or a list of model objects when prefetch is given
+        """
         try:
-            return cls.model.select()
+            with cls._reading() as database:
+                query = cls._bind(cls.model.select(), database)
+                if not prefetch:
+                    return query
+                subqueries = [
+                    cls._bind(
+                        item.select() if isinstance(item, type) else item, database
+                    )
+                    for item in prefetch
+                ]
+                return prefetch_related(query, *subqueries)
         except PeeweeException as error:
             raise OperationError(error.args[0]) from error
 
@@ -32,43 +109,449 @@ class Repository(RepositoryInterface):
         try:
             db_obj = cls.model(**data)
             db_obj.save()
-            return db_obj
         except PeeweeException as error:
             raise OperationError(error.args[0]) from error
+        cls._after_write()
+        return db_obj
 
     @classmethod
-    def create_all(cls, data: t.List[dict]):
+    def create_all(
+        cls,
+        data: t.List[dict],
+        batch_size: t.Optional[int] = None,
+        returning: bool = False,
+    ):
+        """
+        insert rows in batches inside a single transaction. When batch_size is
+        not given it is derived from the number of fields on the model and the
+        database's bound parameter limit
+        :param data: rows to insert
+        :param batch_size: number of rows per INSERT statement
+        :param returning: return the primary keys of the inserted rows
+        :return: list of primary keys if returning else the number of rows inserted
+        """
+        meta = cls.model._meta  # pylint: disable=protected-access
+        if batch_size is None:
+            batch_size = max_parameters(meta.database) // len(meta.sorted_fields)
+        batch_size = max(batch_size, 1)
+        ids, count = [], 0
         try:
-            cls.model.insert_many(data).execute()
+            with meta.database.atomic():
+                for start in range(0, len(data), batch_size):
+                    batch = data[start : start + batch_size]
+                    if not returning:
+                        count += cls.model.insert_many(batch).as_rowcount().execute()
+                    elif supports_returning(meta.database):
+                        query = cls.model.insert_many(batch).returning(meta.primary_key)
+                        ids.extend(row[0] for row in query.tuples().execute())
+                    else:
+                        ids.extend(cls.model.insert(item).execute() for item in batch)
         except PeeweeException as error:
             raise OperationError(error.args[0]) from error
+        cls._after_write()
+        return ids if returning else count
 
     @classmethod
     def find_by_id(cls, obj_id: IdType):
         try:
-            return cls.model.get_by_id(obj_id)
+            return cls._cached_by_id(obj_id, lambda: cls._get_by_id(obj_id))
         except PeeweeException as error:
             raise OperationError(error.args[0]) from error
 
     @classmethod
     def update_by_id(cls, obj_id: IdType, data: dict):
+        """
+        updates a row in a single UPDATE statement. The updated row is read back
+        with RETURNING where the database supports it
+        :param obj_id:
+        :param data:
+        :return: updated model object
+        """
+        meta = cls.model._meta  # pylint: disable=protected-access
+        query = cls.model.update(**data).where(meta.primary_key == obj_id)
+        try:
+            if supports_returning(meta.database):
+                db_obj = next(iter(query.returning(cls.model).execute()), None)
+            elif query.execute():
+                db_obj = cls.model.get_or_none(meta.primary_key == obj_id)
+            else:
+                db_obj = None
+        except PeeweeException as error:
+            raise OperationError(error.args[0]) from error
+
+        if db_obj is None:
+            raise NotFoundException(
+                {"error": f"Resource of id {obj_id} does not exist"}
+            )
+        cls._after_write([obj_id])
+        return db_obj
+
+    @classmethod
+    def update_many(cls, ids: t.Sequence[IdType], data: dict) -> int:
+        """
+        apply the same update to every row in ids with one UPDATE statement
+        :param ids: primary keys of the rows to update
+        :param data: values to set
+        :return: number of rows updated
+        """
+        primary_key = cls.model._meta.primary_key  # pylint: disable=protected-access
+        try:
+            count = cls.model.update(**data).where(primary_key.in_(ids)).execute()
+        except PeeweeException as error:
+            raise OperationError(error.args[0]) from error
+        cls._after_write(ids)
+        return count
+
+    @classmethod
+    def bulk_update(cls, data: t.List[dict], batch_size: int = BULK_BATCH_SIZE) -> int:
+        """
+        update many rows with different values. Every item must contain the
+        primary key. Each batch is one UPDATE ... SET field = CASE id WHEN ...
+        statement and all batches run in a single transaction
+        :param data: list of dicts holding the primary key and values to set
+        :param batch_size: number of rows per statement
+        :return: number of rows updated
+        """
+        meta = cls.model._meta  # pylint: disable=protected-access
+        primary_key = meta.primary_key
+        count = 0
+        try:
+            with meta.database.atomic():
+                for start in range(0, len(data), batch_size):
+                    batch = data[start : start + batch_size]
+                    columns = cls._case_columns(batch)
+                    if not columns:
+                        continue
+                    ids = [item[primary_key.name] for item in batch]
+                    count += (
+                        cls.model.update(columns).where(primary_key.in_(ids)).execute()
+                    )
+        except KeyError as error:
+            raise BadRequest({primary_key.name: "missing from bulk update"}) from error
+        except PeeweeException as error:
+            raise OperationError(error.args[0]) from error
+        cls._after_write([item[primary_key.name] for item in data])
+        return count
+
+    @classmethod
+    def _case_columns(cls, batch: t.List[dict]) -> dict:
+        """
+        map every field set in batch to a CASE on the primary key picking each
+        row's value, rows that do not set a field keep their value
+        """
+        primary_key = cls.model._meta.primary_key  # pylint: disable=protected-access
+        columns = {}
+        for item in batch:
+            obj_id = item[primary_key.name]
+            for name, value in item.items():
+                if name != primary_key.name:
+                    field = cls._field(name)
+                    columns.setdefault(field, []).append(
+                        (obj_id, field.to_value(value))
+                    )
+        return {
+            field: Case(primary_key, cases, field) for field, cases in columns.items()
+        }
+
+    @classmethod
+    def upsert_many(
+        cls,
+        data: t.List[dict],
+        conflict_target: t.Optional[t.Sequence[str]] = None,
+        update_fields: t.Optional[t.Sequence[str]] = None,
+    ) -> int:
+        """
+        insert rows, updating the existing row when one conflicts, with a single
+        INSERT ... ON CONFLICT statement
+        :param data: rows to insert
+        :param conflict_target: unique fields that identify an existing row,
+            defaults to the primary key. Ignored on MySQL
+        :param update_fields: fields to overwrite on conflict, defaults to every
+            field in the data except the conflict target
+        :return: number of rows inserted or updated
+        """
+        if not data:
+            return 0
+        meta = cls.model._meta  # pylint: disable=protected-access
+        conflict_target = list(conflict_target or [meta.primary_key.name])
+        if update_fields is None:
+            update_fields = [name for name in data[0] if name not in conflict_target]
+        on_conflict = {"preserve": [cls._field(name) for name in update_fields]}
+        if not isinstance(_database(meta.database), MySQLDatabase):
+            on_conflict["conflict_target"] = [
+                cls._field(name) for name in conflict_target
+            ]
+        try:
+            count = (
+                cls.model.insert_many(data)
+                .on_conflict(**on_conflict)
+                .as_rowcount()
+                .execute()
+            )
+        except PeeweeException as error:
+            raise OperationError(error.args[0]) from error
+        cls._after_write(None)
+        return count
+
+    @classmethod
+    def find(cls, query_params: dict, fields: t.Optional[t.Sequence[str]] = None):
+        """
+        returns the first row matching query_params. The filter is run by the
+        database, see find_all for the supported lookups
+        :param query_params: filter parameters
+        :param fields: names of the columns to select, all columns when empty
+        :return: model object
+        """
         try:
-            return cls.model.update(**data).where(cls.model.id == obj_id)
+            return cls._cached_query(
+                ("find", sorted(query_params.items()), fields),
+                lambda: cls._read(
+                    cls._select(fields).where(cls._where(query_params)),
+                    get=True,
+                    primary=cls.cache is not None,
+                ),
+            )
+        except cls.model.DoesNotExist as error:
+            raise NotFoundException({"error": "Resource does not exist"}) from error
         except PeeweeException as error:
             raise OperationError(error.args[0]) from error
 
     @classmethod
-    def find(cls, query_params: dict):
-        pass
+    def find_all(
+        cls,
+        query_params: dict,
+        order_by: OrderBy = None,
+        limit: t.Optional[int] = None,
+        fields: t.Optional[t.Sequence[str]] = None,
+        joins: t.Optional[t.Sequence[str]] = None,
+    ):
+        """
+        returns all rows matching query_params. Filters are pushed down to the
+        database as a WHERE clause so existing indexes are used. Lookups are
+        written as field__operator e.g {"age__gt": 18, "name__in": ["a", "b"]}
+        with the operators in, gt, gte, lt, lte, ne and contains
+        :param query_params: filter parameters
+        :param order_by: field names, prefixed with - for descending order
+        :param limit: maximum number of rows
+        :param fields: names of the columns to select, all columns when empty
+        :param joins: foreign key fields whose related rows are selected in the
+            same query, so accessing them does not run a query per row
+        :return: query of model objects
+        """
+        query = cls._join(cls._select(fields), joins or [])
+        with cls._reading() as database:
+            query = cls._bind(query.where(cls._where(query_params)), database)
+        if order_by:
+            if isinstance(order_by, str):
+                order_by = [order_by]
+            query = query.order_by(
+                *[
+                    (
+                        cls._field(name.lstrip("+-")).desc()
+                        if name.startswith("-")
+                        else cls._field(name.lstrip("+-")).asc()
+                    )
+                    for name in order_by
+                ]
+            )
+        if limit is not None:
+            query = query.limit(limit)
+        return query
 
     @classmethod
-    def find_all(cls, query_params: dict):
-        pass
+    @contextmanager
+    def _reading(cls, primary: bool = False):
+        """
+        yield the replica reads should be sent to, None when they should use
+        the model's own database. Replicas count a query in flight while it
+        runs, so queries returned unevaluated are counted when iterated
+        :param primary: read from the primary e.g to fill the repository cache
+        """
+        router = db.router
+        meta = cls.model._meta  # pylint: disable=protected-access
+        if primary or router is None or meta.database is not router.primary:
+            yield None
+            return
+        database = router.for_read()
+        yield None if database is router.primary else database
+
+    @staticmethod
+    def _bind(query, database):
+        """bind query to database, leaving it unchanged when database is None"""
+        return query if database is None else query.bind(database)
+
+    @classmethod
+    def _read(cls, query, get: bool = False, primary: bool = False):
+        """run a select on the database chosen by the replica router"""
+        with cls._reading(primary) as database:
+            query = cls._bind(query, database)
+            return query.get() if get else list(query)
+
+    @classmethod
+    def _get_by_id(cls, obj_id: IdType):
+        meta = cls.model._meta  # pylint: disable=protected-access
+        return cls._read(
+            cls.model.select().where(meta.primary_key == obj_id),
+            get=True,
+            primary=cls.cache is not None,
+        )
+
+    @classmethod
+    def _after_write(cls, obj_ids: t.Optional[t.Iterable] = ()):
+        """invalidate cached reads and pin reads to the primary for a while"""
+        cls._invalidate(obj_ids)
+        if db.router is not None:
+            db.router.record_write()
+
+    @classmethod
+    def _field(cls, name: str):
+        """return the model field called name"""
+        try:
+            return cls.model._meta.fields[name]  # pylint: disable=protected-access
+        except KeyError as error:
+            raise BadRequest({name: "unknown field"}) from error
+
+    @classmethod
+    def _select(cls, fields: t.Optional[t.Sequence[str]] = None):
+        """select query restricted to fields"""
+        return cls.model.select(*[cls._field(name) for name in fields or []])
+
+    @classmethod
+    def _join(cls, query, names: t.Sequence[str]):
+        """join the related models of the foreign key fields in names"""
+        for name in names:
+            field = cls._field(name)
+            if not isinstance(field, ForeignKeyField):
+                raise BadRequest({name: "field is not a foreign key"})
+            rel_model = field.rel_model.alias()
+            join_type = JOIN.LEFT_OUTER if field.null else JOIN.INNER
+            query = query.select_extend(rel_model).join_from(
+                cls.model,
+                rel_model,
+                join_type,
+                on=field == getattr(rel_model, field.rel_field.name),
+                attr=name,
+            )
+        return query
+
+    @classmethod
+    def _where(cls, query_params: dict):
+        """
+        build a peewee expression from query parameters
+        :param query_params: e.g {"name": "maclean", "age__gt": 18}
+        :return: expression, None when there are no parameters
+        """
+        expressions = []
+        for key, value in (query_params or {}).items():
+            name, _, lookup = key.partition("__")
+            try:
+                build = LOOKUPS[lookup or "eq"]
+            except KeyError as error:
+                raise BadRequest({key: f"unknown lookup {lookup}"}) from error
+            expressions.append(build(cls._field(name), value))
+        return reduce(operator.and_, expressions) if expressions else None
+
+    @classmethod
+    def paginate(
+        cls,
+        cursor: t.Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        order_by: OrderBy = None,
+    ) -> Page:
+        """
+        returns a page of rows using keyset pagination. Rows are located by
+        seeking past the sort key in the cursor instead of using OFFSET so the
+        cost of a page does not grow with its depth
+        :param cursor: next_cursor or prev_cursor of a previous page
+        :param limit: number of rows per page, at most MAX_LIMIT
+        :param order_by: field names, prefixed with - for descending order.
+            Fields must not be nullable, comparisons skip rows holding NULL
+        :return: Page
+        """
+        limit = check_limit(limit)
+        meta = cls.model._meta  # pylint: disable=protected-access
+        ordering = parse_order_by(order_by, meta.primary_key.name)
+        fields = [cls._field(name) for name, _ in ordering]
+        for field in fields:
+            if field.null:
+                raise BadRequest(
+                    {"order_by": f"{field.name} is nullable, order by a non null field"}
+                )
+
+        query = cls.model.select()
+        direction = None
+        if cursor:
+            values, direction = decode_cursor(cursor, ordering)
+            query = query.where(cls._seek(fields, ordering, values, direction))
+
+        reverse = direction == PREV
+        query = query.order_by(
+            *[
+                field.desc() if descending != reverse else field.asc()
+                for field, (_, descending) in zip(fields, ordering)
+            ]
+        ).limit(limit + 1)
+
+        try:
+            rows = cls._read(query)
+        except PeeweeException as error:
+            raise OperationError(error.args[0]) from error
+
+        return make_page(
+            rows,
+            limit,
+            direction,
+            ordering,
+            lambda row: [row.__data__.get(field.name) for field in fields],
+        )
+
+    @staticmethod
+    def _seek(fields, ordering, values, direction):
+        """
+        build the keyset condition (a > x) OR (a = x AND b > y) ... for the
+        sort key values, flipping comparisons for descending fields and for
+        backward (prev) pages
+        """
+        conditions = []
+        for index, (field, (_, descending)) in enumerate(zip(fields, ordering)):
+            compare = operator.lt if descending != (direction == PREV) else operator.gt
+            terms = [fields[i] == values[i] for i in range(index)]
+            terms.append(compare(field, values[index]))
+            conditions.append(reduce(operator.and_, terms))
+        return reduce(operator.or_, conditions)
 
     @classmethod
     def delete(cls, obj_id: IdType):
         try:
             cls.model.delete_by_id(obj_id)
-            return True
         except PeeweeException as error:
             raise OperationError(error.args[0]) from error
+        cls._after_write([obj_id])
+        return True
+
+
+class AsyncRepository(AsyncRepositoryMixin, Repository):
+    """
+    Repository for async views. Every method is a coroutine running the
+    Repository query in a worker thread. Connections opened by a call are
+    closed (returned to the pool) when it finishes, so a transaction cannot
+    span several awaited calls
+    e.g:
+        class UserRepository(AsyncRepository):
+            model = User
+
+        user = await UserRepository.find_by_id(1)
+    """
+
+    @classmethod
+    def _call(cls, func, materialize, args, kwargs):
+        databases = [cls.model._meta.database]  # pylint: disable=protected-access
+        if db.router is not None:
+            databases.extend(db.router.replicas)
+        opened = [database for database in databases if database.is_closed()]
+        try:
+            return super()._call(func, materialize, args, kwargs)
+        finally:
+            for database in opened:
+                if not database.is_closed():
+                    database.close()
@@ -3,119 +3,198 @@ response.py
 
 Author: Joseph Maclean Arhin
 """
+import types
 import typing as t
-from marshmallow import Schema
+from urllib.parse import urlencode
 
+from flask import request
 
-class ResponseEntity:
+from .streaming import DEFAULT_CHUNK_SIZE
+
+if t.TYPE_CHECKING:
+    from marshmallow import Schema
+
+
+class _builder:  # pylint: disable=C0103,R0903
+    """
+    Descriptor for ResponseEntity builder methods. Calling a builder method on
+    the class starts a new response, calling it on an instance updates that
+    instance in place and returns it, so chained calls never share state
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            instance = owner()
+        return types.MethodType(self.func, instance)
+
+
+# one slot per builder option, read by FlaskInstance.make_response
+class ResponseEntity:  # pylint: disable=R0902
     """Response entity to parse response from views"""
 
-    _value = None
-    _res_schema = None
-    _many = False
-    _status_code = None
-    _mimetype = None
+    __slots__ = (
+        "_value",
+        "_res_schema",
+        "_many",
+        "_only",
+        "_exclude",
+        "_status_code",
+        "_mimetype",
+        "_headers",
+        "_stream",
+        "_chunk_size",
+        "_ndjson",
+    )
 
     def __init__(
         self,
-        value: t.Any,
-        status_code: int,
-        schema: t.Optional[t.Type[Schema]],
-        **kwargs
+        value: t.Any = None,
+        status_code: int = 200,
+        schema: t.Optional[t.Type["Schema"]] = None,
+        **kwargs,
     ):
         self._value = value
         self._res_schema = schema
         self._many = kwargs.get("many", False)
+        self._only = kwargs.get("only", None)
+        self._exclude = kwargs.get("exclude", ())
         self._status_code = status_code
         self._mimetype = kwargs.get("mimetype", None)
+        self._headers = kwargs.get("headers", None)
+        self._stream = kwargs.get("stream", False)
+        self._chunk_size = kwargs.get("chunk_size", DEFAULT_CHUNK_SIZE)
+        self._ndjson = kwargs.get("ndjson", False)
 
-    @classmethod
-    def created(cls, data=None):
+    @_builder
+    def created(self, data=None):
         """
         Created https://developer.mozilla.org/en-US/docs/Web/HTTP/Status/201
         :param data:
         :return:
         """
-        cls._status_code = 201
-        cls._value = data
-        return cls._response()
+        self._status_code = 201
+        self._value = data
+        return self
 
-    @classmethod
-    def bad_request(cls):
+    @_builder
+    def bad_request(self):
         """
         Bad Request
         https://developer.mozilla.org/en-US/docs/Web/HTTP/Status/403
         :return:
         """
-        cls._status_code = 403
-        return cls._response()
+        self._status_code = 403
+        return self
 
-    @classmethod
-    def ok(cls, data=None):  # pylint: disable=C0103
+    @_builder
+    def ok(self, data=None):  # pylint: disable=C0103
         """
         Okay
         https://developer.mozilla.org/en-US/docs/Web/HTTP/Status/200
         :param data:
         :return:
         """
-        cls._status_code = 200
-        cls._value = data
-        return cls._response()
+        self._status_code = 200
+        self._value = data
+        return self
 
-    @classmethod
-    def body(cls, data=None):
+    @_builder
+    def body(self, data=None):
         """
         Add body to response data
         :param data:
         :return:
         """
-        cls._value = data
-        return cls._response()
+        self._value = data
+        return self
 
-    @classmethod
-    def schema(cls, schema: t.Optional[t.Type[Schema]], many=False):
+    @_builder
+    def schema(
+        self,
+        schema: t.Optional[t.Type["Schema"]],
+        many=False,
+        only: t.Optional[t.Sequence[str]] = None,
+        exclude: t.Sequence[str] = (),
+    ):
         """
         Add marshmallow schema to serialize data
         :param many:
         :param schema:
+        :param only: fields to include in the serialized data
+        :param exclude: fields to leave out of the serialized data
         :return:
         """
-        cls._res_schema = schema
-        cls._many = many
-        return cls._response()
+        self._res_schema = schema
+        self._many = many
+        self._only = only
+        self._exclude = exclude
+        return self
 
-    @classmethod
-    def headers(cls, headers: dict):
+    @_builder
+    def headers(self, headers: dict):
         """
         set response headers
         :param headers:
         :return:
         """
-        cls.headers = headers
-        return cls._response()
+        self._headers = headers
+        return self
 
-    @classmethod
-    def status(cls, status_code: int):
+    @_builder
+    def status(self, status_code: int):
         """
         set response http status code
         :param status_code:
         :return:
         """
-        cls._status_code = status_code
-        return cls._response()
+        self._status_code = status_code
+        return self
+
+    @_builder
+    def stream(self, chunk_size: int = DEFAULT_CHUNK_SIZE, ndjson: bool = False):
+        """
+        stream the response body instead of serializing it all at once. The value
+        should be an iterable such as a peewee query or mongoengine queryset
+        e.g:
+            ResponseEntity.ok(query).schema(UserSchema, many=True).stream()
 
-    @classmethod
-    def _response(cls):
+        :param chunk_size: number of rows serialized and sent per chunk
+        :param ndjson: send newline delimited json instead of a json array
+        :return:
         """
-        return class instance
-        :return: class
+        self._stream = True
+        self._chunk_size = chunk_size
+        self._ndjson = ndjson
+        return self
+
+    @_builder
+    def page(self, page, cursor_param: str = "cursor"):
+        """
+        use the items of a repository page as the response body and link to the
+        next and previous pages with a Link header
+        e.g:
+            page = UserRepository.paginate(cursor=request.args.get("cursor"))
+            return ResponseEntity.page(page).schema(UserSchema, many=True)
+
+        :param page: Page returned by a repository's paginate method
+        :param cursor_param: query parameter the cursor is read from
+        :return:
         """
-        return cls(
-            value=cls._value,
-            status_code=cls._status_code,
-            schema=cls._res_schema,
-            many=cls._many,
-        )
+        self._value = page.items
+        links = []
+        for rel, cursor in (("next", page.next_cursor), ("prev", page.prev_cursor)):
+            if cursor:
+                args = request.args.to_dict(flat=False)
+                args[cursor_param] = [cursor]
+                url = f"{request.base_url}?{urlencode(args, doseq=True)}"
+                links.append(f'<{url}>; rel="{rel}"')
+        if links:
+            self._headers = {**(self._headers or {}), "Link": ", ".join(links)}
+        return self
 
     @property
     def values(self):
@@ -124,6 +203,12 @@ class ResponseEntity:
             "value": self._value,
             "schema": self._res_schema,
             "many": self._many,
+            "only": self._only,
+            "exclude": self._exclude,
             "status": self._status_code,
             "mimetype": self._mimetype,
+            "headers": self._headers,
+            "stream": self._stream,
+            "chunk_size": self._chunk_size,
+            "ndjson": self._ndjson,
         }
@@ -0,0 +1,271 @@
+"""
+routing.py
+
+Author: Joseph Maclean Arhin
+"""
+import contextlib
+import copy
+import gc
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import typing as t
+
+from flask import Blueprint, Flask
+from werkzeug.routing import Map
+
+MANIFEST_VERSION = 1
+
+
+def load_urls(root_path: str):
+    """execute the urls.py of the project at root_path"""
+    spec = importlib.util.spec_from_file_location(
+        "urls", os.path.join(root_path, "urls.py")
+    )
+    urls = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(urls)
+    return urls
+
+
+def _import_path(blueprint: Blueprint) -> str:
+    """return module:attribute of a blueprint defined at module level"""
+    module = sys.modules.get(blueprint.import_name)
+    for name, value in vars(module or {}).items():
+        if value is blueprint:
+            return f"{blueprint.import_name}:{name}"
+    raise ValueError(
+        f"blueprint {blueprint.name!r} is not a module level attribute of "
+        f"{blueprint.import_name!r}"
+    )
+
+
+def _path_prefix(url_prefix: t.Optional[str]) -> t.Optional[str]:
+    if not url_prefix or not url_prefix.strip("/"):
+        return None
+    return "/" + url_prefix.strip("/")
+
+
+def build_manifest(routes: t.Iterable[t.Tuple[Blueprint, t.Optional[str]]]) -> dict:
+    """
+    list the import path and url prefix of every blueprint in routes
+    :param routes: urls.py routes
+    :return: manifest
+    """
+    blueprints = []
+    for blueprint, url_prefix in routes:
+        blueprints.append(
+            {
+                "import_path": _import_path(blueprint),
+                "url_prefix": url_prefix,
+                "path": _path_prefix(url_prefix or blueprint.url_prefix),
+            }
+        )
+    return {"version": MANIFEST_VERSION, "blueprints": blueprints}
+
+
+def write_manifest(path: str, manifest: dict):
+    """write a manifest built by build_manifest"""
+    with open(path, "w", encoding="UTF-8") as file:
+        json.dump(manifest, file, indent=2)
+        file.write("\n")
+
+
+def read_manifest(path: str) -> t.List[dict]:
+    """return the blueprints of the manifest at path"""
+    with open(path, encoding="UTF-8") as file:
+        manifest = json.load(file)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(
+            f"{path} was written by another version of flask easy, "
+            "run flask easy routes:manifest again"
+        )
+    return manifest["blueprints"]
+
+
+def import_blueprint(import_path: str) -> Blueprint:
+    """import a blueprint from module:attribute"""
+    module, _, attribute = import_path.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def copy_map(url_map: Map, map_class: t.Type[Map] = Map) -> Map:
+    """return a map_class with the settings of url_map and a copy of its rules"""
+    result = map_class(
+        default_subdomain=url_map.default_subdomain,
+        strict_slashes=url_map.strict_slashes,
+        merge_slashes=url_map.merge_slashes,
+        redirect_defaults=url_map.redirect_defaults,
+        converters=url_map.converters,
+        sort_parameters=url_map.sort_parameters,
+        sort_key=url_map.sort_key,
+        host_matching=url_map.host_matching,
+    )
+    for rule in Map.iter_rules(url_map):
+        rule = copy.copy(rule)
+        rule.map = None
+        result.add(rule)
+    return result
+
+
+class LazyMap(Map):
+    """
+    Url map whose rules are matched and built from a published copy. Rules
+    added while the app is serving go to this map and are published as a new
+    copy once registration is done, so a request never reads a map that is
+    being changed
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.lock = threading.RLock()
+        self._local = threading.local()
+        self._published: t.Optional[Map] = None
+        super().__init__(*args, **kwargs)
+
+    def add(self, rulefactory):
+        super().add(rulefactory)
+        self._published = None
+
+    def published(self) -> Map:
+        """return the copy requests are served from, publishing it if needed"""
+        published = self._published
+        if published is None:
+            with self.lock:
+                published = self._published
+                if published is None:
+                    published = copy_map(self)
+                    published.update()
+                    self._published = published
+        return published
+
+    def bind(self, *args, **kwargs):
+        return self.published().bind(*args, **kwargs)
+
+    def bind_to_environ(self, *args, **kwargs):
+        return self.published().bind_to_environ(*args, **kwargs)
+
+    def iter_rules(self, endpoint=None):
+        return self.published().iter_rules(endpoint)
+
+    @property
+    def registering(self) -> bool:
+        """whether the current thread is registering blueprints"""
+        return getattr(self._local, "registering", False)
+
+    @contextlib.contextmanager
+    def registration(self):
+        """register blueprints on an app that is already serving requests"""
+        with self.lock:
+            self._local.registering = True
+            try:
+                yield self
+            finally:
+                self._local.registering = False
+
+
+class LazyBlueprints:
+    """
+    WSGI middleware registering the blueprints of a route manifest on the
+    first request to their url prefix, so their view modules are not
+    imported at startup. The prefixes are indexed when the app is set up. A
+    request to a pending prefix registers its blueprints before the app
+    matches it, other requests keep using the published url map. Blueprints
+    without a url prefix are registered right away
+    """
+
+    def __init__(
+        self, app: Flask, entries: t.Iterable[dict], load_all_on: t.Iterable[str] = ()
+    ):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.load_all_on = frozenset(load_all_on)
+        app.url_map = copy_map(app.url_map, LazyMap)
+        self._pending: t.Dict[str, t.List[dict]] = {}
+        for entry in entries:
+            if entry["path"] is None:
+                self._register(entry)
+            else:
+                self._pending.setdefault(entry["path"], []).append(entry)
+        segments: t.Dict[str, t.List[str]] = {}
+        for path in sorted(self._pending, key=len, reverse=True):
+            segments.setdefault(path.split("/", 2)[1], []).append(path)
+        self._segments = {segment: tuple(paths) for segment, paths in segments.items()}
+
+    def __bool__(self):
+        return bool(self._pending)
+
+    def __call__(self, environ, start_response):
+        if self._pending:
+            self.load_path(environ.get("PATH_INFO", ""))
+        return self.wsgi_app(environ, start_response)
+
+    def _register(self, entry: dict):
+        self.app.register_blueprint(
+            import_blueprint(entry["import_path"]), url_prefix=entry["url_prefix"]
+        )
+
+    def _load(self, paths: t.Iterable[str]):
+        with self.app.url_map.registration():
+            for path in paths:
+                for entry in self._pending.pop(path, ()):
+                    self._register(entry)
+
+    def load_path(self, path: str):
+        """
+        register the blueprints serving path
+        :param path: request path
+        :return:
+        """
+        if path in self.load_all_on:
+            self.load_all()
+            return
+        segment = path.split("/", 2)[1] if path.startswith("/") else ""
+        paths = [
+            prefix
+            for prefix in self._segments.get(segment, ())
+            if prefix in self._pending
+            and (path == prefix or path.startswith(prefix + "/"))
+        ]
+        if paths:
+            self._load(paths)
+
+    def load_all(self):
+        """register every pending blueprint"""
+        self._load(list(self._pending))
+
+
+def register_manifest(app: Flask, entries: t.Iterable[dict]):
+    """
+    register the blueprints of a route manifest on app
+    :param app:
+    :param entries: blueprints returned by read_manifest
+    :return:
+    """
+    for entry in entries:
+        app.register_blueprint(
+            import_blueprint(entry["import_path"]), url_prefix=entry["url_prefix"]
+        )
+
+
+def preload(app: Flask):
+    """
+    Register the lazy blueprints still pending, build app's url matcher and
+    freeze the objects created while app was set up. Call it in the parent
+    process of a preforking server e.g gunicorn's when_ready hook with
+    preload_app = True. Workers then share the imported code and app copy on
+    write instead of each importing it and building the matcher, and the
+    garbage collector no longer writes to those pages
+    :param app: the app, set up before workers fork
+    :return:
+    """
+    lazy_blueprints = getattr(app, "lazy_blueprints", None)
+    if lazy_blueprints:
+        lazy_blueprints.load_all()
+    url_map = app.url_map
+    if isinstance(url_map, LazyMap):
+        url_map = url_map.published()
+    url_map.update()
+    gc.collect()
+    gc.freeze()
@@ -3,15 +3,16 @@ cli.py
 
 Author: Joseph Maclean Arhin
 """
+import os
+
 import click
 from flask import Flask
-from peewee_migrate import Router
 from .resources import create_model, create_repository, create_view
 
 MIGRATION_ERROR = ("migrations can only be run on sql databases",)
 
 
-def init_cli(app: Flask, db_conn):  # pylint: disable=R0915
+def init_cli(app: Flask, db_conn):  # pylint: disable=R0914,R0915
     """initialize all cli commands"""
 
     @click.group()
@@ -26,6 +27,11 @@ def init_cli(app: Flask, db_conn):  # pylint: disable=R0915
         config = app.config
         return config["DATABASE"].get("engine")
 
+    def get_router():
+        from peewee_migrate import Router  # pylint: disable=C0415
+
+        return Router(db_conn.database)
+
     @easy.command("db:seed")
     @click.argument("cycle", required=False, type=int)
     @click.option("--class_name", "-c")
@@ -59,7 +65,7 @@ def init_cli(app: Flask, db_conn):  # pylint: disable=R0915
                 )
             )
         else:
-            router = Router(db_conn.database)
+            router = get_router()
             if not name:
                 router.create(auto=True)
             else:
@@ -77,7 +83,7 @@ def init_cli(app: Flask, db_conn):  # pylint: disable=R0915
                 )
             )
         else:
-            router = Router(db_conn.database)
+            router = get_router()
             if not name:
                 router.run(fake=fake)
             else:
@@ -95,7 +101,7 @@ def init_cli(app: Flask, db_conn):  # pylint: disable=R0915
                 )
             )
         else:
-            router = Router(db_conn.database)
+            router = get_router()
 
             if not name:
                 if steps > len(router.done):
@@ -126,7 +132,7 @@ def init_cli(app: Flask, db_conn):  # pylint: disable=R0915
                 )
             )
         else:
-            router = Router(db_conn.database)
+            router = get_router()
             click.echo(
                 click.style("Migrations done:", fg="bright_green", underline=True)
             )
@@ -135,6 +141,55 @@ def init_cli(app: Flask, db_conn):  # pylint: disable=R0915
             click.echo(click.style("Migrations to do:", underline=True))
             click.echo("\n".join(router.diff))
 
+    @easy.command("docs:build")
+    @click.option("--output", "-o", "output")
+    def build_docs(output: str):
+        """
+        write the swagger spec of the app's routes to a json file served at
+        /apispec_1.json when OPENAPI_SPEC_FILE is set
+        :param output: spec file, defaults to OPENAPI_SPEC_FILE
+        :return:
+        """
+        from flask_easy.docs import StaticSpec  # pylint: disable=C0415
+
+        if not output:
+            output = os.path.join(
+                app.root_path, app.config.get("OPENAPI_SPEC_FILE", "apispec.json")
+            )
+        static_spec = StaticSpec.build(app)
+        static_spec.save(output)
+        click.echo(
+            click.style(
+                f"spec written to {output} (ETag {static_spec.etag})",
+                fg="bright_green",
+            )
+        )
+
+    @easy.command("routes:manifest")
+    @click.option("--output", "-o", "output")
+    def build_route_manifest(output: str):
+        """
+        write the import path and url prefix of every blueprint in urls.py to
+        a manifest read at startup when ROUTE_MANIFEST is set
+        :param output: manifest file, defaults to ROUTE_MANIFEST
+        :return:
+        """
+        # pylint: disable=C0415
+        from flask_easy.routing import build_manifest, load_urls, write_manifest
+
+        if not output:
+            output = os.path.join(
+                app.root_path, app.config.get("ROUTE_MANIFEST", "routes.json")
+            )
+        manifest = build_manifest(load_urls(app.root_path).routes)
+        write_manifest(output, manifest)
+        click.echo(
+            click.style(
+                f"{len(manifest['blueprints'])} blueprints written to {output}",
+                fg="bright_green",
+            )
+        )
+
     @generate.command("model")
     @click.argument("name")
     @click.option("-r", "--repository", "repository", is_flag=True)
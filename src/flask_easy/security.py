@@ -3,13 +3,18 @@ authentication.py
 
 Author: Joseph Maclean Arhin
 """
-
+import base64
+import binascii
+import hashlib
+import json
 import typing as t
 import inspect
+import time
 from dataclasses import dataclass, field
-from functools import cached_property, wraps
-from flask import request, Request
+from functools import wraps
+from flask import g, request, Request
 
+from flask_easy.cache import LRUCache
 from flask_easy.exc import Unauthorized
 
 
@@ -21,38 +26,82 @@ class UserDetailsToken:
 
     username: str = field(default_factory=str)
     roles: t.List[str] = field(default_factory=list)
+    # unix timestamp the token expires at, cached tokens are dropped then
+    expires_at: t.Optional[float] = None
+
+
+def jwt_expiry(token: str) -> t.Optional[float]:
+    """
+    return the exp claim of a JWT, read without verifying the signature,
+    None when token is not a JWT or has no exp
+    :param token: JWT, optionally prefixed with its scheme e.g Bearer
+    :return: unix timestamp
+    """
+    parts = token.rsplit(" ", 1)[-1].split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1] + "=" * (-len(parts[1]) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    expires_at = claims.get("exp") if isinstance(claims, dict) else None
+    return float(expires_at) if isinstance(expires_at, (int, float)) else None
 
 
 class TokenDecoder:
     """
-    To be inherited
+    To be inherited. request is flask's request proxy so it always points
+    at the request being handled by the current thread or greenlet
     """
 
-    request: Request
+    request: Request = request
 
     def decode_token(self) -> UserDetailsToken:
         """This method is called for every request.
         It should contain the logic for decoding tokens/authenticating users"""
         raise NotImplementedError
 
+    def get_token(self) -> t.Optional[str]:
+        """
+        return the raw token of the request, used to key the token cache.
+        Defaults to the Authorization header
+        """
+        return self.request.headers.get("Authorization")
+
     @classmethod
     def set_request(cls, request_obj):
-        """request is loaded at runtime into the class context"""
+        """
+        request is loaded at runtime into the class context. Only needed to
+        replace flask's request proxy with another request object
+        """
         cls.request = request_obj
 
 
 class Auth:
-    """Main auth class"""
+    """
+    Main auth class. The details of the authenticated user are stored on
+    flask.g so concurrent requests never see each other's user
+    """
 
     token_decoder: t.Type[TokenDecoder]
-    user_details: UserDetailsToken
+    token_cache: t.Optional[LRUCache] = None
+
+    @property
+    def user_details(self) -> t.Optional[UserDetailsToken]:
+        """Return the details of the user authenticated in this request"""
+        return g.get("_flask_easy_user_details")
+
+    @user_details.setter
+    def user_details(self, user_details: UserDetailsToken):
+        g._flask_easy_user_details = user_details  # pylint: disable=W0212
 
-    @cached_property
+    @property
     def user_name(self):
         """Return username"""
         return self.user_details.username
 
-    @cached_property
+    @property
     def get_roles(self):
         """Return roles"""
         return self.user_details.roles
@@ -61,31 +110,69 @@ class Auth:
         """Register token decoder"""
         self.token_decoder = token_decoder
 
+    def enable_token_cache(self, maxsize: int = 1024, ttl: float = 60):
+        """
+        cache decoded tokens so signatures are not verified on every request.
+        Entries are keyed by a hash of the token and live for ttl seconds or
+        until the token expires, whichever comes first. The expiry is the
+        expires_at set by the decoder, else the exp claim of a JWT; tokens
+        with neither are decoded on every request. A revoked token is still
+        accepted until its cache entry expires
+        :param maxsize: maximum number of cached tokens
+        :param ttl: seconds a decoded token is cached
+        :return:
+        """
+        self.token_cache = LRUCache(maxsize, ttl)
+
+    def _decode(self, decoder: TokenDecoder) -> UserDetailsToken:
+        token = decoder.get_token() if self.token_cache is not None else None
+        if not token:
+            return decoder.decode_token()
+
+        key = hashlib.sha256(token.encode()).digest()
+        details = self.token_cache.get(key)
+        now = time.time()
+        if details is None or (
+            details.expires_at is not None and details.expires_at <= now
+        ):
+            details = decoder.decode_token()
+            if details.expires_at is None:
+                details.expires_at = jwt_expiry(token)
+            if details.expires_at is not None:
+                ttl = min(
+                    self.token_cache.ttl or float("inf"), details.expires_at - now
+                )
+                if ttl > 0:
+                    self.token_cache.set(key, details, ttl)
+        return details
+
     def __call__(self, *args, **kwargs):
         if not self.token_decoder:
             return
-        self.user_details = self.token_decoder().decode_token()
+        self.user_details = self._decode(self.token_decoder())
 
 
 def auth_required(roles=None):
     """auth required decorator"""
 
+    required_roles = frozenset(roles or ())
+
     def authorize_user(func):
         """
         A wrapper to authorize an action using
         :param func: {function}` the function to wrap around
         :return:
         """
+        wants_username = "username" in inspect.getfullargspec(func).args
 
         @wraps(func)
         def view_wrapper(*args, **kwargs):
             # Append service name to function name to form role
 
-            authenticator.token_decoder.set_request(request)
             authenticator()
             user_roles = authenticator.get_roles
-            if is_authorized(user_roles, roles or []):
-                if "username" in inspect.getfullargspec(func).args:
+            if is_authorized(user_roles, required_roles):
+                if wants_username:
                     kwargs["username"] = authenticator.user_name
                 return func(*args, **kwargs)
 
@@ -98,12 +185,8 @@ def auth_required(roles=None):
 
 def is_authorized(user_roles, required_roles):
     """Check if access roles is in available roles"""
-
-    for role in required_roles:
-        if role not in user_roles:
-            return False
-
-    return True
+    required_roles = frozenset(required_roles)
+    return not required_roles or required_roles.issubset(user_roles)
 
 
 authenticator = Auth()
@@ -0,0 +1,240 @@
+"""
+streaming.py
+
+Author: Joseph Maclean Arhin
+"""
+import codecs
+import itertools
+import json
+import re
+import typing as t
+
+DEFAULT_CHUNK_SIZE = 500
+
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = frozenset(_WHITESPACE + ",]")
+
+# a whole string, a bracket, a string continuing in the next read, and a
+# comma, which only ends the value outside of brackets
+_NESTED_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]|"')
+_VALUE_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{},]|"')
+_STRING_TOKEN = re.compile(r'["\\]')
+
+_DECODER = json.JSONDecoder()
+
+
+def iter_results(value: t.Iterable, chunk_size: int = DEFAULT_CHUNK_SIZE) -> t.Iterator:
+    """
+    Iterate over a query without caching its rows. peewee queries are read with
+    .iterator() and mongoengine querysets with no_cache() so rows that have been
+    written to the response can be garbage collected
+    :param value: peewee query, mongoengine queryset or any iterable
+    :param chunk_size: cursor batch size for mongoengine
+    :return: row iterator
+    """
+    iterator = getattr(value, "iterator", None)
+    if callable(iterator):
+        return iterator()
+    no_cache = getattr(value, "no_cache", None)
+    if callable(no_cache):
+        return iter(no_cache().batch_size(chunk_size))
+    return iter(value)
+
+
+def iter_chunks(rows: t.Iterable, chunk_size: int) -> t.Iterator[list]:
+    """split rows into lists of at most chunk_size items"""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_json(
+    value: t.Iterable,
+    dumps: t.Callable[[t.Any], bytes],
+    dump: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ndjson: bool = False,
+) -> t.Iterator[bytes]:
+    """
+    Serialize rows chunk by chunk into a json array or newline delimited json.
+    At most chunk_size rows are held in memory at a time
+    :param value: rows to serialize
+    :param dumps: json encoder returning bytes
+    :param dump: converts a row to serializable data e.g a marshmallow schema's dump
+    :param chunk_size: number of rows serialized per chunk
+    :param ndjson: yield newline delimited json instead of a json array
+    :return: json encoded chunks
+    """
+    chunks = iter_chunks(iter_results(value, chunk_size), chunk_size)
+    if ndjson:
+        for chunk in chunks:
+            yield b"".join(dumps(dump(row) if dump else row) + b"\n" for row in chunk)
+        return
+
+    yield b"["
+    separator = b""
+    for chunk in chunks:
+        encoded = dumps([dump(row) for row in chunk] if dump else chunk)
+        yield separator + encoded[1:-1]
+        separator = b","
+    yield b"]"
+
+
+class JSONStreamError(ValueError):
+    """raised when a streamed json body is malformed"""
+
+
+class _ValueScanner:  # pylint: disable=R0903
+    """
+    Finds the comma or bracket ending a json value that spans several reads.
+    Only brackets, commas and strings are looked at and each read is scanned
+    once, so the value is decoded a single time when it is complete
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.skip = 0
+
+    def scan(self, text: str, start: int = 0) -> bool:
+        """return whether text holds the end of the value"""
+        index = start + self.skip
+        self.skip = 0
+        while True:
+            if self.in_string:
+                token = _STRING_TOKEN
+            else:
+                token = _NESTED_TOKEN if self.depth else _VALUE_TOKEN
+            match = token.search(text, index)
+            if match is None:
+                return False
+            char, index = match.group(), match.end()
+            if char == "\\":
+                # skip the escaped character, which may be in the next read
+                self.skip = max(index + 1 - len(text), 0)
+                index += 1
+            elif char == '"':
+                self.in_string = not self.in_string
+            elif len(char) > 1:
+                continue
+            elif char in "[{":
+                self.depth += 1
+            elif not self.depth:
+                if char != "}":
+                    return True
+            else:
+                self.depth -= 1
+
+
+class _ArrayReader:
+    """the buffered, decoded reads of a json array body"""
+
+    def __init__(self, stream: t.BinaryIO, read_size: int):
+        self.stream = stream
+        self.read_size = read_size
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def read(self) -> str:
+        """read and decode the next read_size bytes"""
+        data = self.stream.read(self.read_size)
+        self.eof = not data
+        try:
+            return self.utf8.decode(data or b"", final=self.eof)
+        except UnicodeDecodeError as error:
+            raise JSONStreamError("request body is not valid utf-8") from error
+
+    def fill(self) -> bool:
+        """drop the consumed part of the buffer and read more"""
+        if self.eof:
+            return False
+        self.buffer = self.buffer[self.position :] + self.read()
+        self.position = 0
+        return not self.eof or bool(self.buffer)
+
+    def next_char(self) -> t.Optional[str]:
+        """skip whitespace and return the next character, None at the end"""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in _WHITESPACE
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return None
+
+    def read_value(self):
+        """read until the value at position is complete"""
+        scanner = _ValueScanner()
+        if scanner.scan(self.buffer, self.position):
+            return
+        reads = [self.buffer[self.position :]]
+        while not self.eof:
+            reads.append(self.read())
+            if scanner.scan(reads[-1]):
+                break
+        self.buffer, self.position = "".join(reads), 0
+
+    def decode_value(self) -> t.Any:
+        """decode the value at position, reading on while it is incomplete"""
+        read_whole = False
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.position)
+                # a number at the end of the buffer may continue in the next read
+                complete = (
+                    self.eof or read_whole or self.buffer[end : end + 1] in _DELIMITERS
+                )
+            except json.JSONDecodeError as error:
+                if self.eof or read_whole:
+                    raise JSONStreamError(error.msg) from error
+                complete = False
+            if complete:
+                self.position = end
+                return value
+            # the value continues past this read, find where it ends before
+            # decoding it again
+            self.read_value()
+            read_whole = True
+
+
+def iter_json_array(
+    stream: t.BinaryIO, read_size: int = READ_SIZE
+) -> t.Iterator[t.Any]:
+    """
+    Parse a json array from a binary stream item by item, reading read_size
+    bytes at a time. Only the current item and the unread part of the
+    buffer are held in memory. An item spanning several reads is scanned for
+    its end as they arrive and decoded once
+    :param stream: file like object e.g flask's request.stream
+    :param read_size: number of bytes read at a time
+    :return: decoded items
+    """
+    reader = _ArrayReader(stream, read_size)
+    if reader.next_char() != "[":
+        raise JSONStreamError("expected a json array")
+    reader.position += 1
+    if reader.next_char() == "]":
+        reader.position += 1
+    else:
+        while True:
+            if reader.next_char() is None:
+                raise JSONStreamError("unexpected end of json array")
+            yield reader.decode_value()
+            separator = reader.next_char()
+            reader.position += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise JSONStreamError("expected , or ] after an array item")
+    if reader.next_char() is not None:
+        raise JSONStreamError("unexpected data after the json array")
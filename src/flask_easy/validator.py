@@ -3,37 +3,123 @@ validator.py
 
 Author: Joseph Maclean Arhin
 """
-
+import io
 import typing as t
 from functools import wraps
-from flask import request
-from marshmallow import Schema
+from flask import g, request
 
 from flask_easy.exc.app_exceptions import ValidationException
+from flask_easy.streaming import JSONStreamError, iter_json_array
+
+if t.TYPE_CHECKING:
+    from marshmallow import Schema
+
+
+def _body() -> t.BinaryIO:
+    """
+    return the request body as a stream, from the copy kept by flask when the
+    body was already read e.g by request.get_data() in a before_request hook
+    """
+    if getattr(request, "_cached_data", None) is not None:
+        return io.BytesIO(request.get_data())
+    return request.stream
 
 
-def validator(schema: t.Type[Schema]):
+def _load_items(
+    schema: "Schema", max_items: t.Optional[int], collect_errors: bool
+) -> t.List[t.Any]:
     """
-    A wrapper to validate input data using marshmallow schema
+    load the items of a json array request body one at a time while it is
+    being read
+    :param schema: schema loading a single item
+    :param max_items: maximum number of items accepted
+    :param collect_errors: report every invalid item instead of the first one
+    :return: loaded items
+    """
+    from marshmallow import ValidationError  # pylint: disable=C0415
+
+    if not request.is_json:
+        request.on_json_loading_failed(None)
+    items, errors = [], {}
+    try:
+        for index, item in enumerate(iter_json_array(_body())):
+            if max_items is not None and index >= max_items:
+                raise ValidationException(
+                    message={"_schema": [f"Longer than maximum length {max_items}."]}
+                )
+            try:
+                items.append(schema.load(item))
+            except ValidationError as error:
+                errors[index] = error.messages
+                if not collect_errors:
+                    break
+    except JSONStreamError as error:
+        raise ValidationException(
+            message={"_schema": [f"Invalid JSON: {error}."]}
+        ) from error
+    if errors:
+        raise ValidationException(message=errors)
+    return items
+
+
+def validator(  # pylint: disable=R0913,R0917
+    schema: t.Type["Schema"],
+    many: bool = False,
+    partial: t.Union[bool, t.Sequence[str]] = False,
+    unknown: t.Optional[str] = None,
+    arg_name: t.Optional[str] = None,
+    max_items: t.Optional[int] = None,
+    collect_errors: bool = True,
+):
+    """
+    A wrapper to validate input data using marshmallow schema. The schema is
+    built once when the view is decorated and the request body is loaded a
+    single time. The deserialized data is stored on flask.g.validated_data and
+    passed to the view as arg_name when given.
+    With many the request body is parsed and validated item by item while it
+    is read, so large arrays are never held in memory twice. Errors are
+    returned per item index. Schema hooks registered with pass_many receive
+    one item at a time
     e.g:
         @api.route("users", methods=[POST])
-        @validator(schema=UserSchema)
-        def create_user():
+        @validator(schema=UserSchema, arg_name="user")
+        def create_user(user):
             pass
 
     :param schema: Marshmallow schema to validate by
+    :param many: expect a list of objects
+    :param partial: ignore missing required fields, or only the ones listed
+    :param unknown: how to treat unknown fields, one of marshmallow's
+        RAISE, EXCLUDE or INCLUDE. Defaults to the schema's setting
+    :param arg_name: name of the view keyword argument receiving the data
+    :param max_items: maximum number of items accepted with many
+    :param collect_errors: report every invalid item with many, otherwise stop
+        at the first one
     :return:
     """
+    from marshmallow import ValidationError  # pylint: disable=C0415
+
+    options = {"unknown": unknown} if unknown is not None else {}
+    schema_instance = schema(many=many, partial=partial, **options)
+    item_schema = schema(partial=partial, **options)
 
     def validate_data(func):
         @wraps(func)
         def view_wrapper(*args, **kwargs):
-            errors = schema().validate(request.json)
-            if errors:
-                raise ValidationException(message=errors)
+            if many:
+                data = _load_items(item_schema, max_items, collect_errors)
+            else:
+                try:
+                    data = item_schema.load(request.json)
+                except ValidationError as error:
+                    raise ValidationException(message=error.messages) from error
 
+            g.validated_data = data
+            if arg_name:
+                kwargs[arg_name] = data
             return func(*args, **kwargs)
 
+        view_wrapper.validator_schema = schema_instance
         return view_wrapper
 
     return validate_data
@@ -21,6 +21,17 @@ def create_app(config=Config()):
     return app
 
 
+@pytest.fixture
+def sqlite_app(tmp_path):
+    """initialize flask easy with a temporary sqlite database"""
+
+    class SqliteConfig(Config):
+        DATABASE = {"engine": "SqliteDatabase", "name": str(tmp_path / "test.db")}
+
+    app = FlaskEasy().init_app(**{"import_name": __name__, "config": SqliteConfig()})
+    return app
+
+
 @pytest.fixture
 def app_with_model(create_app):
     """initialize flask easy with User model created"""
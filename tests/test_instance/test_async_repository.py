@@ -0,0 +1,63 @@
+"""
+test_async_repository.py
+
+Author: Joseph Maclean Arhin
+"""
+import asyncio
+
+from flask_easy import ResponseEntity, db, fields, schema
+from flask_easy.repository.sql import AsyncRepository
+
+
+class Task(db.Model):
+    title = fields.CharField()
+
+
+class TaskRepository(AsyncRepository):
+    model = Task
+
+
+class TaskSchema(schema.Schema):
+    title = schema.fields.Str()
+
+
+def test_async_repository_methods(sqlite_app):
+    Task.create_table()
+
+    async def run():
+        task = await TaskRepository.create({"title": "write"})
+        await TaskRepository.create_all([{"title": "read"}, {"title": "sleep"}])
+        found = await TaskRepository.find_by_id(task.id)
+        tasks = await TaskRepository.find_all({}, order_by="-id")
+        updated = await TaskRepository.update_by_id(task.id, {"title": "rewrite"})
+        everything = await TaskRepository.index()
+        await TaskRepository.delete(task.id)
+        return found, tasks, updated, everything
+
+    found, tasks, updated, everything = asyncio.run(run())
+    assert found.title == "write"
+    assert isinstance(tasks, list)
+    assert [task.title for task in tasks] == ["sleep", "read", "write"]
+    assert updated.title == "rewrite"
+    assert len(everything) == 3
+    assert Task.select().count() == 2
+
+
+def test_async_view_and_awaitable_response(sqlite_app):
+    Task.create_table()
+    Task.create(title="write")
+    db.database.close()
+
+    @sqlite_app.get("/tasks/<int:task_id>")
+    async def get_task(task_id):
+        task = await TaskRepository.find_by_id(task_id)
+        return ResponseEntity.ok({"title": task.title})
+
+    @sqlite_app.get("/tasks")
+    def list_tasks():
+        tasks = TaskRepository.find_all({}, fields=["title"])
+        return ResponseEntity.ok(tasks).schema(TaskSchema, many=True)
+
+    client = sqlite_app.test_client()
+    assert client.get("/tasks/1").json == {"title": "write"}
+    assert client.get("/tasks").json == [{"title": "write"}]
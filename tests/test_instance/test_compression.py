@@ -0,0 +1,157 @@
+"""
+test_compression.py
+
+Author: Joseph Maclean Arhin
+"""
+import gzip
+import json
+import zlib
+
+import pytest
+
+from flask_easy import Blueprint, FlaskEasy, ResponseEntity, make_response
+
+ROWS = [
+    {"id": i, "name": f"user-{i}", "email": f"user-{i}@example.com"} for i in range(200)
+]
+
+
+@pytest.fixture
+def compressed_app(tmp_path):
+    """initialize flask easy with compression"""
+
+    def create_app(**options):
+        config = type(
+            "Config",
+            (),
+            {
+                "APP_NAME": "My Awesome App",
+                "DATABASE": {
+                    "engine": "SqliteDatabase",
+                    "name": str(tmp_path / "test.db"),
+                },
+                "COMPRESSION": True,
+                **options,
+            },
+        )
+        app = FlaskEasy().init_app(import_name=__name__, config=config)
+
+        @app.get("/users")
+        def users():
+            return ResponseEntity.ok(ROWS)
+
+        @app.get("/user")
+        def user():
+            return ResponseEntity.ok(ROWS[0])
+
+        @app.get("/users/stream")
+        def stream_users():
+            return ResponseEntity.ok(ROWS).stream(chunk_size=50, ndjson=True)
+
+        reports = Blueprint("reports", __name__)
+
+        @reports.get("/reports")
+        def report():
+            return ResponseEntity.ok(ROWS)
+
+        app.register_blueprint(reports)
+        return app
+
+    return create_app
+
+
+def test_gzip_above_threshold(compressed_app):
+    client = compressed_app().test_client()
+
+    response = client.get("/users", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.content_length == len(response.data)
+    assert json.loads(gzip.decompress(response.data)) == ROWS
+
+    response = client.get("/user", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.json == ROWS[0]
+
+    response = client.get("/users")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+
+def test_compression_runs_after_hooks(compressed_app):
+    app = compressed_app()
+    seen = []
+
+    @app.get("/users/text")
+    def users_text():
+        response = make_response("")
+        response.set_data(json.dumps(ROWS))
+        response.mimetype = "application/json"
+        return response
+
+    @app.after_request
+    def add_total(response):
+        seen.append(response.json)
+        body = response.json
+        if isinstance(body, list):
+            response.set_data(json.dumps({"total": len(body), "rows": body}))
+        return response
+
+    client = app.test_client()
+    for url in ("/users", "/users/text"):
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(response.data)) == {
+            "total": len(ROWS),
+            "rows": ROWS,
+        }
+    assert seen == [ROWS, ROWS]
+
+
+def test_accept_encoding_negotiation(compressed_app):
+    client = compressed_app(COMPRESSION_ENCODINGS=["gzip", "deflate"]).test_client()
+
+    response = client.get("/users", headers={"Accept-Encoding": "gzip;q=0.5, deflate"})
+    assert response.headers["Content-Encoding"] == "deflate"
+    assert json.loads(zlib.decompress(response.data)) == ROWS
+
+    response = client.get("/users", headers={"Accept-Encoding": "br, gzip;q=0"})
+    assert "Content-Encoding" not in response.headers
+
+    response = client.get("/users", headers={"Accept-Encoding": "*"})
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_streamed_responses_are_compressed(compressed_app):
+    client = compressed_app().test_client()
+
+    response = client.get("/users/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = gzip.decompress(response.data).splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+
+def test_blueprint_levels(compressed_app):
+    app = compressed_app(
+        COMPRESSION_LEVEL=1, COMPRESSION_BLUEPRINT_LEVELS={"reports": 0}
+    )
+    client = app.test_client()
+
+    response = client.get("/reports", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.json == ROWS
+
+    fast = client.get("/users", headers={"Accept-Encoding": "gzip"})
+    app.compressor.level = 9
+    small = client.get("/users", headers={"Accept-Encoding": "gzip"})
+    assert len(small.data) < len(fast.data)
+
+
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_encodings(compressed_app, encoding, module):
+    pytest.importorskip(module)
+    client = compressed_app().test_client()
+
+    response = client.get("/users", headers={"Accept-Encoding": f"gzip, {encoding}"})
+    assert response.headers["Content-Encoding"] == encoding
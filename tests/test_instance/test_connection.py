@@ -0,0 +1,175 @@
+"""
+test_connection.py
+
+Author: Joseph Maclean Arhin
+"""
+import pytest
+from flask import Flask
+from peewee import fn
+
+from flask_easy import FlaskEasy, db, fields
+from flask_easy.connection import (
+    EasyDB,
+    PoolStatsMixin,
+    ReplicaRouter,
+    create_database,
+)
+from flask_easy.exc import SetupError
+from flask_easy.repository.cache import RepoCache
+from flask_easy.repository.sql import Repository
+
+
+def test_pool_config_creates_pooled_database(tmp_path):
+    class Config:
+        APP_NAME = "My Awesome App"
+        POOL_STATS_URL = "/_pool"
+        DATABASE = {
+            "engine": "SqliteDatabase",
+            "name": str(tmp_path / "pool.db"),
+            "pool": {"max_connections": 4, "stale_timeout": 60},
+        }
+
+    app = FlaskEasy().init_app(import_name=__name__, config=Config)
+    database = db.database.obj
+    assert isinstance(database, PoolStatsMixin)
+    assert database.__class__.__name__ == "PooledSqliteDatabase"
+
+    client = app.test_client()
+    client.get("/_pool")
+    stats = client.get("/_pool").json
+    assert stats["max_connections"] == 4
+    assert stats["in_use"] == 1
+    assert stats["idle"] == 0
+    assert stats["acquired"] == 2
+    assert db.pool_stats()["idle"] == 1
+
+
+def test_database_without_pool(tmp_path):
+    database = create_database(
+        {"engine": "SqliteDatabase", "name": str(tmp_path / "plain.db"), "timeout": 3}
+    )
+    assert not isinstance(database, PoolStatsMixin)
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"engine": "NoSuchDatabase", "name": "x"},
+        {"engine": "peewee.Model", "name": "x"},
+        {"engine": "playhouse.apsw_ext.NoDatabase", "name": "x", "pool": {}},
+        {"name": "x"},
+    ],
+)
+def test_invalid_database_config(config):
+    with pytest.raises(SetupError):
+        create_database(config)
+
+
+class Node(db.Model):
+    name = fields.CharField()
+
+
+class NodeRepository(Repository):
+    model = Node
+
+
+def replica_app(tmp_path, **options):
+    class Config:
+        APP_NAME = "My Awesome App"
+        DATABASE = {
+            "engine": "SqliteDatabase",
+            "name": str(tmp_path / "primary.db"),
+            "replicas": [
+                {"name": str(tmp_path / "replica-1.db")},
+                {"name": str(tmp_path / "replica-2.db")},
+            ],
+            **options,
+        }
+
+    app = FlaskEasy().init_app(import_name=__name__, config=Config)
+    for database in [db.database.obj, *db.router.replicas]:
+        with database.bind_ctx([Node]):
+            database.create_tables([Node])
+    for index, replica in enumerate(db.router.replicas, 1):
+        with replica.bind_ctx([Node]):
+            Node.create(name=f"replica-{index}")
+    return app
+
+
+def test_reads_are_routed_to_replicas(tmp_path):
+    replica_app(tmp_path)
+    NodeRepository.create({"name": "primary"})
+    assert [NodeRepository.find_by_id(1).name for _ in range(3)] == [
+        "replica-1",
+        "replica-2",
+        "replica-1",
+    ]
+    assert NodeRepository.find({"id": 1}).name == "replica-2"
+    assert [node.name for node in NodeRepository.index()] == ["replica-1"]
+    assert [node.name for node in NodeRepository.paginate().items] == ["replica-2"]
+    with db.database.atomic():
+        assert NodeRepository.find_by_id(1).name == "primary"
+
+
+def test_router_primary_is_the_current_database(tmp_path):
+    easy_db = EasyDB()
+    for name in ("first", "second"):
+        app = Flask(__name__)
+        app.config["DATABASE"] = {
+            "engine": "SqliteDatabase",
+            "name": str(tmp_path / f"{name}.db"),
+            "replicas": [{"name": str(tmp_path / f"{name}-replica.db")}],
+        }
+        easy_db.init_app(app)
+        assert easy_db.router.primary is easy_db.database
+    assert easy_db.database.database.endswith("second.db")
+
+
+def test_reads_follow_writes_to_primary(tmp_path):
+    app = replica_app(tmp_path, read_your_writes=60)
+    Node.create(name="primary")
+    with app.app_context():
+        assert NodeRepository.find_by_id(1).name == "replica-1"
+        NodeRepository.update_by_id(1, {"name": "updated"})
+        assert NodeRepository.find_by_id(1).name == "updated"
+    with app.app_context():
+        assert NodeRepository.find_by_id(1).name == "replica-2"
+
+
+def test_cache_misses_are_loaded_from_primary(tmp_path, monkeypatch):
+    replica_app(tmp_path)
+    monkeypatch.setattr(NodeRepository, "cache", RepoCache())
+    NodeRepository.create({"name": "primary"})
+    assert NodeRepository.find_by_id(1).name == "primary"
+    assert NodeRepository.find({"id": 1}).name == "primary"
+
+    NodeRepository.update_by_id(1, {"name": "updated"})
+    assert NodeRepository.find_by_id(1).name == "updated"
+    assert NodeRepository.find({"id": 1}).name == "updated"
+
+
+def test_in_flight_count_is_held_while_the_query_runs(tmp_path):
+    replica_app(tmp_path, replica_strategy="least_connections")
+    first, second = db.router.replicas
+    seen = []
+    for replica in (first, second):
+        replica.register_function(
+            lambda node_id: seen.append((first.in_flight, second.in_flight)),
+            "probe",
+            1,
+        )
+
+    query = NodeRepository.index()
+    assert (first.in_flight, second.in_flight) == (0, 0)
+    list(query.where(fn.probe(Node.id).is_null()))
+    assert seen == [(1, 0)]
+    assert (first.in_flight, second.in_flight) == (0, 0)
+
+
+def test_least_connections_strategy(tmp_path):
+    replica_app(tmp_path, replica_strategy="least_connections")
+    first, second = db.router.replicas
+    with db.router.reading(first):
+        assert db.router.for_read() is second
+    with pytest.raises(SetupError):
+        ReplicaRouter(db.database, [], strategy="random")
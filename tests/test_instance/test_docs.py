@@ -0,0 +1,82 @@
+"""
+test_docs.py
+
+Author: Joseph Maclean Arhin
+"""
+import json
+
+from flask_easy import Blueprint, FlaskEasy, ResponseEntity, schema, validator
+from flask_easy.docs import build_spec
+
+
+class UserSchema(schema.Schema):
+    name = schema.fields.String(required=True)
+
+
+def add_routes(app):
+    api = Blueprint("users", __name__)
+
+    @api.get("/users/<int:user_id>")
+    def get_user(user_id):
+        """
+        Fetch a user
+        ---
+        responses:
+          200:
+            description: the user
+        """
+        return ResponseEntity.ok({"id": user_id})
+
+    @api.post("/users")
+    @validator(UserSchema)
+    def create_user():
+        """Create a user"""
+        return ResponseEntity.created({})
+
+    app.register_blueprint(api)
+
+
+def test_build_spec(create_app):
+    add_routes(create_app)
+    spec = build_spec(create_app)
+
+    get_user = spec["paths"]["/users/{user_id}"]["get"]
+    assert get_user["summary"] == "Fetch a user"
+    assert get_user["tags"] == ["users"]
+    assert get_user["responses"]["200"]["description"] == "the user"
+    assert get_user["parameters"] == [
+        {"in": "path", "name": "user_id", "required": True, "type": "integer"}
+    ]
+
+    create_user = spec["paths"]["/users"]["post"]
+    assert create_user["parameters"][0]["in"] == "body"
+    assert create_user["parameters"][0]["schema"] == {"$ref": "#/definitions/User"}
+    assert "name" in spec["definitions"]["User"]["properties"]
+    assert "/apispec_1.json" not in spec["paths"]
+
+
+def test_built_spec_is_served_with_etag(tmp_path):
+    class DocsConfig:
+        APP_NAME = "My Awesome App"
+        DATABASE = {"engine": "SqliteDatabase", "name": str(tmp_path / "test.db")}
+        OPENAPI_SPEC_FILE = str(tmp_path / "apispec.json")
+
+    app = FlaskEasy().init_app(import_name=__name__, config=DocsConfig())
+    add_routes(app)
+    result = app.test_cli_runner().invoke(args=["easy", "docs:build"])
+    assert result.exit_code == 0, result.output
+
+    app = FlaskEasy().init_app(import_name=__name__, config=DocsConfig())
+    static_spec = app.extensions["flask_easy_spec"]
+    client = app.test_client()
+
+    response = client.get("/apispec_1.json")
+    assert response.status_code == 200
+    assert response.get_etag() == (static_spec.etag, False)
+    assert "/users" in json.loads(response.data)["paths"]
+
+    response = client.get(
+        "/apispec_1.json", headers={"If-None-Match": f'"{static_spec.etag}"'}
+    )
+    assert response.status_code == 304
+    assert response.data == b""
@@ -0,0 +1,179 @@
+"""
+test_exceptions.py
+
+Author: Joseph Maclean Arhin
+"""
+import io
+import json
+import logging
+import queue
+
+from flask.logging import default_handler
+
+from flask_easy import FlaskEasy
+from flask_easy.exc import NotFoundException, OperationError, Unauthorized
+from flask_easy.log import (
+    DroppingQueueHandler,
+    JSONFormatter,
+    RateLimitFilter,
+    configure_logging,
+    formatter,
+    stop_listener,
+)
+
+
+def test_exceptions_do_not_log_when_created(caplog):
+    with caplog.at_level(logging.DEBUG):
+        error = NotFoundException({"error": "missing"})
+
+    assert not caplog.records
+    assert error.context == {"error": "missing"}
+    assert error.exception_case == "NotFoundException"
+    assert error.log_level == logging.DEBUG
+    assert Unauthorized().log_level == logging.INFO
+    assert OperationError("failed").log_level == logging.ERROR
+
+
+def test_error_handler_logs_by_status(create_app, caplog):
+    app = create_app
+
+    @app.get("/missing")
+    def missing():
+        raise NotFoundException()
+
+    @app.get("/broken")
+    def broken():
+        raise OperationError("database is down")
+
+    client = app.test_client()
+    with caplog.at_level(logging.DEBUG, logger=app.logger.name):
+        assert client.get("/missing").status_code == 404
+        assert client.get("/broken").status_code == 500
+
+    assert [(r.levelno, r.getMessage()) for r in caplog.records] == [
+        (
+            logging.DEBUG,
+            "NotFoundException: {'NotFoundException': 'Resource not found'}",
+        ),
+        (logging.ERROR, "OperationError: {'OperationError': 'database is down'}"),
+    ]
+
+
+def test_rate_limit_filter(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("flask_easy.log.time.monotonic", lambda: now[0])
+    rate_limit = RateLimitFilter(rate=2, period=60)
+
+    def record(message):
+        return logging.LogRecord("app", logging.ERROR, __file__, 1, message, (), None)
+
+    assert [rate_limit.filter(record("boom")) for _ in range(5)] == [
+        True,
+        True,
+        False,
+        False,
+        False,
+    ]
+    assert rate_limit.filter(record("other"))
+
+    now[0] = 61.0
+    allowed = record("boom")
+    assert rate_limit.filter(allowed)
+    assert allowed.getMessage() == "boom (3 similar messages suppressed)"
+
+
+def test_rate_limit_ignores_varying_ids(create_app, caplog):
+    app = create_app
+    app.logger.addFilter(RateLimitFilter(rate=2, period=60))
+
+    @app.get("/items/<int:item_id>")
+    def item(item_id):
+        raise NotFoundException(f"Resource of id {item_id} does not exist")
+
+    client = app.test_client()
+    with caplog.at_level(logging.DEBUG, logger=app.logger.name):
+        for item_id in range(10):
+            assert client.get(f"/items/{item_id}").status_code == 404
+
+    assert len(caplog.records) == 2
+
+    def record(item_id):
+        return logging.LogRecord(
+            "app", logging.WARNING, __file__, 1, "id %s is invalid", (item_id,), None
+        )
+
+    rate_limit = RateLimitFilter(rate=1, period=60)
+    assert [rate_limit.filter(record(item_id)) for item_id in range(3)] == [
+        True,
+        False,
+        False,
+    ]
+
+
+def test_error_log_rate_limit_only_limits_errors(tmp_path, caplog):
+    class Config:
+        APP_NAME = "My Awesome App"
+        DATABASE = {"engine": "SqliteDatabase", "name": str(tmp_path / "test.db")}
+        ERROR_LOG_RATE_LIMIT = (1, 60)
+
+    app = FlaskEasy().init_app(import_name=__name__, config=Config)
+
+    @app.get("/items/<int:item_id>")
+    def item(item_id):
+        app.logger.info("looking up item %s", item_id)
+        raise OperationError("database is down")
+
+    client = app.test_client()
+    with caplog.at_level(logging.INFO, logger=app.logger.name):
+        for item_id in range(3):
+            assert client.get(f"/items/{item_id}").status_code == 500
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages.count("looking up item 0") == 1
+    assert "looking up item 2" in messages
+    assert [record.levelno for record in caplog.records].count(logging.ERROR) == 1
+
+
+def test_async_json_logging(create_app):
+    app = create_app
+    stream = io.StringIO()
+    app.logger.handlers = [logging.StreamHandler(stream)]
+    app.config.update(LOG_ASYNC=True, LOG_FORMAT="json", LOG_QUEUE_SIZE=100)
+    listener = configure_logging(app)
+
+    @app.get("/broken")
+    def broken():
+        raise OperationError("database is down")
+
+    app.test_client().get("/broken?page=2")
+    stop_listener(listener)
+
+    (entry,) = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert entry["level"] == "ERROR"
+    assert entry["message"] == "OperationError: {'OperationError': 'database is down'}"
+    assert entry["url"] == "http://localhost/broken?page=2"
+    assert entry["remote_addr"] == "127.0.0.1"
+
+
+def test_configure_logging_leaves_default_handler_alone(create_app):
+    app = create_app
+    app.config.update(LOG_FORMAT="json")
+    configure_logging(app)
+
+    (handler,) = app.logger.handlers
+    assert handler is not default_handler
+    assert isinstance(handler.formatter, JSONFormatter)
+    assert default_handler.formatter is formatter
+
+
+def test_dropping_queue_handler():
+    def record(message):
+        return logging.LogRecord("app", logging.INFO, __file__, 1, message, (), None)
+
+    for policy, kept in (("drop_new", ["1", "2"]), ("drop_oldest", ["3", "4"])):
+        log_queue = queue.Queue(2)
+        handler = DroppingQueueHandler(log_queue, policy)
+        for message in ("1", "2", "3", "4"):
+            handler.handle(record(message))
+        assert [log_queue.get_nowait().msg for _ in range(2)] == kept
+        assert handler.dropped == 2
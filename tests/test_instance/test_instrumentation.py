@@ -0,0 +1,201 @@
+"""
+test_instrumentation.py
+
+Author: Joseph Maclean Arhin
+"""
+import logging
+from types import SimpleNamespace
+
+import pytest
+from peewee import ForeignKeyAccessor, ForeignKeyField, Model
+
+from flask_easy import FlaskEasy, ResponseEntity, db, fields, g
+from flask_easy.exc import SetupError
+from flask_easy.instrumentation import (
+    MongoCommandListener,
+    QueryCollector,
+    QueryInstrumentation,
+    current_collector,
+    lazy_load_listeners,
+    query_count,
+    query_listeners,
+)
+from flask_easy.connection import LazyLoadAccessor
+from flask_easy.repository.sql import Repository
+
+
+class Author(db.Model):
+    name = fields.CharField()
+
+
+class Book(db.Model):
+    title = fields.CharField()
+    author = fields.ForeignKeyField(Author, backref="books")
+
+
+class BookRepository(Repository):
+    model = Book
+
+
+class AuthorRepository(Repository):
+    model = Author
+
+
+@pytest.fixture
+def library_app(tmp_path):
+    class Config:
+        APP_NAME = "My Awesome App"
+        DETECT_N_PLUS_ONE = True
+        N_PLUS_ONE_THRESHOLD = 2
+        QUERY_INSTRUMENTATION = True
+        SERVER_TIMING = True
+        QUERY_LOG_PARAMS = True
+        SLOW_QUERY_MS = 0
+        DATABASE = {"engine": "SqliteDatabase", "name": str(tmp_path / "test.db")}
+
+    app = FlaskEasy().init_app(import_name=__name__, config=Config)
+    db.database.create_tables([Author, Book])
+    for index in range(3):
+        author = Author.create(name=f"author-{index}")
+        Book.create(title=f"book-{index}", author=author)
+    db.database.close()
+
+    @app.get("/books")
+    def books():
+        joins = ["author"] if "joins" in app.config else None
+        titles = [
+            f"{book.title} by {book.author.name}"
+            for book in BookRepository.find_all({}, joins=joins)
+        ]
+        return ResponseEntity.ok({"books": titles, "queries": query_count()})
+
+    yield app
+    app.extensions["flask_easy_n_plus_one"].uninstall()
+
+
+def test_lazy_loads_are_reported(library_app, caplog):
+    with caplog.at_level(logging.WARNING):
+        response = library_app.test_client().get("/books")
+
+    assert response.json["queries"] == 4
+    assert "Book.author was loaded lazily 3 times" in caplog.text
+
+
+def test_lazy_load_detector_uninstall(library_app, caplog):
+    detector = library_app.extensions["flask_easy_n_plus_one"]
+    detector.uninstall()
+    assert detector._count_query not in query_listeners(db.database)
+    assert not lazy_load_listeners(db.database)
+
+    with caplog.at_level(logging.WARNING):
+        response = library_app.test_client().get("/books")
+
+    assert response.json["queries"] == 0
+    assert "N+1" not in caplog.text
+
+
+def test_lazy_loads_are_counted_without_patching_peewee(library_app):
+    class Shelf(Model):
+        book = ForeignKeyField(Book)
+
+    assert isinstance(Book.__dict__["author"], LazyLoadAccessor)
+    assert type(Shelf.__dict__["book"]) is ForeignKeyAccessor
+
+
+def test_joins_load_related_rows_in_one_query(library_app, caplog):
+    library_app.config["joins"] = True
+    with caplog.at_level(logging.WARNING):
+        response = library_app.test_client().get("/books")
+
+    assert response.json["books"][0] == "book-0 by author-0"
+    assert response.json["queries"] == 1
+    assert "N+1" not in caplog.text
+
+
+def test_index_prefetch(library_app):
+    with library_app.test_request_context():
+        library_app.preprocess_request()
+        authors = AuthorRepository.index(prefetch=[Book])
+        assert [[book.title for book in a.books] for a in authors] == [
+            ["book-0"],
+            ["book-1"],
+            ["book-2"],
+        ]
+        assert query_count() == 2
+
+
+def test_queries_are_collected_per_request(library_app, caplog):
+    collected = []
+
+    @library_app.get("/books/<int:book_id>")
+    def book(book_id):
+        title = BookRepository.find_by_id(book_id).title
+        collected.extend(current_collector().queries)
+        return ResponseEntity.ok({"title": title})
+
+    with caplog.at_level(logging.WARNING, logger="flask_easy.slow_queries"):
+        response = library_app.test_client().get("/books/2")
+
+    (record,) = collected
+    assert record.backend == "sql"
+    assert record.statement.startswith('SELECT "t1"."id"')
+    assert record.params[0] == 2
+    assert record.method == "BookRepository.find_by_id"
+    assert response.headers["Server-Timing"].startswith("sql;dur=")
+    assert response.headers["Server-Timing"].endswith('desc="1 queries"')
+    slow = [r for r in caplog.records if r.name == "flask_easy.slow_queries"]
+    assert slow[0].method == "BookRepository.find_by_id"
+
+
+def test_instrumentation_is_opt_in(tmp_path):
+    class Config:
+        APP_NAME = "My Awesome App"
+        DATABASE = {"engine": "SqliteDatabase", "name": str(tmp_path / "test.db")}
+
+    app = FlaskEasy().init_app(import_name=__name__, config=Config)
+
+    @app.get("/authors")
+    def authors():
+        return ResponseEntity.ok({"authors": len(AuthorRepository.index())})
+
+    db.database.create_tables([Author])
+    response = app.test_client().get("/authors")
+    assert "Server-Timing" not in response.headers
+    with pytest.raises(SetupError):
+        query_listeners(db.database)
+
+
+def test_query_listeners_can_be_removed(library_app):
+    queries = []
+    listeners = query_listeners(db.database)
+    listeners.append(lambda sql, params, duration: queries.append(sql))
+    Author.select().count()
+    listeners.pop()
+    Author.select().count()
+    db.database.close()
+    assert len(queries) == 1
+
+
+def test_mongo_commands_are_recorded(library_app):
+    instrumentation = QueryInstrumentation()
+    listener = MongoCommandListener(instrumentation)
+    started = SimpleNamespace(
+        command_name="find",
+        command={"find": "users", "filter": {}},
+        database_name="app",
+        request_id=1,
+        connection_id=("localhost", 27017),
+    )
+    finished = SimpleNamespace(
+        request_id=1, connection_id=("localhost", 27017), duration_micros=1500
+    )
+
+    with library_app.test_request_context():
+        g._flask_easy_collector = QueryCollector()  # pylint: disable=W0212
+        listener.started(started)
+        listener.succeeded(finished)
+        (record,) = current_collector().queries
+
+    assert record.statement == "find app.users"
+    assert record.params is None
+    assert record.duration == 0.0015
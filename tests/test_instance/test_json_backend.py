@@ -0,0 +1,58 @@
+"""
+test_json_backend.py
+
+Author: Joseph Maclean Arhin
+"""
+import datetime
+import json
+
+import pytest
+
+from flask_easy import FlaskEasy, ResponseEntity
+from flask_easy.exc import NotFoundException, SetupError
+from flask_easy.json_backend import JSONBackend, get_json_backend
+
+
+class OrjsonConfig:
+    APP_NAME = "My Awesome App"
+    JSON_BACKEND = "orjson"
+
+
+def test_stdlib_backend_returns_bytes():
+    payload = {"created": datetime.date(2022, 1, 1), "tags": ["a"]}
+    assert JSONBackend().dumps(payload) == b'{"created":"2022-01-01","tags":["a"]}'
+
+
+def test_missing_backend_falls_back_to_stdlib(monkeypatch):
+    monkeypatch.setitem(__import__("sys").modules, "ujson", None)
+    with pytest.warns(UserWarning):
+        backend = get_json_backend("ujson")
+    assert type(backend) is JSONBackend  # pylint: disable=C0123
+
+
+def test_unknown_backend():
+    with pytest.raises(SetupError):
+        get_json_backend("simplejson")
+
+
+def test_backend_used_for_responses_and_errors():
+    pytest.importorskip("orjson")
+    app = FlaskEasy().init_app(import_name=__name__, config=OrjsonConfig)
+    assert app.json_backend.name == "orjson"
+
+    @app.get("/raw")
+    def raw():
+        return ResponseEntity.ok({"greeting": "hello"})
+
+    @app.get("/missing")
+    def missing():
+        raise NotFoundException()
+
+    client = app.test_client()
+    response = client.get("/raw")
+    assert response.mimetype == "application/json"
+    assert json.loads(response.data) == {"greeting": "hello"}
+
+    response = client.get("/missing")
+    assert response.status_code == 404
+    assert json.loads(response.data) == {"NotFoundException": "Resource not found"}
@@ -0,0 +1,203 @@
+"""
+test_mongo_repository.py
+
+Author: Joseph Maclean Arhin
+"""
+from types import SimpleNamespace
+
+import mongoengine as me
+import pytest
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import InvalidOperation
+
+from flask_easy.exc import BadRequest, NotFoundException
+from flask_easy.repository.mongo import Repository
+
+IDS = [ObjectId() for _ in range(3)]
+
+
+class Item(me.Document):
+    name = me.StringField(required=True)
+    price = me.IntField(required=True)
+    note = me.StringField()
+
+
+class ItemRepository(Repository):
+    model = Item
+
+
+class FakeCollection:
+    """records the commands the repository sends to the collection"""
+
+    def __init__(self):
+        self.inserted = []
+        self.requests = []
+
+    def insert_many(self, documents, ordered=True):
+        assert not ordered
+        self.inserted.extend(documents)
+        return SimpleNamespace(inserted_ids=IDS[: len(documents)])
+
+    def bulk_write(self, requests, ordered=True):
+        assert not ordered
+        if not requests:
+            raise InvalidOperation("No operations to execute")
+        self.requests.extend(requests)
+        return SimpleNamespace(modified_count=len(requests), upserted_count=0)
+
+
+class FakeQuerySet:
+    """queryset returning documents and recording how it was narrowed"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.calls = []
+
+    def __call__(self, **query):
+        self.calls.append(("objects", query))
+        return self
+
+    def __iter__(self):
+        return iter(self.documents)
+
+    def filter(self, query):
+        self.calls.append(("filter", query.to_query(Item)))
+        return self
+
+    def order_by(self, *keys):
+        self.calls.append(("order_by", keys))
+        return self
+
+    def limit(self, limit):
+        self.calls.append(("limit", limit))
+        return self
+
+    def only(self, *fields):
+        self.calls.append(("only", fields))
+        return self
+
+    def get(self, **query):
+        self.calls.append(("get", query))
+        return self.documents[0]
+
+    def modify(self, new=False, **data):
+        self.calls.append(("modify", new, data))
+        return self.documents[0] if self.documents else None
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    fake = FakeCollection()
+    monkeypatch.setattr(Item, "_get_collection", staticmethod(lambda: fake))
+    return fake
+
+
+@pytest.fixture
+def items():
+    # reading Item.objects would connect, so the manager is swapped directly
+    manager = Item.__dict__["objects"]
+
+    def set_documents(documents):
+        Item.objects = FakeQuerySet(documents)
+        return Item.objects
+
+    yield set_documents
+    Item.objects = manager
+
+
+def test_create_all(collection):
+    documents = ItemRepository.create_all(
+        [{"name": "pen", "price": 2}, {"name": "ink", "price": 5}], batch_size=1
+    )
+
+    assert [document.pk for document in documents] == [IDS[0], IDS[0]]
+    assert not documents[0]._get_changed_fields()  # pylint: disable=W0212
+    assert collection.inserted == [
+        {"name": "pen", "price": 2},
+        {"name": "ink", "price": 5},
+    ]
+    assert (
+        ItemRepository.create_all([{"name": "cap", "price": 1}], documents=False) == 1
+    )
+    rows = [{"name": "cap", "price": 1}, {"name": "nib", "price": 1}]
+    assert ItemRepository.create_all(rows, returning=True) == IDS[:2]
+
+
+def test_bulk_update(collection):
+    count = ItemRepository.bulk_update(
+        [{"id": str(IDS[0]), "price": 3}, {"id": str(IDS[1]), "note": "blue"}]
+    )
+
+    assert count == 2
+    assert collection.requests == [
+        UpdateOne({"_id": IDS[0]}, {"$set": {"price": 3}}),
+        UpdateOne({"_id": IDS[1]}, {"$set": {"note": "blue"}}),
+    ]
+
+
+def test_upsert_many(collection):
+    assert (
+        ItemRepository.upsert_many(
+            [{"name": "pen", "price": 3}], conflict_target=["name"]
+        )
+        == 1
+    )
+    assert collection.requests == [
+        UpdateOne({"name": "pen"}, {"$set": {"price": 3}}, upsert=True)
+    ]
+
+
+def test_bulk_writes_of_nothing(collection):
+    assert ItemRepository.bulk_update([]) == 0
+    assert ItemRepository.upsert_many([]) == 0
+    assert not collection.requests
+
+
+def test_update_by_id(items):
+    queryset = items([Item(id=IDS[0], name="pen", price=3)])
+
+    assert ItemRepository.update_by_id(IDS[0], {"price": 3}).price == 3
+    assert queryset.calls == [
+        ("objects", {"pk": IDS[0]}),
+        ("modify", True, {"price": 3}),
+    ]
+
+    items([])
+    with pytest.raises(NotFoundException):
+        ItemRepository.update_by_id(IDS[1], {"price": 3})
+
+
+def test_find_projection(items):
+    queryset = items([Item(name="pen", price=2)])
+
+    assert ItemRepository.find({"name": "pen"}, fields=["name"]).name == "pen"
+    assert queryset.calls == [("only", ("name",)), ("get", {"name": "pen"})]
+
+
+def test_paginate(items):
+    documents = [Item(id=IDS[index], name="pen", price=index) for index in range(3)]
+    queryset = items(documents)
+
+    page = ItemRepository.paginate(limit=2, order_by="-price")
+    assert page.items == documents[:2]
+    assert page.prev_cursor is None
+    assert queryset.calls == [("order_by", ("-price", "+id")), ("limit", 3)]
+
+    queryset = items(documents[2:])
+    page = ItemRepository.paginate(cursor=page.next_cursor, limit=2, order_by="-price")
+    assert page.items == documents[2:]
+    assert page.next_cursor is None
+    assert queryset.calls[0] == (
+        "filter",
+        {"$or": [{"price": {"$lt": 1}}, {"price": 1, "_id": {"$gt": IDS[1]}}]},
+    )
+
+
+@pytest.mark.parametrize("order_by", ["note", "-colour"])
+def test_paginate_rejects_optional_and_unknown_fields(items, order_by):
+    queryset = items([])
+
+    with pytest.raises(BadRequest):
+        ItemRepository.paginate(order_by=order_by)
+    assert not queryset.calls
@@ -0,0 +1,98 @@
+"""
+test_pagination.py
+
+Author: Joseph Maclean Arhin
+"""
+import pytest
+
+from flask_easy import ResponseEntity, db, fields
+from flask_easy.exc import BadRequest
+from flask_easy.repository.pagination import MAX_LIMIT, check_limit
+from flask_easy.repository.sql import Repository
+
+
+@pytest.fixture
+def repository(sqlite_app):
+    class Item(db.Model):
+        name = fields.CharField()
+        rank = fields.IntegerField()
+        note = fields.CharField(null=True)
+
+    class ItemRepository(Repository):
+        model = Item
+
+    Item.create_table()
+    Item.insert_many(
+        [{"name": f"item {i}", "rank": i % 4} for i in range(23)]
+    ).execute()
+    with sqlite_app.test_request_context("/items?cursor=x&size=5"):
+        yield ItemRepository
+
+
+def walk(repository, order_by):
+    """follow next cursors to the end, then prev cursors back to the start"""
+    pages = [repository.paginate(limit=5, order_by=order_by)]
+    while pages[-1].next_cursor:
+        pages.append(repository.paginate(pages[-1].next_cursor, 5, order_by))
+    backwards = [pages[-1]]
+    while backwards[-1].prev_cursor:
+        backwards.append(repository.paginate(backwards[-1].prev_cursor, 5, order_by))
+    return pages, backwards
+
+
+def test_paginate_by_primary_key(repository):
+    pages, backwards = walk(repository, None)
+
+    ids = [item.id for page in pages for item in page.items]
+    assert ids == list(range(1, 24))
+    assert [len(page.items) for page in pages] == [5, 5, 5, 5, 3]
+    assert pages[0].prev_cursor is None
+    assert [p.items for p in backwards] == [p.items for p in reversed(pages)]
+
+
+def test_paginate_with_descending_order(repository):
+    pages, backwards = walk(repository, ["-rank"])
+
+    items = [item for page in pages for item in page.items]
+    expected = sorted(repository.model.select(), key=lambda item: (-item.rank, item.id))
+    assert [item.id for item in items] == [item.id for item in expected]
+    assert [p.items for p in backwards] == [p.items for p in reversed(pages)]
+
+
+def test_paginate_rejects_invalid_cursor(repository):
+    with pytest.raises(BadRequest):
+        repository.paginate(cursor="not-a-cursor")
+
+    cursor = repository.paginate(limit=5, order_by="rank").next_cursor
+    with pytest.raises(BadRequest):
+        repository.paginate(cursor=cursor, order_by="name")
+
+
+def test_paginate_rejects_nullable_order_fields(repository):
+    with pytest.raises(BadRequest):
+        repository.paginate(order_by=["note"])
+
+
+@pytest.mark.parametrize("limit", [0, -5, "5", None, True])
+def test_paginate_rejects_invalid_limit(repository, limit):
+    with pytest.raises(BadRequest):
+        repository.paginate(limit=limit)
+
+
+def test_paginate_caps_limit(repository):
+    assert check_limit(10**9) == MAX_LIMIT
+    page = repository.paginate(limit=10**9)
+    assert len(page.items) == 23
+    assert page.next_cursor is None
+
+
+def test_response_entity_page_links(repository):
+    page = repository.paginate(repository.paginate(limit=5).next_cursor, limit=5)
+    entity = ResponseEntity.page(page)
+
+    link = entity.values["headers"]["Link"]
+    assert f"cursor={page.next_cursor}" in link
+    assert f"cursor={page.prev_cursor}" in link
+    assert "size=5" in link
+    assert 'rel="next"' in link and 'rel="prev"' in link
+    assert entity.values["value"] == page.items
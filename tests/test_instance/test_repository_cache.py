@@ -0,0 +1,88 @@
+"""
+test_repository_cache.py
+
+Author: Joseph Maclean Arhin
+"""
+import pytest
+
+from flask_easy import db, fields
+from flask_easy.repository.cache import LocalRedis, RedisBackend, RepoCache
+from flask_easy.repository.sql import Repository
+
+
+class Setting(db.Model):
+    key = fields.CharField(unique=True)
+    value = fields.CharField()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cached_repository(request, sqlite_app):
+    backend = RedisBackend(LocalRedis(), ttl=60) if request.param == "redis" else None
+
+    class SettingRepository(Repository):
+        model = Setting
+        cache = RepoCache(ttl=60, max_entries=100, backend=backend)
+
+    Setting.create_table()
+    Setting.insert_many(
+        [{"key": "theme", "value": "dark"}, {"key": "lang", "value": "en"}]
+    ).execute()
+    with sqlite_app.app_context():
+        yield SettingRepository
+
+
+def count_queries(monkeypatch):
+    queries = []
+    database = db.database.obj
+    execute_sql = database.execute_sql
+
+    def counting_execute_sql(sql, params=None, *args, **kwargs):
+        queries.append(sql)
+        return execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(database, "execute_sql", counting_execute_sql)
+    return queries
+
+
+def test_find_by_id_is_served_from_cache(cached_repository, monkeypatch):
+    queries = count_queries(monkeypatch)
+
+    assert cached_repository.find_by_id(1).value == "dark"
+    assert cached_repository.find_by_id(1).value == "dark"
+    assert cached_repository.find({"key": "lang"}).value == "en"
+    assert cached_repository.find({"key": "lang"}).value == "en"
+
+    assert len(queries) == 2
+    assert cached_repository.cache.stats["hits"] == 2
+    assert cached_repository.cache.stats["misses"] == 2
+
+
+def test_writes_invalidate_cache(cached_repository):
+    repository = cached_repository
+    assert repository.find_by_id(1).value == "dark"
+    assert repository.find({"key": "lang"}).value == "en"
+
+    repository.update_by_id(1, {"value": "light"})
+    assert repository.find_by_id(1).value == "light"
+
+    repository.update_many([2], {"value": "fr"})
+    assert repository.find({"key": "lang"}).value == "fr"
+
+    repository.bulk_update([{"id": 2, "value": "de"}])
+    assert repository.find_by_id(2).value == "de"
+
+    repository.upsert_many([{"id": 1, "key": "theme", "value": "blue"}])
+    assert repository.find_by_id(1).value == "blue"
+
+    repository.delete(1)
+    with pytest.raises(repository.model.DoesNotExist):
+        repository.find_by_id(1)
+
+
+def test_memory_cache_evictions():
+    cache = RepoCache(max_entries=3)
+    for obj_id in range(5):
+        cache.get_by_id("Setting", obj_id, lambda i=obj_id: i)
+
+    assert cache.stats["evictions"] > 0
+    assert cache.get_by_id("Setting", 4, lambda: "reloaded") == 4
@@ -0,0 +1,170 @@
+"""
+test_response.py
+
+Author: Joseph Maclean Arhin
+"""
+import dataclasses
+import json
+import threading
+
+from flask_easy import ResponseEntity, db, fields, schema
+from flask_easy.cache import SchemaCache
+
+THREADS = 16
+
+
+class UserSchema(schema.Schema):
+    name = schema.fields.String()
+    email = schema.fields.String()
+
+
+def test_schema_cache_reuses_instances():
+    cache = SchemaCache(maxsize=2)
+
+    first = cache.get_schema(UserSchema, many=True)
+    assert cache.get_schema(UserSchema, many=True) is first
+    assert cache.get_schema(UserSchema, many=False) is not first
+    assert cache.get_schema(UserSchema, only=["name"]).only == {"name"}
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 3
+    assert cache.stats["evictions"] == 1
+    assert (UserSchema, True, None, ()) not in cache
+
+
+def test_make_response_uses_schema_cache(create_app):
+    app = create_app
+
+    @app.get("/users")
+    def users():
+        data = [{"name": "maclean", "email": "me@josephmaclean.dev"}]
+        return ResponseEntity.ok(data).schema(UserSchema, many=True, only=["name"])
+
+    client = app.test_client()
+    for _ in range(3):
+        response = client.get("/users")
+        assert json.loads(response.data) == [{"name": "maclean"}]
+
+    assert app.schema_cache.stats["misses"] == 1
+    assert app.schema_cache.stats["hits"] == 2
+
+
+def test_response_entity_does_not_share_state():
+    first = ResponseEntity.ok({"id": 1}).schema(UserSchema, many=True)
+    second = ResponseEntity.created({"id": 2})
+
+    assert first.values["value"] == {"id": 1}
+    assert first.values["schema"] is UserSchema
+    assert first.values["status"] == 200
+    assert second.values["value"] == {"id": 2}
+    assert second.values["schema"] is None
+    assert second.values["status"] == 201
+    assert not hasattr(first, "__dict__")
+
+
+def test_response_entity_concurrent_builders():
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def build(index):
+        barrier.wait()
+        for _ in range(200):
+            entity = (
+                ResponseEntity.ok(index).status(200 + index).headers({"X-Id": index})
+            )
+            values = entity.values
+            if (values["value"], values["status"], values["headers"]["X-Id"]) != (
+                index,
+                200 + index,
+                index,
+            ):
+                errors.append(values)
+
+    workers = [threading.Thread(target=build, args=(i,)) for i in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert not errors
+
+
+def test_make_response_sets_headers(create_app):
+    app = create_app
+
+    @app.get("/headers")
+    def headers():
+        return ResponseEntity.ok("hello").headers({"X-Easy": "yes"}).status(202)
+
+    response = app.test_client().get("/headers")
+    assert response.status_code == 202
+    assert response.headers["X-Easy"] == "yes"
+    assert response.data == b"hello"
+
+
+@dataclasses.dataclass
+class Greeting:
+    greeting: str
+    count: int = 1
+
+
+class Note(db.Model):
+    __json__ = ("id", "text")
+
+    text = fields.CharField()
+    secret = fields.CharField(default="hunter2")
+
+
+class Account(db.Model):
+    password_hash = fields.CharField()
+
+
+def test_make_response_serializes_values(sqlite_app):
+    app = sqlite_app
+    Note.create_table()
+    note = Note.create(text="hello")
+    db.database.close()
+
+    @app.get("/dict")
+    def plain_dict():
+        return {"greeting": "hello"}
+
+    @app.get("/tuple")
+    def plain_tuple():
+        return [1, 2], 201, {"X-Easy": "yes"}
+
+    @app.get("/dataclass")
+    def dataclass():
+        return ResponseEntity.ok([Greeting("hello")])
+
+    @app.get("/model")
+    def model():
+        return ResponseEntity.ok(Note.get_by_id(note.id))
+
+    client = app.test_client()
+    response = client.get("/dict")
+    assert response.json == {"greeting": "hello"}
+    assert response.mimetype == "application/json"
+    assert response.content_length == len(response.data)
+
+    response = client.get("/tuple")
+    assert response.status_code == 201
+    assert response.headers["X-Easy"] == "yes"
+    assert response.json == [1, 2]
+
+    assert client.get("/dataclass").json == [{"greeting": "hello", "count": 1}]
+    assert client.get("/model").json == {"id": note.id, "text": "hello"}
+
+
+def test_models_without_json_fields_are_not_serialized(sqlite_app):
+    app = sqlite_app
+    Account.create_table()
+    account = Account.create(password_hash="hash")
+    db.database.close()
+
+    @app.get("/account")
+    def get_account():
+        return ResponseEntity.ok(Account.get_by_id(account.id))
+
+    response = app.test_client().get("/account")
+    assert response.status_code == 500
+    assert b"hash" not in response.data
@@ -0,0 +1,149 @@
+"""
+test_routing.py
+
+Author: Joseph Maclean Arhin
+"""
+import gc
+import json
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from flask_easy import FlaskEasy
+from flask_easy.routing import preload
+
+MODULES = {
+    "urls.py": """
+        from flask_easy import Route
+        from manifest_home import home
+        from manifest_users import users
+
+        routes = [Route(home), Route(users, url_prefix="/users")]
+    """,
+    "manifest_home.py": """
+        from flask_easy import Blueprint, ResponseEntity
+
+        home = Blueprint("home", __name__)
+
+        @home.get("/ping")
+        def ping():
+            return ResponseEntity.ok({"ping": "pong"})
+    """,
+    "manifest_users.py": """
+        from flask_easy import Blueprint, ResponseEntity, g
+
+        users = Blueprint("users", __name__)
+
+        @users.before_request
+        def load_user():
+            g.loaded = True
+
+        @users.get("/<int:user_id>")
+        def get_user(user_id):
+            return ResponseEntity.ok({"id": user_id, "loaded": g.loaded})
+    """,
+}
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """project with a manifest and its view modules on sys.path"""
+    for name, source in MODULES.items():
+        (tmp_path / name).write_text(textwrap.dedent(source))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    class Config:
+        APP_NAME = "My Awesome App"
+        DATABASE = {"engine": "SqliteDatabase", "name": str(tmp_path / "test.db")}
+        ROUTE_MANIFEST = "routes.json"
+
+    def create_app(**options):
+        config = type("LazyConfig", (Config,), options)
+        return FlaskEasy().init_app(
+            import_name=__name__, root_path=str(tmp_path), config=config()
+        )
+
+    result = create_app().test_cli_runner().invoke(args=["easy", "routes:manifest"])
+    assert result.exit_code == 0, result.output
+    yield tmp_path, create_app
+    for module in ("manifest_home", "manifest_users"):
+        sys.modules.pop(module, None)
+
+
+def test_route_manifest(project):
+    tmp_path, _ = project
+    manifest = json.loads((tmp_path / "routes.json").read_text())
+
+    assert manifest["blueprints"] == [
+        {"import_path": "manifest_home:home", "url_prefix": None, "path": None},
+        {
+            "import_path": "manifest_users:users",
+            "url_prefix": "/users",
+            "path": "/users",
+        },
+    ]
+
+
+def test_blueprints_are_registered_from_manifest(project):
+    tmp_path, create_app = project
+    (tmp_path / "urls.py").write_text("raise RuntimeError('urls.py was executed')\n")
+    app = create_app()
+
+    assert {"home.ping", "users.get_user"} <= set(app.view_functions)
+    client = app.test_client()
+    assert client.get("/ping").json == {"ping": "pong"}
+    assert client.get("/users/1").json == {"id": 1, "loaded": True}
+
+
+def test_lazy_blueprints(project):
+    _, create_app = project
+    sys.modules.pop("manifest_users", None)
+    app = create_app(LAZY_BLUEPRINTS=True)
+
+    assert "manifest_home" in sys.modules
+    assert "manifest_users" not in sys.modules
+    client = app.test_client()
+    assert client.get("/ping").json == {"ping": "pong"}
+    assert "manifest_users" not in sys.modules
+
+    served = app.url_map.published()
+    assert client.get("/users/1").json == {"id": 1, "loaded": True}
+    assert "users.get_user" not in {rule.endpoint for rule in served.iter_rules()}
+    assert "users.get_user" in {rule.endpoint for rule in app.url_map.iter_rules()}
+    assert not app.lazy_blueprints
+
+
+def test_lazy_blueprints_concurrent_first_requests(project):
+    _, create_app = project
+    sys.modules.pop("manifest_users", None)
+    app = create_app(LAZY_BLUEPRINTS=True)
+    barrier = threading.Barrier(8)
+    statuses = []
+
+    def request(path):
+        barrier.wait()
+        statuses.append(app.test_client().get(path).status_code)
+
+    threads = [
+        threading.Thread(target=request, args=("/users/1" if i % 2 else "/ping",))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * 8
+
+
+def test_preload(project):
+    _, create_app = project
+    app = create_app(LAZY_BLUEPRINTS=True)
+    try:
+        preload(app)
+        assert not app.lazy_blueprints
+        assert not app.url_map.published()._remap  # pylint: disable=W0212
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
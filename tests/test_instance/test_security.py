@@ -0,0 +1,137 @@
+"""
+test_security.py
+
+Author: Joseph Maclean Arhin
+"""
+import base64
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from flask_easy import ResponseEntity, auth_required, authenticator
+from flask_easy.instance import FlaskEasy
+from flask_easy.security import TokenDecoder, UserDetailsToken, is_authorized
+
+decoded = []
+
+
+class HeaderDecoder(TokenDecoder):
+    """token format: <username>:<role>,<role>:<expires in seconds>"""
+
+    def decode_token(self) -> UserDetailsToken:
+        token = self.request.headers.get("Authorization", "")
+        decoded.append(token)
+        username, roles, expires_in = token.split(":")
+        return UserDetailsToken(
+            username=username,
+            roles=roles.split(","),
+            expires_at=time.time() + float(expires_in),
+        )
+
+
+@pytest.fixture
+def secured_app(create_app):
+    app = create_app
+    FlaskEasy.register_auth(HeaderDecoder)
+    authenticator.enable_token_cache(maxsize=8, ttl=60)
+    decoded.clear()
+
+    @app.get("/me")
+    @auth_required(roles=["user"])
+    def me(username):
+        return ResponseEntity.ok({"username": username})
+
+    @app.get("/whoami")
+    @auth_required()
+    def whoami():
+        time.sleep(0.001)
+        return ResponseEntity.ok(
+            {"username": authenticator.user_name, "roles": authenticator.get_roles}
+        )
+
+    @app.get("/admin")
+    @auth_required(roles=["user", "admin"])
+    def admin():
+        return ResponseEntity.ok({})
+
+    yield app
+    authenticator.token_cache = None
+
+
+def test_decoded_tokens_are_cached(secured_app):
+    client = secured_app.test_client()
+    headers = {"Authorization": "maclean:user:60"}
+
+    for _ in range(3):
+        assert client.get("/me", headers=headers).json == {"username": "maclean"}
+    assert decoded == ["maclean:user:60"]
+    assert client.get("/admin", headers=headers).status_code == 401
+    assert authenticator.token_cache.stats["hits"] == 3
+
+
+def test_expired_tokens_are_not_cached(secured_app):
+    client = secured_app.test_client()
+    headers = {"Authorization": "maclean:user:-1"}
+
+    client.get("/me", headers=headers)
+    client.get("/me", headers=headers)
+    assert len(decoded) == 2
+    assert len(authenticator.token_cache) == 0
+
+
+class JwtDecoder(TokenDecoder):
+    """leaves expires_at unset, the cache reads the exp claim"""
+
+    def decode_token(self) -> UserDetailsToken:
+        decoded.append(self.get_token())
+        return UserDetailsToken(username="maclean", roles=["user"])
+
+
+def jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return f"Bearer eyJhbGciOiJIUzI1NiJ9.{payload.decode()}.signature"
+
+
+@pytest.mark.parametrize(
+    "token, decodes",
+    [
+        (jwt({"sub": "maclean", "exp": time.time() + 60}), 1),
+        (jwt({"sub": "maclean", "exp": time.time() - 1}), 2),
+        (jwt({"sub": "maclean"}), 2),
+        ("maclean", 2),
+    ],
+)
+def test_tokens_without_expiry_are_not_cached(secured_app, token, decodes):
+    FlaskEasy.register_auth(JwtDecoder)
+    client = secured_app.test_client()
+
+    client.get("/me", headers={"Authorization": token})
+    client.get("/me", headers={"Authorization": token})
+    assert len(decoded) == decodes
+
+
+def test_concurrent_requests_keep_their_own_user(secured_app):
+    start = threading.Barrier(16)
+
+    def hammer(index):
+        client = secured_app.test_client()
+        headers = {"Authorization": f"user-{index}:role-{index}:60"}
+        start.wait()
+        return [
+            client.get("/whoami", headers=headers).json
+            == {"username": f"user-{index}", "roles": [f"role-{index}"]}
+            for _ in range(25)
+        ]
+
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(hammer, range(16)))
+    assert all(all(result) for result in results)
+
+
+def test_is_authorized():
+    assert is_authorized(["user", "admin"], frozenset(["admin"]))
+    assert not is_authorized(["user"], ["user", "admin"])
+    assert is_authorized(None, [])
@@ -1,14 +1,188 @@
-# """
-# test_sql_respository.py
-#
-# Author: Joseph Maclean Arhin
-# """
-#
-#
-# def test_create(app_with_model, app_with_repository):
-#     User = app_with_model
-#     UserRepository = app_with_repository
-#
-#     UserRepository.create({"name": "maclean"})
-#
-#     print("hello world")
+"""
+test_sql_respository.py
+
+Author: Joseph Maclean Arhin
+"""
+import pytest
+from peewee import (
+    CharField,
+    Model,
+    MySQLDatabase,
+    PostgresqlDatabase,
+    Proxy,
+    SqliteDatabase,
+)
+
+from flask_easy import db, fields
+from flask_easy.exc import BadRequest, NotFoundException, OperationError
+from flask_easy.repository import sql
+from flask_easy.repository.sql import Repository
+
+
+@pytest.fixture
+def user_repository(sqlite_app):
+    class User(db.Model):
+        name = fields.CharField(index=True)
+        age = fields.IntegerField()
+        email = fields.CharField(null=True)
+
+    class UserRepository(Repository):
+        model = User
+
+    User.create_table()
+    User.insert_many(
+        [
+            {"name": "maclean", "age": 27, "email": "me@josephmaclean.dev"},
+            {"name": "ama", "age": 18, "email": "ama@example.com"},
+            {"name": "kofi", "age": 35, "email": None},
+            {"name": "esi", "age": 41, "email": "esi@example.com"},
+        ]
+    ).execute()
+    with sqlite_app.app_context():
+        yield UserRepository
+
+
+def test_create(user_repository):
+    user = user_repository.create({"name": "yaw", "age": 22})
+
+    assert user_repository.find_by_id(user.id).name == "yaw"
+
+
+def test_find(user_repository):
+    assert user_repository.find({"name": "kofi"}).age == 35
+
+    with pytest.raises(NotFoundException):
+        user_repository.find({"name": "nobody"})
+
+
+def test_find_all_lookups(user_repository):
+    def names(query_params, **kwargs):
+        return [user.name for user in user_repository.find_all(query_params, **kwargs)]
+
+    assert names({"age__gt": 27}, order_by="age") == ["kofi", "esi"]
+    assert names({"age__lt": 27}) == ["ama"]
+    assert names({"name__in": ["ama", "esi"]}, order_by="-name") == ["esi", "ama"]
+    assert names({"email__contains": "example"}, order_by=["name"]) == ["ama", "esi"]
+    assert names({}, order_by="-age", limit=2) == ["esi", "kofi"]
+
+
+def test_find_all_pushes_filters_to_database(user_repository):
+    query = user_repository.find_all(
+        {"name": "ama", "age__gte": 18}, fields=["name"], limit=1
+    )
+    sql, params = query.sql()
+
+    assert sql.startswith('SELECT "t1"."name" FROM')
+    assert "WHERE" in sql and "LIMIT" in sql
+    assert params == ["ama", 18, 1]
+
+    plan = " ".join(
+        str(row) for row in db.database.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params)
+    )
+    assert "USING INDEX" in plan
+
+
+def test_find_all_rejects_unknown_fields(user_repository):
+    with pytest.raises(BadRequest):
+        user_repository.find_all({"password": "secret"})
+
+    with pytest.raises(BadRequest):
+        user_repository.find_all({"age__between": [1, 2]})
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_update_by_id_persists(user_repository, monkeypatch, returning):
+    monkeypatch.setattr(sql, "supports_returning", lambda database: returning)
+    user = user_repository.update_by_id(1, {"age": 28})
+
+    assert user.age == 28
+    assert user_repository.find_by_id(1).age == 28
+
+    with pytest.raises(NotFoundException):
+        user_repository.update_by_id(100, {"age": 1})
+
+
+def test_update_many(user_repository):
+    assert user_repository.update_many([1, 2], {"email": None}) == 2
+    assert [u.id for u in user_repository.find_all({"email": None})] == [1, 2, 3]
+
+
+def test_bulk_update(user_repository):
+    count = user_repository.bulk_update(
+        [{"id": 1, "age": 1}, {"id": 2, "age": 2, "name": "akua"}, {"id": 3, "age": 3}],
+        batch_size=2,
+    )
+
+    assert count == 3
+    users = user_repository.find_all({}, order_by="id")
+    assert [(u.name, u.age) for u in users] == [
+        ("maclean", 1),
+        ("akua", 2),
+        ("kofi", 3),
+        ("esi", 41),
+    ]
+
+
+def test_upsert_many(user_repository):
+    count = user_repository.upsert_many(
+        [{"id": 4, "name": "esi", "age": 42}, {"id": 5, "name": "yaw", "age": 22}]
+    )
+
+    assert count == 2
+    assert user_repository.find_by_id(4).age == 42
+    assert user_repository.find({"name": "yaw"}).age == 22
+
+
+def test_upsert_many_on_mysql_behind_proxy(monkeypatch):
+    proxy = Proxy()
+
+    class Setting(Model):
+        key = CharField(unique=True)
+
+        class Meta:
+            database = proxy
+
+    class SettingRepository(Repository):
+        model = Setting
+
+    statements = []
+
+    def execute_sql(database, sql, params=None):  # pylint: disable=W0613
+        statements.append(sql)
+        return type("Cursor", (), {"rowcount": 1})()
+
+    monkeypatch.setattr(MySQLDatabase, "execute_sql", execute_sql)
+    proxy.initialize(MySQLDatabase("app"))
+
+    assert SettingRepository.upsert_many([{"id": 1, "key": "theme"}]) == 1
+    assert "ON DUPLICATE KEY UPDATE" in statements[0]
+
+
+def test_database_limits_behind_proxy(monkeypatch):
+    proxy = Proxy()
+    proxy.initialize(PostgresqlDatabase("app"))
+    assert sql.max_parameters(proxy) == 65535
+    assert sql.supports_returning(proxy)
+
+    monkeypatch.setattr(sql.sqlite3, "sqlite_version_info", (3, 31, 0))
+    proxy.initialize(SqliteDatabase(":memory:"))
+    assert sql.max_parameters(proxy) == 999
+    assert not sql.supports_returning(proxy)
+
+
+def test_create_all_in_batches(user_repository, monkeypatch):
+    monkeypatch.setattr(sql, "max_parameters", lambda database: 40)
+    rows = [{"name": f"user {i}", "age": i} for i in range(25)]
+
+    assert user_repository.create_all(rows) == 25
+    ids = user_repository.create_all(rows[:3], batch_size=2, returning=True)
+    assert ids == [30, 31, 32]
+    assert user_repository.find_all({}).count() == 32
+
+
+def test_create_all_is_atomic(user_repository):
+    rows = [{"name": "yaw", "age": 22}, {"name": "ama", "age": None}]
+
+    with pytest.raises(OperationError):
+        user_repository.create_all(rows, batch_size=1)
+    assert user_repository.find_all({"name": "yaw"}).count() == 0
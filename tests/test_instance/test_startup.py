@@ -0,0 +1,76 @@
+"""
+test_startup.py
+
+Author: Joseph Maclean Arhin
+"""
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ("flasgger", "marshmallow", "peewee_migrate", "pymongo")
+# modules only needed by cli commands or mongodb
+INIT_APP_MODULES = ("peewee_migrate", "pymongo")
+# import time of flask_easy itself, flask excluded. Importing peewee alone
+# takes longer, so this fails when a heavy import creeps back in
+IMPORT_BUDGET_MS = 40
+
+
+def run_python(code, *options):
+    result = subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+        cwd=os.path.dirname(__file__),
+    )
+    return result
+
+
+def test_import_does_not_load_optional_dependencies():
+    loaded = run_python(
+        "import sys, flask_easy\n"
+        f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    ).stdout.split()
+    assert loaded == []
+
+
+def test_import_time_budget():
+    cumulative = {}
+    for line in run_python("import flask_easy", "-X", "importtime").stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, total, module = line.split("|")
+            if total.strip().isdigit():
+                cumulative[module.strip()] = int(total)
+
+    own_ms = (cumulative["flask_easy"] - cumulative.get("flask", 0)) / 1000
+    assert own_ms < IMPORT_BUDGET_MS
+
+
+def test_init_app_does_not_load_optional_dependencies():
+    loaded = run_python(
+        "import sys\n"
+        "from flask_easy import FlaskEasy\n"
+        "class Config:\n"
+        "    APP_NAME = 'startup'\n"
+        "    DATABASE = {'engine': 'SqliteDatabase', 'name': ':memory:'}\n"
+        "FlaskEasy().init_app(import_name='startup', config=Config())\n"
+        f"print(*[m for m in {INIT_APP_MODULES!r} if m in sys.modules])"
+    ).stdout.split()
+    assert loaded == []
+
+
+def test_swagger_is_set_up_by_init_app(create_app):
+    assert "flasgger.apidocs" in create_app.view_functions
+
+    client = create_app.test_client()
+    assert client.get("/apidocs/").status_code == 200
+    assert client.get("/apispec_1.json").status_code == 200
+
+
+def test_lazy_exports():
+    import flask_easy  # pylint: disable=C0415
+    from flask_easy.instance import get_swag  # pylint: disable=C0415
+
+    assert flask_easy.swag is get_swag()
+    assert "ResponseEntity" in flask_easy.__all__
+    assert "validator" in dir(flask_easy)
@@ -0,0 +1,98 @@
+"""
+test_streaming.py
+
+Author: Joseph Maclean Arhin
+"""
+import json
+
+import pytest
+
+from flask_easy import ResponseEntity, db, fields, schema
+
+
+class ItemSchema(schema.Schema):
+    id = schema.fields.Integer()
+    name = schema.fields.String()
+
+
+@pytest.fixture
+def item_app(sqlite_app):
+    app = sqlite_app
+
+    class Item(db.Model):
+        name = fields.CharField()
+
+    Item.create_table()
+    Item.insert_many([{"name": f"item {i}"} for i in range(25)]).execute()
+    db.database.close()
+    return app, Item
+
+
+def test_stream_json_array(item_app):
+    app, item = item_app
+
+    @app.get("/items")
+    def items():
+        query = item.select().order_by(item.id)
+        return (
+            ResponseEntity.ok(query).schema(ItemSchema, many=True).stream(chunk_size=10)
+        )
+
+    response = app.test_client().get("/items")
+    assert response.is_streamed
+    assert response.mimetype == "application/json"
+    data = json.loads(response.data)
+    assert len(data) == 25
+    assert data[0] == {"id": 1, "name": "item 0"}
+
+
+def test_stream_ndjson(item_app):
+    app, item = item_app
+
+    @app.get("/items")
+    def items():
+        query = item.select().order_by(item.id)
+        return ResponseEntity.ok(query).schema(ItemSchema).stream(ndjson=True)
+
+    response = app.test_client().get("/items")
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.data.splitlines()
+    assert len(lines) == 25
+    assert json.loads(lines[-1]) == {"id": 25, "name": "item 24"}
+
+
+def test_stream_empty_result(item_app):
+    app, _ = item_app
+
+    @app.get("/empty")
+    def empty():
+        return ResponseEntity.ok([]).stream()
+
+    assert json.loads(app.test_client().get("/empty").data) == []
+
+
+def test_stream_reads_rows_as_they_are_sent(item_app):
+    app, item = item_app
+    query = item.select().order_by(item.id)
+    rows = query.iterator
+    sent = []
+
+    def iterator():
+        for row in rows():
+            sent.append(row.id)
+            yield row
+
+    query.iterator = iterator
+
+    @app.get("/items")
+    def items():
+        return ResponseEntity.ok(query).schema(ItemSchema).stream(chunk_size=10)
+
+    response = app.test_client().get("/items", buffered=False)
+    chunks = iter(response.response)
+    body = [next(chunks), next(chunks)]
+    assert len(sent) == 10
+    body.extend(chunks)
+    assert len(json.loads(b"".join(body))) == len(sent) == 25
+    assert not query._cursor_wrapper.row_cache
+    response.close()
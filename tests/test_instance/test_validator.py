@@ -0,0 +1,132 @@
+"""
+test_validator.py
+
+Author: Joseph Maclean Arhin
+"""
+import io
+import json
+
+from flask_easy import ResponseEntity, g, request, schema, validator
+from flask_easy.streaming import iter_json_array
+
+
+class UserSchema(schema.Schema):
+    name = schema.fields.String(required=True)
+    age = schema.fields.Integer(required=True)
+
+
+def test_validated_data_is_loaded_once(create_app):
+    app = create_app
+
+    @app.post("/users")
+    @validator(UserSchema, arg_name="user")
+    def create_user(user):
+        assert g.validated_data is user
+        return ResponseEntity.created(user)
+
+    client = app.test_client()
+    response = client.post("/users", json={"name": "maclean", "age": "27"})
+    assert response.status_code == 201
+    assert response.json == {"name": "maclean", "age": 27}
+
+    response = client.post("/users", json={"name": "maclean"})
+    assert response.status_code == 400
+    assert response.json == {"age": ["Missing data for required field."]}
+
+
+def test_validator_options(create_app):
+    app = create_app
+
+    @app.patch("/users")
+    @validator(UserSchema, many=True, partial=True, unknown=schema.EXCLUDE)
+    def update_users():
+        return ResponseEntity.ok(g.validated_data)
+
+    client = app.test_client()
+    response = client.patch("/users", json=[{"age": 3, "role": "admin"}, {}])
+    assert response.json == [{"age": 3}, {}]
+
+    response = client.patch("/users", json=[{"age": 3}, {"age": "old"}])
+    assert response.status_code == 400
+    assert response.json == {"1": {"age": ["Not a valid integer."]}}
+
+
+def test_batch_validation(create_app):
+    app = create_app
+
+    @app.post("/users/import")
+    @validator(UserSchema, many=True, max_items=1000, arg_name="users")
+    def import_users(users):
+        return ResponseEntity.ok({"imported": len(users), "last": users[-1]})
+
+    @app.post("/users/strict")
+    @validator(UserSchema, many=True, collect_errors=False)
+    def import_strict():
+        return ResponseEntity.ok({})
+
+    client = app.test_client()
+    users = [{"name": f"user-{i}", "age": i} for i in range(1000)]
+    response = client.post("/users/import", json=users)
+    assert response.json == {"imported": 1000, "last": users[-1]}
+
+    response = client.post("/users/import", json=users + [{"name": "x", "age": 1}])
+    assert response.status_code == 400
+    assert response.json == {"_schema": ["Longer than maximum length 1000."]}
+
+    invalid = [{"name": "a"}, {"name": "b", "age": 1}, {"age": "c"}]
+    assert client.post("/users/import", json=invalid).json == {
+        "0": {"age": ["Missing data for required field."]},
+        "2": {
+            "age": ["Not a valid integer."],
+            "name": ["Missing data for required field."],
+        },
+    }
+    assert list(client.post("/users/strict", json=invalid).json) == ["0"]
+
+    response = client.post(
+        "/users/import",
+        data='[{"name": "a", "age": 1},',
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+    assert response.json == {"_schema": ["Invalid JSON: unexpected end of json array."]}
+    assert client.post("/users/import", data="[]").status_code == 415
+
+
+def test_batch_validation_after_body_was_read(create_app):
+    app = create_app
+
+    @app.before_request
+    def read_body():
+        request.get_data()
+
+    @app.post("/users/import")
+    @validator(UserSchema, many=True, arg_name="users")
+    def import_users(users):
+        return ResponseEntity.ok({"imported": len(users)})
+
+    users = [{"name": f"user-{i}", "age": i} for i in range(3)]
+    response = app.test_client().post("/users/import", json=users)
+    assert response.json == {"imported": 3}
+
+
+def test_iter_json_array_reads_in_small_chunks():
+    body = json.dumps([{"id": i, "name": "é" * (i % 5)} for i in range(50)] + [1234])
+    stream = io.BytesIO(body.encode())
+    assert list(iter_json_array(stream, read_size=3)) == json.loads(body)
+
+
+def test_iter_json_array_decodes_long_items_once(monkeypatch):
+    item = {"rows": [{"id": i, "name": r'a "quoted" ]}' * (i % 3)} for i in range(500)]}
+    body = json.dumps([item, 1e-7, -2.5e10, item])
+    attempts = []
+    raw_decode = json.JSONDecoder.raw_decode
+
+    def counting_raw_decode(self, s, idx=0):
+        attempts.append(idx)
+        return raw_decode(self, s, idx)
+
+    monkeypatch.setattr(json.JSONDecoder, "raw_decode", counting_raw_decode)
+    stream = io.BytesIO(body.encode())
+    assert list(iter_json_array(stream, read_size=7)) == json.loads(body)
+    assert len(attempts) <= 8
@@ -0,0 +1,7 @@
+"""
+urls.py
+
+Author: Joseph Maclean Arhin
+"""
+
+routes = []